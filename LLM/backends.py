@@ -0,0 +1,367 @@
+# LLM/backends.py
+"""
+Backends LLM interchangeables derrière un même protocole : génération,
+streaming, tokenisation et sauvegarde / restauration d'état (KV cache).
+Le backend llama_cpp sert en production ; le backend stub, déterministe,
+simule les latences d'évaluation du prompt et par token pour faire tourner
+les tests de performance du pipeline sur n'importe quelle machine.
+"""
+
+import time
+import re
+import zlib
+from typing import Protocol, runtime_checkable
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """Contrat commun des backends utilisés par LLMHandler."""
+
+    model_id: str
+
+    def n_ctx(self):
+        """Taille de la fenêtre de contexte en tokens."""
+
+    def tokenize(self, text, add_bos=False):
+        """Texte -> liste de tokens."""
+
+    def detokenize(self, tokens):
+        """Liste de tokens -> texte."""
+
+    def stream(self, prompt, max_tokens, stop=None):
+        """Génère un morceau de texte par token échantillonné.
+
+        Le prompt (texte ou tokens) partageant un préfixe avec les tokens déjà
+        évalués n'est évalué qu'à partir du premier token différent.
+        """
+
+    def generate(self, prompt, max_tokens, stop=None, greedy=False):
+        """Variante non streamée de stream() (greedy : décodage glouton)."""
+
+    def greedy_verify(self, context, draft):
+        """Vérifie en une passe des tokens proposés à la suite du contexte.
+
+        Retourne (nombre de tokens du brouillon acceptés, token glouton suivant).
+        Les tokens rejetés ne restent pas dans le contexte évalué.
+        """
+
+    def eval(self, tokens):
+        """Évalue des tokens à la suite du contexte courant."""
+
+    def evaluated_tokens(self):
+        """Tokens actuellement présents dans le KV cache."""
+
+    def reset(self):
+        """Vide le contexte évalué."""
+
+    def save_state(self):
+        """Instantané du contexte évalué (KV cache)."""
+
+    def load_state(self, state):
+        """Restaure un instantané produit par save_state()."""
+
+class LlamaCppBackend:
+    def __init__(self, model_path, n_gpu_layers=-1, main_gpu=0, n_ctx=None, verbose=False,
+                 temperature=None, **kwargs):
+        """
+        Args:
+            model_path: Fichier GGUF
+            n_gpu_layers: Couches déchargées sur le GPU (-1 = toutes)
+            main_gpu: Index du GPU principal
+            n_ctx: Fenêtre de contexte (défaut llama_cpp si absent)
+            temperature: Température d'échantillonnage (défaut llama_cpp si absent)
+            **kwargs: Options supplémentaires passées à llama_cpp.Llama
+        """
+        from llama_cpp import Llama
+
+        if n_ctx is not None:
+            kwargs["n_ctx"] = n_ctx
+        self.model_id = model_path
+        self.sampling = {"temperature": temperature} if temperature is not None else {}
+        self.llm = Llama(
+            model_path=model_path,
+            n_gpu_layers=n_gpu_layers,
+            main_gpu=main_gpu,
+            verbose=verbose,
+            **kwargs
+        )
+
+    def n_ctx(self):
+        return self.llm.n_ctx()
+
+    def tokenize(self, text, add_bos=False):
+        return self.llm.tokenize(text.encode("utf-8"), add_bos=add_bos)
+
+    def detokenize(self, tokens):
+        return self.llm.detokenize(tokens).decode("utf-8", errors="ignore")
+
+    def stream(self, prompt, max_tokens, stop=None):
+        for chunk in self.llm(prompt, max_tokens=max_tokens, stop=stop or [], stream=True, **self.sampling):
+            yield chunk['choices'][0]['text']
+
+    def generate(self, prompt, max_tokens, stop=None, greedy=False):
+        params = {"temperature": 0.0} if greedy else {}
+        output = self.llm(prompt, max_tokens=max_tokens, stop=stop or [], **params)
+        return output['choices'][0]['text']
+
+    def greedy_verify(self, context, draft):
+        # Les logits de chaque position du lot ne sont conservés qu'avec logits_all
+        if not self.llm.context_params.logits_all:
+            raise RuntimeError("greedy_verify nécessite un modèle chargé avec logits_all=True")
+
+        import numpy as np
+
+        tokens = list(context) + list(draft)
+        keep = 0
+        for a, b in zip(self.evaluated_tokens(), tokens):
+            if a != b:
+                break
+            keep += 1
+        # Le dernier token du contexte est ré-évalué : ses logits prédisent draft[0]
+        keep = min(keep, len(context) - 1)
+        self.llm.n_tokens = keep
+        self.llm.eval(tokens[keep:])
+
+        predicted = np.argmax(self.llm.scores[len(context) - 1:len(tokens)], axis=1)
+        accepted = 0
+        while accepted < len(draft) and predicted[accepted] == draft[accepted]:
+            accepted += 1
+
+        # Tokens rejetés écartés : le prochain eval les retire du KV cache
+        self.llm.n_tokens = len(context) + accepted
+        return accepted, int(predicted[accepted])
+
+    def eval(self, tokens):
+        self.llm.eval(tokens)
+
+    def evaluated_tokens(self):
+        return self.llm.input_ids[:self.llm.n_tokens].tolist()
+
+    def reset(self):
+        self.llm.reset()
+
+    def save_state(self):
+        return self.llm.save_state()
+
+    def load_state(self, state):
+        self.llm.load_state(state)
+
+class StubBackend:
+    """Modèle factice déterministe au coût simulé.
+
+    Tokenisation par mots (un token par mot, espace de tête compris) et
+    modèle n-gramme sur les réponses configurées : la plus longue fin du
+    contexte retrouvée dans une réponse donne le mot suivant, sinon une
+    réponse commence, choisie de façon stable d'après le contexte. Le préfixe déjà évalué est réutilisé
+    comme avec llama_cpp : seules les latences changent de backend.
+    """
+
+    BOS = 1
+    DEFAULT_RESPONSES = (
+        "Bien sûr, je m'en occupe tout de suite.",
+        "Il est actuellement quinze heures, et la journée est ensoleillée.",
+        "Je n'ai pas bien compris, pouvez-vous reformuler votre demande ?",
+        "D'accord. J'ai noté ce rappel pour demain matin à neuf heures.",
+    )
+
+    _PIECE_RE = re.compile(r"\s*\S+|\s+")
+
+    def __init__(self, prompt_eval_ms_per_token=0.5, token_latency_ms=20.0, n_ctx=4096,
+                 responses=None, model_id="stub"):
+        """
+        Args:
+            prompt_eval_ms_per_token: Coût simulé par token de prompt évalué
+            token_latency_ms: Coût simulé par token généré
+            n_ctx: Fenêtre de contexte simulée
+            responses: Réponses possibles (choix stable d'après le prompt)
+            model_id: Identifiant (clés de cache)
+        """
+        self.prompt_eval_ms_per_token = prompt_eval_ms_per_token
+        self.token_latency_ms = token_latency_ms
+        self._n_ctx = n_ctx
+        self.responses = tuple(responses or self.DEFAULT_RESPONSES)
+        self.model_id = model_id
+
+        self._pieces = {self.BOS: ""}  # token -> texte
+        self._evaluated = []
+
+        self._sequences = [self.tokenize(response + "\n") for response in self.responses]
+
+    def n_ctx(self):
+        return self._n_ctx
+
+    def _token_id(self, piece):
+        # Stable d'un processus à l'autre (pas de hash() randomisé)
+        token = 2 + zlib.crc32(piece.encode("utf-8")) % 65000
+        self._pieces.setdefault(token, piece)
+        return token
+
+    def tokenize(self, text, add_bos=False):
+        tokens = [self.BOS] if add_bos else []
+        return tokens + [self._token_id(piece) for piece in self._PIECE_RE.findall(text)]
+
+    def detokenize(self, tokens):
+        return "".join(self._pieces.get(token, "") for token in tokens)
+
+    def _next_token(self, tokens, max_order=8):
+        """Token glouton suivant le contexte."""
+        best_order, best_token = 0, None
+        for sequence in self._sequences:
+            for end in range(1, len(sequence)):
+                order = 0
+                while (order < min(end, len(tokens), max_order)
+                       and sequence[end - 1 - order] == tokens[-1 - order]):
+                    order += 1
+                if order > best_order:
+                    best_order, best_token = order, sequence[end]
+        if best_token is not None:
+            return best_token
+
+        index = zlib.crc32(",".join(map(str, tokens)).encode("ascii")) % len(self._sequences)
+        return self._sequences[index][0]
+
+    def _reuse_prefix(self, tokens):
+        """Tokens du préfixe évalué réutilisables (le dernier est toujours ré-évalué)."""
+        reused = 0
+        for a, b in zip(self._evaluated, tokens):
+            if a != b:
+                break
+            reused += 1
+        return min(reused, len(tokens) - 1)
+
+    def _simulate(self, n_tokens, cost_ms):
+        if n_tokens and cost_ms:
+            time.sleep(n_tokens * cost_ms / 1000)
+
+    def stream(self, prompt, max_tokens, stop=None):
+        tokens = list(prompt) if isinstance(prompt, (list, tuple)) else self.tokenize(prompt, add_bos=True)
+        if len(tokens) + max_tokens > self._n_ctx:
+            raise ValueError(f"Requested tokens ({len(tokens) + max_tokens}) exceed context window of {self._n_ctx}")
+
+        self._simulate(len(tokens) - self._reuse_prefix(tokens), self.prompt_eval_ms_per_token)
+        self._evaluated = list(tokens)
+
+        emitted = ""
+        for _ in range(max_tokens):
+            self._simulate(1, self.token_latency_ms)
+            token = self._next_token(self._evaluated)
+            self._evaluated.append(token)
+            candidate = emitted + self._pieces[token]
+            cut = min((i for i in (candidate.find(s) for s in stop or []) if i >= 0), default=-1)
+            if cut >= 0:
+                if cut > len(emitted):
+                    yield candidate[len(emitted):cut]
+                return
+            emitted = candidate
+            yield self._pieces[token]
+
+    def generate(self, prompt, max_tokens, stop=None, greedy=False):
+        # Toujours glouton
+        return "".join(self.stream(prompt, max_tokens, stop))
+
+    def greedy_verify(self, context, draft):
+        tokens = list(context) + list(draft)
+        # Vérification en lot : une passe de décodage de la cible (poids lus une
+        # fois pour toutes les positions) plus l'évaluation des positions ajoutées
+        self._simulate(1, self.token_latency_ms)
+        self._simulate(len(tokens) - self._reuse_prefix(tokens), self.prompt_eval_ms_per_token)
+
+        accepted = 0
+        while accepted < len(draft) and self._next_token(tokens[:len(context) + accepted]) == draft[accepted]:
+            accepted += 1
+
+        self._evaluated = tokens[:len(context) + accepted]
+        return accepted, self._next_token(self._evaluated)
+
+    def eval(self, tokens):
+        self._simulate(len(tokens), self.prompt_eval_ms_per_token)
+        self._evaluated.extend(tokens)
+
+    def evaluated_tokens(self):
+        return list(self._evaluated)
+
+    def reset(self):
+        self._evaluated = []
+
+    def save_state(self):
+        return tuple(self._evaluated)
+
+    def load_state(self, state):
+        self._evaluated = list(state)
+
+BACKENDS = {
+    "llama_cpp": LlamaCppBackend,
+    "stub": StubBackend,
+}
+
+def create_backend(config):
+    """Instancie le backend décrit par la section llm de la configuration.
+
+    config['backend'] choisit l'implémentation (llama_cpp par défaut) ;
+    config['stub'] contient les paramètres du backend stub.
+    """
+    name = config.get('backend', 'llama_cpp')
+    if name not in BACKENDS:
+        raise ValueError(f"Backend LLM inconnu: {name} (disponibles: {', '.join(BACKENDS)})")
+
+    if name == "stub":
+        return StubBackend(**config.get('stub', {}))
+    # La vérification spéculative lit les logits de chaque position du lot
+    speculative = (config.get('speculative') or {}).get('enabled', False)
+    return LlamaCppBackend(
+        model_path=config['model_path'],
+        n_gpu_layers=config.get('n_gpu_layers', -1),
+        main_gpu=config.get('gpu_device_index', 0),
+        n_ctx=config.get('context_length'),
+        temperature=config.get('temperature'),
+        logits_all=speculative
+    )
+
+def create_draft_backend(config):
+    """Backend brouillon du décodage spéculatif (section llm.speculative).
+
+    Même backend et même GPU que le modèle principal par défaut ; en pratique
+    le modèle de fallback (phi-2) pour un principal llama-2-13b.
+    """
+    speculative = config.get('speculative') or {}
+    return create_backend({
+        "backend": speculative.get('backend', config.get('backend', 'llama_cpp')),
+        "model_path": speculative.get('draft_model_path'),
+        "n_gpu_layers": speculative.get('draft_n_gpu_layers', config.get('n_gpu_layers', -1)),
+        "gpu_device_index": speculative.get('draft_gpu_device_index', config.get('gpu_device_index', 0)),
+        "context_length": config.get('context_length'),
+        "stub": {"model_id": "draft", **speculative.get('stub', {})}
+    })
+
+# Test du backend stub
+def test_stub_backend():
+    """Test du backend déterministe et de LLMHandler sans modèle"""
+    print("🧪 TEST STUB BACKEND")
+    print("="*25)
+
+    backend = StubBackend(prompt_eval_ms_per_token=2.0, token_latency_ms=10.0)
+    print(f"   Protocole respecté: {isinstance(backend, LLMBackend)}")
+
+    print("\n🎯 Test 1: Déterminisme")
+    first = backend.generate("Q: quelle heure est-il ? A: ", 64, stop=["Q:", "\n"])
+    second = StubBackend(0, 0).generate("Q: quelle heure est-il ? A: ", 64, stop=["Q:", "\n"])
+    print(f"   '{first}' identique: {first == second}")
+
+    print("\n🎯 Test 2: Réutilisation du préfixe évalué")
+    prompt = backend.tokenize("Tu es Luxa. " * 50, add_bos=True)
+    for label in ("froid", "chaud"):
+        start = time.perf_counter()
+        next(backend.stream(prompt, 8))
+        print(f"   Premier token ({label}): {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    print("\n🎯 Test 3: LLMHandler sur backend stub")
+    from LLM.llm_handler import LLMHandler
+    handler = LLMHandler({"backend": "stub", "stub": {"token_latency_ms": 5.0}})
+    session = handler.create_session(system_prompt="Tu es Luxa, un assistant vocal.")
+    for text in ("bonjour", "quelle heure est-il ?"):
+        print(f"   {text} -> {handler.chat(session, text)}")
+    print(f"   Dernière génération: {handler.last_generation}")
+
+    print("\n✅ Test Stub Backend terminé")
+
+if __name__ == "__main__":
+    test_stub_backend()
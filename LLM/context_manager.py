@@ -0,0 +1,130 @@
+# LLM/context_manager.py
+"""
+Budget de tokens du contexte (models.llm.context_length / max_tokens) :
+comptage via un cache de tokenisation, et réduction de l'historique quand le
+prompt d'un tour ne tient plus. Le préfixe système n'est jamais touché (son
+KV cache reste réutilisable) et la réduction descend sous un seuil bas pour
+que les tours suivants s'ajoutent de nouveau sans reconstruction.
+"""
+
+from collections import OrderedDict
+
+def summarize_questions(turns, previous_summary=""):
+    """Résumé sans appel au modèle : les questions des tours abandonnés."""
+    questions = [user_text.strip().rstrip("?.! ") for user_text, _ in turns if user_text.strip()]
+    parts = ([previous_summary] if previous_summary else []) + questions
+    return "; ".join(parts)
+
+class ContextBudget:
+    STRATEGIES = ("trim", "summarize")
+
+    def __init__(self, tokenize, context_length=4096, max_tokens=512, strategy="trim",
+                 low_watermark=0.75, summary_max_tokens=96, cache_size=2048, summarizer=None):
+        """
+        Args:
+            tokenize: Fonction (texte, add_bos) -> liste de tokens du modèle
+            context_length: Fenêtre de contexte du modèle
+            max_tokens: Tokens réservés à la génération
+            strategy: "trim" (tours anciens abandonnés) ou "summarize" (résumés)
+            low_watermark: Fraction du budget visée après réduction
+            summary_max_tokens: Taille maximale du résumé
+            cache_size: Entrées du cache de tokenisation (LRU)
+            summarizer: Fonction (tours, résumé précédent) -> résumé
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Stratégie de contexte inconnue: {strategy}")
+        if max_tokens >= context_length:
+            raise ValueError(f"max_tokens ({max_tokens}) doit être inférieur à context_length ({context_length})")
+
+        self._tokenize = tokenize
+        self.context_length = context_length
+        self.max_tokens = max_tokens
+        self.strategy = strategy
+        self.low_watermark = low_watermark
+        self.summary_max_tokens = summary_max_tokens
+        self.cache_size = cache_size
+        self.summarizer = summarizer or summarize_questions
+
+        self._cache = OrderedDict()  # (texte, add_bos) -> tokens
+        self.stats = {"cache_hits": 0, "cache_misses": 0, "fits": 0, "dropped_turns": 0, "summaries": 0}
+
+    @property
+    def prompt_budget(self):
+        """Tokens disponibles pour le prompt, génération réservée."""
+        return self.context_length - self.max_tokens
+
+    def tokenize(self, text, add_bos=False):
+        key = (text, add_bos)
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return list(tokens)
+
+        self.stats["cache_misses"] += 1
+        tokens = tuple(self._tokenize(text, add_bos))
+        self._cache[key] = tokens
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return list(tokens)
+
+    def count(self, text, add_bos=False):
+        return len(self.tokenize(text, add_bos))
+
+    def fits(self, prompt_tokens):
+        return prompt_tokens <= self.prompt_budget
+
+    def generation_budget(self, prompt_tokens, max_tokens=None):
+        """Tokens générables après un prompt, plafonnés par la fenêtre."""
+        return min(max_tokens or self.max_tokens, self.context_length - prompt_tokens)
+
+    def fit_history(self, fixed_tokens, turn_costs, summary=""):
+        """
+        Choisit les tours conservés pour que le prompt retombe sous le seuil bas.
+
+        Args:
+            fixed_tokens: Tokens hors historique (préfixe système + nouveau tour)
+            turn_costs: Coût en tokens de chaque tour, du plus ancien au plus récent
+            summary: Résumé courant des tours déjà abandonnés
+
+        Returns:
+            (nombre de tours récents conservés, coût réservé au résumé)
+        """
+        self.stats["fits"] += 1
+        target = int(self.prompt_budget * self.low_watermark)
+        summary_reserve = self.summary_max_tokens if self.strategy == "summarize" else 0
+        available = target - fixed_tokens - summary_reserve
+
+        kept, used = 0, 0
+        for cost in reversed(turn_costs):
+            if used + cost > available:
+                break
+            used += cost
+            kept += 1
+
+        self.stats["dropped_turns"] += len(turn_costs) - kept
+        return kept, summary_reserve
+
+    def summarize(self, dropped_turns, previous_summary=""):
+        """Résumé des tours abandonnés, tronqué à summary_max_tokens."""
+        self.stats["summaries"] += 1
+        parts = self.summarizer(dropped_turns, previous_summary).split("; ")
+        # Les plus anciens sujets disparaissent en premier
+        while len(parts) > 1 and self.count("; ".join(parts)) > self.summary_max_tokens:
+            parts.pop(0)
+        words = "; ".join(parts).split()
+        while words and self.count(" ".join(words)) > self.summary_max_tokens:
+            words.pop()
+        return " ".join(words)
+
+    def get_status(self):
+        lookups = self.stats["cache_hits"] + self.stats["cache_misses"]
+        return {
+            "context_length": self.context_length,
+            "max_tokens": self.max_tokens,
+            "prompt_budget": self.prompt_budget,
+            "strategy": self.strategy,
+            "cache_entries": len(self._cache),
+            "cache_hit_rate": self.stats["cache_hits"] / lookups if lookups else 0.0,
+            **self.stats
+        }
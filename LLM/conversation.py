@@ -0,0 +1,135 @@
+# LLM/conversation.py
+"""
+Session de conversation multi-tours : l'historique est conservé sous forme
+de tokens déjà évalués afin que llama_cpp ne ré-évalue que le nouveau tour.
+"""
+
+import time
+import uuid
+from collections import deque
+
+class ConversationSession:
+    def __init__(self, tokenize, system_prompt="", max_history_turns=10, session_id=None, context=None):
+        """
+        Args:
+            tokenize: Fonction (texte, add_bos) -> liste de tokens du modèle
+            system_prompt: Préambule évalué une fois en tête de conversation
+            max_history_turns: Nombre de tours conservés (interface.conversation_history)
+            session_id: Identifiant de session (généré si absent)
+            context: ContextBudget optionnel (budget de tokens, tokenisation en cache)
+        """
+        self.session_id = session_id or uuid.uuid4().hex[:12]
+        self.context = context
+        self.tokenize = context.tokenize if context else tokenize
+        self.system_prompt = system_prompt
+        self.max_history_turns = max_history_turns
+        self.summary = ""   # Résumé des tours abandonnés (stratégie "summarize")
+
+        self.history = []   # [(question, réponse)]
+        self.tokens = []    # Tokens de la conversation, dans l'ordre d'évaluation
+        self.state = None   # État llama_cpp (KV cache) sauvegardé quand une autre session prend la main
+        self.created_at = time.time()
+
+        self.stats = {
+            "turns": 0,
+            "prompt_tokens": 0,
+            "reused_tokens": 0,
+            "evaluated_tokens": 0,
+            "history_rebuilds": 0,
+            "budget_trims": 0,
+            "last_turn": None
+        }
+        self.prompt_sizes = deque(maxlen=50)  # Taille du prompt de chaque tour
+
+        self._prefix_tokens = self._tokenize_prefix()
+        self.tokens = list(self._prefix_tokens)
+
+    def _tokenize_prefix(self):
+        if self.system_prompt:
+            return self.tokenize(f"{self.system_prompt}\n", True)
+        return self.tokenize("", True)
+
+    @staticmethod
+    def format_turn(user_text):
+        return f"Q: {user_text} A: "
+
+    def build_prompt_tokens(self, user_text):
+        """Tokens du prompt complet : conversation évaluée + nouveau tour."""
+        if len(self.history) >= self.max_history_turns:
+            self._rebuild_tokens(self.history[-(self.max_history_turns - 1):] if self.max_history_turns > 1 else [])
+
+        turn_tokens = self.tokenize(self.format_turn(user_text), False)
+        if self.context and not self.context.fits(len(self.tokens) + len(turn_tokens)):
+            self._fit_to_budget(len(turn_tokens))
+            if not self.context.fits(len(self.tokens) + len(turn_tokens)):
+                raise ValueError(f"Tour trop long pour la fenêtre de contexte "
+                                 f"({len(self.tokens) + len(turn_tokens)} > {self.context.prompt_budget} tokens)")
+        return self.tokens + turn_tokens
+
+    def _turn_cost(self, user_text, response_text):
+        return (len(self.tokenize(self.format_turn(user_text), False))
+                + len(self.tokenize(f"{response_text}\n", False)))
+
+    def _fit_to_budget(self, new_turn_tokens):
+        """Abandonne (ou résume) les tours les plus anciens jusqu'au seuil bas du budget."""
+        costs = [self._turn_cost(user_text, response_text) for user_text, response_text in self.history]
+        kept, _ = self.context.fit_history(len(self._prefix_tokens) + new_turn_tokens, costs, self.summary)
+        dropped = self.history[:len(self.history) - kept]
+
+        if self.context.strategy == "summarize" and dropped:
+            self.summary = self.context.summarize(dropped, self.summary)
+        self._rebuild_tokens(self.history[len(self.history) - kept:] if kept else [])
+        self.stats["budget_trims"] += 1
+
+    def commit_turn(self, user_text, response_text, prompt_tokens, reused_tokens):
+        """Enregistre le tour terminé et étend la séquence de tokens."""
+        self.history.append((user_text, response_text))
+        self.tokens = prompt_tokens + self.tokenize(f"{response_text}\n", False)
+
+        evaluated = len(prompt_tokens) - reused_tokens
+        self.stats["turns"] += 1
+        self.stats["prompt_tokens"] += len(prompt_tokens)
+        self.stats["reused_tokens"] += reused_tokens
+        self.stats["evaluated_tokens"] += evaluated
+        self.stats["last_turn"] = {
+            "prompt_tokens": len(prompt_tokens),
+            "reused_tokens": reused_tokens,
+            "evaluated_tokens": evaluated,
+            "history_turns": len(self.history)
+        }
+        self.prompt_sizes.append(len(prompt_tokens))
+
+    def _rebuild_tokens(self, kept_history):
+        """Reconstruit la séquence après abandon des tours les plus anciens.
+
+        Le préfixe système reste identique : seul ce qui suit est ré-évalué.
+        """
+        self.history = list(kept_history)
+        tokens = list(self._prefix_tokens)
+        if self.summary:
+            # Après le préfixe système : celui-ci reste réutilisable tel quel
+            tokens += self.tokenize(f"(Résumé de la conversation : {self.summary})\n", False)
+        for user_text, response_text in self.history:
+            tokens += self.tokenize(self.format_turn(user_text), False)
+            tokens += self.tokenize(f"{response_text}\n", False)
+        self.tokens = tokens
+        self.stats["history_rebuilds"] += 1
+
+    def reset(self):
+        """Oublie l'historique (le préfixe système est conservé)."""
+        self.history = []
+        self.summary = ""
+        self.tokens = list(self._prefix_tokens)
+        self.state = None
+
+    def get_status(self):
+        return {
+            "session_id": self.session_id,
+            "history_turns": len(self.history),
+            "context_tokens": len(self.tokens),
+            "prompt_budget": self.context.prompt_budget if self.context else None,
+            "prompt_tokens_per_turn": list(self.prompt_sizes),
+            "summary": self.summary,
+            "has_saved_state": self.state is not None,
+            **self.stats
+        }
@@ -1,20 +1,431 @@
-from llama_cpp import Llama
+import logging
+import time
+
+from LLM.backends import create_backend, create_draft_backend
+from LLM.sentence_chunker import SentenceChunker
+from LLM.conversation import ConversationSession
+from LLM.context_manager import ContextBudget
+from LLM.prefix_cache import PrefixStateCache
+from LLM.response_cache import ResponseCache
+from LLM.speculative import SpeculativeDecoder
+from monitoring.metrics_publisher import get_metrics_publisher
+from monitoring.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+def _log_event(level, event, **fields):
+    """Événement structuré "event clé=valeur", formaté seulement si le niveau est actif."""
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s", event, " ".join(f"{k}={v}" for k, v in fields.items()),
+                   extra={"event": event, "fields": fields})
 
 class LLMHandler:
-    def __init__(self, config):
+    def __init__(self, config, performance_thresholds=None, metrics=None, backend=None):
+        """backend : instance LLMBackend déjà chargée (sinon créée d'après config['backend'])."""
         self.config = config
-        self.llm = Llama(
-            model_path=config['model_path'],
-            n_gpu_layers=config['n_gpu_layers'],
-            main_gpu=config['gpu_device_index'],
-            verbose=False
+        self.metrics = metrics
+        self.llm = backend or create_backend(config)
+        self.model_id = self.llm.model_id
+
+        # Décodage spéculatif : le petit modèle (fallback) propose, ce modèle vérifie
+        self.speculative = None
+        speculative_config = config.get('speculative') or {}
+        if speculative_config.get('enabled') and config.get('temperature') != 0:
+            # Sortie gloutonne de la cible : n'a de sens qu'en décodage glouton
+            _log_event(logging.WARNING, "llm.speculative_disabled",
+                       reason="llm.temperature doit valoir 0", temperature=config.get('temperature'))
+        elif speculative_config.get('enabled'):
+            self.speculative = SpeculativeDecoder(
+                self.llm,
+                create_draft_backend(config),
+                k=speculative_config.get('k', 4),
+                baseline_tokens_per_s=speculative_config.get('baseline_tokens_per_s')
+            )
+        self.max_tokens = config.get('max_tokens', 100)
+        self.stop = ["Q:", "\n"]
+        self.system_prompt = config.get('system_prompt', "")
+        self.conversation_history = config.get('conversation_history', 10)
+
+        # Budget de tokens (models.llm.context_length / max_tokens) et cache de tokenisation
+        self.context = ContextBudget(
+            self.llm.tokenize,
+            context_length=self.llm.n_ctx(),
+            max_tokens=self.max_tokens,
+            strategy=config.get('context_strategy', 'trim'),
+            low_watermark=config.get('context_low_watermark', 0.75)
         )
-        print(f"LLM Handler initialisé avec le modèle {self.config['model_path']}")
 
-    def get_response(self, prompt):
+        # Session dont le KV cache occupe actuellement le modèle
+        self._active_session = None
+
+        # Instantanés des préfixes système déjà évalués
+        self.prefix_cache = PrefixStateCache(
+            max_entries=config.get('prefix_cache_size', 8),
+            persist_dir=config.get('prefix_cache_dir')
+        )
+
+        # Réponses aux requêtes répétées, hors tours dépendant du contexte
+        self.response_cache = ResponseCache(
+            max_entries=config.get('response_cache_size', 256),
+            ttl_s=config.get('response_cache_ttl_s', 300),
+            metrics=metrics
+        )
+
+        # Seuil de latence du premier token (performance_thresholds.llm_first_token_ms)
+        thresholds = performance_thresholds or {}
+        self.first_token_threshold_ms = thresholds.get('llm_first_token_ms', 500)
+        self.last_first_token_ms = None
+
+        # Télémétrie de génération : publiée hors de la boucle de génération
+        self.publisher = get_metrics_publisher() if metrics else None
+        self.last_generation = None
+        self.stats = {
+            "requests": 0,
+            "interrupted": 0,
+            "prompt_tokens": 0,
+            "generated_tokens": 0,
+            "decoded_tokens": 0,
+            "prompt_eval_ms_total": 0.0,
+            "decode_ms_total": 0.0
+        }
+        _log_event(logging.INFO, "llm.init", model=self.model_id, backend=type(self.llm).__name__)
+
+    def _build_prompt(self, prompt):
+        return f"Q: {prompt} A: "
+
+    def _cache_key(self, prompt, max_tokens, session=None):
+        # Le gabarit (question seule ou conversation avec son préambule) change la réponse
+        mode = ("chat", session.system_prompt) if session is not None else ("qa",)
+        params = {"max_tokens": max_tokens or self.max_tokens, "stop": tuple(self.stop), "mode": mode}
+        return self.response_cache.make_key(prompt, params, self.model_id)
+
+    def get_response(self, prompt, context_dependent=False):
         """Génère une réponse à partir du prompt."""
-        print("🧠 Le LLM réfléchit...")
-        output = self.llm(f"Q: {prompt} A: ", max_tokens=100, stop=["Q:", "\n"])
-        response_text = output['choices'][0]['text'].strip()
-        print(f"Réponse du LLM: '{response_text}'")
-        return response_text 
\ No newline at end of file
+        request_start = time.perf_counter()
+        cache_key = None
+        if context_dependent:
+            self.response_cache.record_bypass()
+        else:
+            cache_key = self._cache_key(prompt, None)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                _log_event(logging.DEBUG, "llm.response", source="cache", chars=len(cached))
+                return cached
+
+        self._release_active_session()
+        response_text = "".join(
+            self._stream_completion(self._build_prompt(prompt), request_start=request_start)
+        ).strip()
+        if cache_key is not None:
+            self.response_cache.put(cache_key, response_text)
+        _log_event(logging.DEBUG, "llm.response", source="model", chars=len(response_text))
+        return response_text
+
+    def stream_response(self, prompt, max_tokens=None, on_first_token=None, context_dependent=False):
+        """Génère la réponse token par token (llama_cpp stream=True).
+
+        on_first_token est appelé dès le premier token, avant qu'il soit rendu.
+        """
+        request_start = time.perf_counter()
+        cache_key = None
+        if context_dependent:
+            self.response_cache.record_bypass()
+        else:
+            cache_key = self._cache_key(prompt, max_tokens)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                if on_first_token:
+                    on_first_token()
+                yield cached
+                return
+
+        # Requête sans état : le KV cache n'appartient plus à aucune session
+        self._release_active_session()
+        pieces = []
+        for text in self._stream_completion(self._build_prompt(prompt), max_tokens, on_first_token,
+                                            request_start=request_start):
+            pieces.append(text)
+            yield text
+
+        # Génération menée à terme uniquement (pas de réponse tronquée par un barge-in)
+        if cache_key is not None:
+            self.response_cache.put(cache_key, "".join(pieces).strip())
+
+    def _stream_completion(self, prompt, max_tokens=None, on_first_token=None,
+                           request_start=None, reused_tokens=0):
+        """Boucle de génération commune (prompt texte ou liste de tokens).
+
+        request_start inclut le travail fait avant l'appel au modèle
+        (restauration d'état de session) dans le temps au premier token.
+        """
+        call_start = time.perf_counter()
+        request_start = request_start or call_start
+        prompt_tokens = len(prompt) if isinstance(prompt, list) else self.context.count(prompt, add_bos=True)
+        max_tokens = self.context.generation_budget(prompt_tokens, max_tokens)
+        if max_tokens <= 0:
+            raise ValueError(f"Prompt de {prompt_tokens} tokens hors fenêtre de contexte ({self.context.context_length})")
+        first_token_at = None
+        last_token_at = None
+        generated = 0
+        completed = False
+        stream = None
+
+        try:
+            generate = self.speculative.stream if self.speculative else self.llm.stream
+            stream = generate(prompt, max_tokens, self.stop)
+            for text in stream:
+                # Un morceau par token échantillonné (texte éventuellement retenu par les stops)
+                generated += 1
+                last_token_at = time.perf_counter()
+                if not text:
+                    continue
+
+                if first_token_at is None:
+                    first_token_at = last_token_at
+                    self._check_first_token_latency(request_start, first_token_at)
+                    if on_first_token:
+                        on_first_token()
+
+                yield text
+            completed = True
+        finally:
+            # Aussi pour une génération interrompue (barge-in, échéance)
+            if stream is not None:
+                stream.close()
+            self._record_generation(prompt_tokens, reused_tokens, generated, request_start, call_start,
+                                    first_token_at, last_token_at, completed)
+
+    def _record_generation(self, prompt_tokens, reused_tokens, generated, request_start, call_start,
+                           first_token_at, last_token_at, completed):
+        """Statistiques d'une génération : locales, puis publiées sans bloquer."""
+        end = time.perf_counter()
+        first_token_at = first_token_at or end
+        decode_s = (last_token_at - first_token_at) if last_token_at else 0.0
+
+        # Spans de la requête en cours (sans effet si le traçage est désactivé)
+        tracer = get_tracer()
+        tracer.record("llm.prompt_eval", call_start, first_token_at, cat="llm",
+                      prompt_tokens=prompt_tokens, reused_tokens=reused_tokens)
+        tracer.record("llm.decode", first_token_at, end, cat="llm", generated_tokens=generated, completed=completed)
+
+        stats = {
+            "prompt_tokens": prompt_tokens,
+            "reused_tokens": reused_tokens,
+            "generated_tokens": generated,
+            "prompt_eval_ms": (first_token_at - call_start) * 1000,
+            "first_token_ms": (first_token_at - request_start) * 1000,
+            "decode_ms": decode_s * 1000,
+            # Le premier token est produit par l'évaluation du prompt
+            "decode_tokens_per_s": (generated - 1) / decode_s if generated > 1 and decode_s > 0 else 0.0,
+            "total_ms": (end - request_start) * 1000,
+            "completed": completed
+        }
+        self.last_generation = stats
+        self.stats["requests"] += 1
+        self.stats["interrupted"] += 0 if completed else 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["generated_tokens"] += generated
+        self.stats["decoded_tokens"] += max(generated - 1, 0)
+        self.stats["prompt_eval_ms_total"] += stats["prompt_eval_ms"]
+        self.stats["decode_ms_total"] += stats["decode_ms"]
+
+        if self.publisher:
+            self.publisher.publish(
+                self.metrics.record_llm_generation,
+                prompt_tokens, generated,
+                stats["prompt_eval_ms"] / 1000, stats["first_token_ms"] / 1000,
+                stats["total_ms"] / 1000, stats["decode_tokens_per_s"]
+            )
+            if self.speculative and self.speculative.last_generation:
+                speculative = self.speculative.last_generation
+                self.publisher.publish(
+                    self.metrics.record_llm_speculative,
+                    speculative["drafted_tokens"], speculative["accepted_tokens"],
+                    speculative["tokens_per_round"], speculative["speedup"]
+                )
+
+        _log_event(logging.DEBUG, "llm.generation",
+                   prompt_tokens=prompt_tokens, reused_tokens=reused_tokens, generated_tokens=generated,
+                   prompt_eval_ms=f"{stats['prompt_eval_ms']:.1f}",
+                   first_token_ms=f"{stats['first_token_ms']:.1f}",
+                   decode_tok_s=f"{stats['decode_tokens_per_s']:.1f}",
+                   completed=completed)
+
+    def stream_sentences(self, prompt, max_tokens=None, on_first_token=None, chunker=None, session=None,
+                         stop_event=None):
+        """Génère la réponse phrase par phrase : la première proposition peut
+        partir en synthèse pendant que la génération continue.
+
+        Avec une session, le prompt est un nouveau tour de la conversation.
+        stop_event (threading.Event) arrête la génération au token suivant
+        (barge-in) ; la phrase en cours n'est pas émise.
+        """
+        chunker = chunker or SentenceChunker()
+        first_text = True
+
+        if session is not None:
+            tokens = self.stream_chat(session, prompt, max_tokens, on_first_token)
+        else:
+            tokens = self.stream_response(prompt, max_tokens, on_first_token)
+
+        try:
+            for token in tokens:
+                if stop_event is not None and stop_event.is_set():
+                    return
+                # Le premier token porte souvent l'espace qui suit "A:"
+                if first_text:
+                    token = token.lstrip()
+                    first_text = not token
+                yield from chunker.feed(token)
+
+            yield from chunker.flush()
+        finally:
+            # Libère le modèle tout de suite (génération comptée comme interrompue)
+            tokens.close()
+
+    def tokenize(self, text, add_bos=False):
+        return self.context.tokenize(text, add_bos)
+
+    def create_session(self, system_prompt=None, max_history_turns=None, session_id=None):
+        """Crée une conversation multi-tours réutilisant le KV cache entre tours."""
+        session = ConversationSession(
+            self.tokenize,
+            system_prompt=self.system_prompt if system_prompt is None else system_prompt,
+            max_history_turns=max_history_turns or self.conversation_history,
+            session_id=session_id,
+            context=self.context
+        )
+        self._prime_session_prefix(session)
+        return session
+
+    def _prime_session_prefix(self, session):
+        """Part de l'instantané du préfixe système au lieu de le ré-évaluer."""
+        prefix_tokens = session.tokens
+        if len(prefix_tokens) <= 1:
+            return
+
+        key = self.prefix_cache.make_key((self.model_id, self.llm.n_ctx()), prefix_tokens)
+        state = self.prefix_cache.get(key)
+
+        if state is None:
+            # Première occurrence : évaluer le préfixe une seule fois
+            self._release_active_session()
+            start_time = time.perf_counter()
+            self.llm.reset()
+            self.llm.eval(prefix_tokens)
+            eval_ms = (time.perf_counter() - start_time) * 1000
+            state = self.llm.save_state()
+            self.prefix_cache.put(key, state, eval_ms)
+            _log_event(logging.INFO, "llm.prefix_eval", tokens=len(prefix_tokens), eval_ms=f"{eval_ms:.0f}")
+
+        session.state = state
+        session.state_source = "prefix_cache"
+
+    def stream_chat(self, session, user_text, max_tokens=None, on_first_token=None):
+        """Tour de conversation en streaming : seul le nouveau tour est évalué.
+
+        Les tokens de la conversation sont déjà dans le KV cache (ou restaurés
+        depuis l'état sauvegardé de la session) ; llama_cpp détecte le préfixe
+        commun et n'évalue que le suffixe.
+        """
+        request_start = time.perf_counter()
+        # Un premier tour ne dépend d'aucun contexte : le cache peut répondre
+        cache_key = None
+        if session.history:
+            self.response_cache.record_bypass()
+        else:
+            cache_key = self._cache_key(user_text, max_tokens, session)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                prompt_tokens = session.build_prompt_tokens(user_text)
+                if on_first_token:
+                    on_first_token()
+                yield cached
+                # Rien n'a été évalué : aucun préfixe réutilisé
+                session.commit_turn(user_text, cached, prompt_tokens, 0)
+                return
+
+        self._activate_session(session)
+        prompt_tokens = session.build_prompt_tokens(user_text)
+        reused_tokens = self._common_prefix_length(self.llm.evaluated_tokens(), prompt_tokens)
+        _log_event(logging.DEBUG, "llm.turn_prompt", session=session.session_id,
+                   prompt_tokens=len(prompt_tokens), budget=self.context.prompt_budget,
+                   history_turns=len(session.history))
+
+        pieces = []
+        completed = False
+        try:
+            for text in self._stream_completion(prompt_tokens, max_tokens, on_first_token,
+                                                request_start=request_start, reused_tokens=reused_tokens):
+                pieces.append(text)
+                yield text
+            completed = True
+        finally:
+            if completed and cache_key is not None:
+                self.response_cache.put(cache_key, "".join(pieces).strip())
+            # Même interrompu (barge-in), le tour partiel fait partie de la conversation
+            session.commit_turn(user_text, "".join(pieces).strip(), prompt_tokens, reused_tokens)
+
+    def chat(self, session, user_text, max_tokens=None):
+        """Variante non streamée de stream_chat."""
+        return "".join(self.stream_chat(session, user_text, max_tokens)).strip()
+
+    def _activate_session(self, session):
+        """Donne le KV cache à une session (sauvegarde / restauration d'état)."""
+        if self._active_session is session:
+            return
+
+        self._release_active_session()
+        # Sans état sauvegardé, le préfixe commun avec le KV cache courant
+        # (ex: même prompt système) est tout de même réutilisé
+        if session.state is not None:
+            start_time = time.perf_counter()
+            self.llm.load_state(session.state)
+            if session.state_source == "prefix_cache":
+                self.prefix_cache.record_restore((time.perf_counter() - start_time) * 1000)
+            session.state = None
+            session.state_source = None
+        self._active_session = session
+
+    def _release_active_session(self):
+        if self._active_session is not None:
+            self._active_session.state = self.llm.save_state()
+            self._active_session.state_source = "session"
+            self._active_session = None
+
+    @staticmethod
+    def _common_prefix_length(evaluated, tokens):
+        n = 0
+        for a, b in zip(evaluated, tokens):
+            if a != b:
+                break
+            n += 1
+        # llama_cpp ré-évalue toujours au moins le dernier token du prompt
+        return min(n, len(tokens) - 1)
+
+    def _check_first_token_latency(self, start_time, first_token_at):
+        """Compare la latence du premier token au seuil configuré."""
+        self.last_first_token_ms = (first_token_at - start_time) * 1000
+        if self.last_first_token_ms > self.first_token_threshold_ms:
+            _log_event(logging.WARNING, "llm.slow_first_token",
+                       first_token_ms=f"{self.last_first_token_ms:.0f}",
+                       threshold_ms=self.first_token_threshold_ms)
+
+    def get_status(self):
+        """Télémétrie cumulée et état des caches."""
+        requests = self.stats["requests"]
+        decode_s = self.stats["decode_ms_total"] / 1000
+        decoded = self.stats["decoded_tokens"]
+        return {
+            "model": self.model_id,
+            "backend": type(self.llm).__name__,
+            "avg_prompt_eval_ms": self.stats["prompt_eval_ms_total"] / requests if requests else 0.0,
+            "avg_decode_tokens_per_s": decoded / decode_s if decode_s > 0 and decoded > 0 else 0.0,
+            "last_generation": self.last_generation,
+            "prefix_cache": self.prefix_cache.get_status(),
+            "response_cache": self.response_cache.get_status(),
+            "context": self.context.get_status(),
+            "speculative": self.speculative.get_status() if self.speculative else None,
+            "metrics_publisher": self.publisher.get_status() if self.publisher else None,
+            **self.stats
+        }
@@ -0,0 +1,411 @@
+# LLM/llm_worker.py
+"""
+Inférence LLM dans un processus isolé : le modèle vit dans un worker dédié,
+les requêtes passent par un pipe local avec réponses en streaming, limite de
+concurrence, échéances par requête et redémarrage automatique après crash.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Fabriques de modèles (importables par nom : compatibles avec le mode spawn)
+
+def load_llm_handler(config, performance_thresholds=None):
+    """Charge le LLMHandler llama_cpp dans le processus worker."""
+    from LLM.llm_handler import LLMHandler
+    return LLMHandler(config, performance_thresholds)
+
+def load_stand_in(**kwargs):
+    """Modèle de substitution local (tests, machines sans modèle)."""
+    return StandInLLM(**kwargs)
+
+class StandInLLM:
+    """Modèle factice déterministe : écho du prompt, délai par token configurable."""
+
+    def __init__(self, token_delay_s=0.0, crash_on=None, fail_on_load=False):
+        if fail_on_load:
+            # Simule un modèle introuvable ou corrompu
+            raise RuntimeError("chargement du modèle impossible")
+        self.token_delay_s = token_delay_s
+        self.crash_on = crash_on
+
+    def stream_response(self, prompt, max_tokens=None, **kwargs):
+        if self.crash_on and self.crash_on in prompt:
+            # Simule un crash de la bibliothèque native
+            os._exit(1)
+        words = f"Vous avez dit : {prompt}".split()
+        for i, word in enumerate(words[:max_tokens or len(words)]):
+            if self.token_delay_s:
+                time.sleep(self.token_delay_s)
+            yield word if i == 0 else f" {word}"
+
+def _worker_main(conn, factory, factory_kwargs):
+    """Boucle du processus worker : une génération à la fois, annulable entre tokens."""
+    model = factory(**factory_kwargs)
+    conn.send(("ready", None, os.getpid()))
+
+    pending = deque()
+    cancelled = set()
+
+    def _drain_messages(block):
+        while block or conn.poll():
+            message = conn.recv()
+            block = False
+            if message[0] == "cancel":
+                cancelled.add(message[1])
+            elif message[0] == "stop":
+                return False
+            else:
+                pending.append(message)
+        return True
+
+    while True:
+        if not pending and not _drain_messages(block=True):
+            return
+
+        _, req_id, prompt, params, deadline_ts = pending.popleft()
+        if req_id in cancelled:
+            cancelled.discard(req_id)
+            continue
+        if deadline_ts is not None and time.time() > deadline_ts:
+            conn.send(("deadline", req_id, {"tokens": 0, "stage": "before_start"}))
+            continue
+
+        start = time.perf_counter()
+        n_tokens = 0
+        expired = False
+        try:
+            for text in model.stream_response(prompt, **params):
+                conn.send(("token", req_id, text))
+                n_tokens += 1
+
+                # Annulation / échéance vérifiées entre deux tokens
+                if not _drain_messages(block=False):
+                    return
+                if req_id in cancelled:
+                    break
+                if deadline_ts is not None and time.time() > deadline_ts:
+                    expired = True
+                    break
+
+            # Réponse tronquée par l'échéance : statut distinct, jamais un succès
+            conn.send(("deadline" if expired else "done", req_id, {
+                "tokens": n_tokens,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "cancelled": req_id in cancelled,
+                "stage": "generation"
+            }))
+        except Exception as e:
+            conn.send(("error", req_id, f"{type(e).__name__}: {e}"))
+        finally:
+            cancelled.discard(req_id)
+
+class LLMWorkerClient:
+    # États du client : stopped, starting, ready, restarting (attente de backoff), failed (terminal)
+
+    def __init__(self, factory=load_llm_handler, factory_kwargs=None, max_concurrency=2,
+                 default_deadline_s=30.0, startup_timeout_s=120.0,
+                 max_startup_failures=3, restart_backoff_s=0.5, max_restart_backoff_s=30.0):
+        """
+        Args:
+            factory: Fonction top-level créant le modèle dans le worker
+            factory_kwargs: Arguments de la fabrique (doivent être picklables)
+            max_concurrency: Requêtes simultanément admises vers le worker
+            default_deadline_s: Échéance par défaut d'une requête
+            startup_timeout_s: Délai de chargement du modèle au démarrage
+            max_startup_failures: Crashs consécutifs avant "ready" au-delà desquels
+                le client passe à l'état terminal "failed"
+            restart_backoff_s: Délai avant le premier redémarrage après un crash au chargement
+                (doublé à chaque échec consécutif)
+            max_restart_backoff_s: Plafond du délai de redémarrage
+        """
+        self.factory = factory
+        self.factory_kwargs = factory_kwargs or {}
+        self.max_concurrency = max_concurrency
+        self.default_deadline_s = default_deadline_s
+        self.startup_timeout_s = startup_timeout_s
+        self.max_startup_failures = max_startup_failures
+        self.restart_backoff_s = restart_backoff_s
+        self.max_restart_backoff_s = max_restart_backoff_s
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._requests = {}  # req_id -> queue de messages
+        self._process = None
+        self._conn = None
+        self._reader = None
+        self._ready = threading.Event()
+        self._closing = False
+        self.state = "stopped"
+        self._startup_failures = 0
+        self._failure = None
+
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "errors": 0,
+            "deadline_exceeded": 0,
+            "cancelled": 0,
+            "restarts": 0,
+            "startup_crashes": 0,
+            "worker_pid": None
+        }
+
+    def start(self):
+        """
+        Démarre le worker et attend le chargement du modèle
+
+        Raises:
+            RuntimeError: Client en échec (crashs répétés au chargement)
+            TimeoutError: Modèle non chargé dans startup_timeout_s
+        """
+        with self._lock:
+            if self.state == "failed":
+                raise RuntimeError(f"Worker LLM en échec: {self._failure}")
+            if self.state == "stopped":
+                self._spawn()
+
+        # Redémarrages avec backoff compris ; l'état "failed" interrompt l'attente
+        deadline = time.monotonic() + self.startup_timeout_s
+        while not self._ready.wait(0.05):
+            if self.state == "failed":
+                raise RuntimeError(f"Worker LLM en échec: {self._failure}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Worker LLM non prêt après {self.startup_timeout_s}s")
+
+    def _spawn(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        self._ready.clear()
+        self.state = "starting"
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.factory, self.factory_kwargs),
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._reader = threading.Thread(target=self._read_loop, args=(parent_conn,), daemon=True)
+        self._reader.start()
+        logger.info(f"🧠 Worker LLM démarré (pid {self._process.pid})")
+
+    def _read_loop(self, conn):
+        """Distribue les messages du worker ; détecte sa mort."""
+        try:
+            while True:
+                kind, req_id, payload = conn.recv()
+                if kind == "ready":
+                    with self._lock:
+                        self.stats["worker_pid"] = payload
+                        self.state = "ready"
+                        self._startup_failures = 0
+                    self._ready.set()
+                    continue
+                with self._lock:
+                    request_queue = self._requests.get(req_id)
+                if request_queue is not None:
+                    request_queue.put((kind, payload))
+        except (EOFError, OSError):
+            pass
+
+        if not self._closing:
+            self._on_worker_died(conn)
+
+    def _on_worker_died(self, conn):
+        """Échec des requêtes en cours puis redémarrage, avec backoff si le chargement crashe."""
+        with self._lock:
+            if conn is not self._conn:
+                return
+            self._ready.clear()
+            if self._process is not None:
+                self._process.join(timeout=1)
+            exitcode = self._process.exitcode if self._process else None
+            for request_queue in self._requests.values():
+                request_queue.put(("error", f"worker crashed (exit code {exitcode})"))
+
+            # Mort avant "ready" : la fabrique du modèle échoue, redémarrer aussitôt boucle
+            delay = 0.0
+            if self.state == "starting":
+                self._startup_failures += 1
+                self.stats["startup_crashes"] += 1
+                if self._startup_failures >= self.max_startup_failures:
+                    self.state = "failed"
+                    self._failure = (f"{self._startup_failures} crashs consécutifs au chargement "
+                                     f"(dernier code {exitcode})")
+                    logger.error(f"❌ Worker LLM abandonné: {self._failure}")
+                    return
+                delay = min(self.max_restart_backoff_s,
+                            self.restart_backoff_s * 2 ** (self._startup_failures - 1))
+            logger.error(f"❌ Worker LLM terminé (code {exitcode}), redémarrage dans {delay:.1f}s")
+            self.state = "restarting"
+
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            if self._closing or conn is not self._conn:
+                return
+            self.stats["restarts"] += 1
+            self._spawn()
+
+    def stream(self, prompt, deadline_s=None, **params):
+        """
+        Génère en streaming dans le worker
+
+        Raises:
+            TimeoutError: Échéance dépassée (attente d'un créneau incluse)
+            RuntimeError: Erreur ou crash du worker
+        """
+        deadline_s = deadline_s if deadline_s is not None else self.default_deadline_s
+        deadline = time.monotonic() + deadline_s
+
+        if not self._slots.acquire(timeout=deadline_s):
+            self._count("deadline_exceeded")
+            raise TimeoutError("Aucun créneau LLM libre avant l'échéance")
+
+        req_id = next(self._ids)
+        request_queue = queue.Queue()
+        finished = False
+        timed_out = False
+        try:
+            self.start()
+            with self._lock:
+                self._requests[req_id] = request_queue
+            self._count("requests")
+
+            # L'échéance voyage en temps mural : le worker l'applique aussi
+            deadline_ts = time.time() + (deadline - time.monotonic())
+            self._send(("generate", req_id, prompt, params, deadline_ts))
+
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    kind, payload = request_queue.get(timeout=max(0.0, remaining))
+                except queue.Empty:
+                    # Compté une seule fois ; le worker reçoit quand même l'annulation
+                    timed_out = True
+                    self._count("deadline_exceeded")
+                    raise TimeoutError(f"Échéance LLM dépassée ({deadline_s}s)")
+
+                if kind == "token":
+                    yield payload
+                elif kind == "done":
+                    finished = True
+                    self._count("completed")
+                    return
+                elif kind == "deadline":
+                    # Le worker a coupé la génération : la réponse reçue est tronquée
+                    finished = True
+                    self._count("deadline_exceeded")
+                    raise TimeoutError(f"Échéance LLM dépassée ({deadline_s}s, "
+                                       f"{payload['tokens']} tokens générés)")
+                else:
+                    finished = True
+                    self._count("errors")
+                    raise RuntimeError(f"Erreur worker LLM: {payload}")
+        finally:
+            if not finished:
+                # Consommateur parti ou échéance : libérer le worker au plus tôt
+                if not timed_out:
+                    self._count("cancelled")
+                self._send(("cancel", req_id), ignore_errors=True)
+            with self._lock:
+                self._requests.pop(req_id, None)
+            self._slots.release()
+
+    def _count(self, key, amount=1):
+        # Appelé depuis les threads des appelants, comme _read_loop et _on_worker_died
+        with self._lock:
+            self.stats[key] += amount
+
+    def generate(self, prompt, deadline_s=None, **params):
+        """Variante non streamée de stream()."""
+        return "".join(self.stream(prompt, deadline_s=deadline_s, **params)).strip()
+
+    def _send(self, message, ignore_errors=False):
+        try:
+            with self._send_lock:
+                self._conn.send(message)
+        except (OSError, EOFError, BrokenPipeError):
+            if not ignore_errors:
+                raise RuntimeError("Worker LLM injoignable")
+
+    def shutdown(self):
+        """Arrête le worker."""
+        self._closing = True
+        if self.state != "failed":
+            self.state = "stopped"
+        self._send(("stop", None), ignore_errors=True)
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.kill()
+        logger.info("🛑 Worker LLM arrêté")
+
+    def get_status(self):
+        with self._lock:
+            in_flight = len(self._requests)
+            stats = dict(self.stats)
+        return {
+            "state": self.state,
+            "alive": self._process is not None and self._process.is_alive(),
+            "failure": self._failure,
+            "in_flight": in_flight,
+            "max_concurrency": self.max_concurrency,
+            **stats
+        }
+
+# Test du worker isolé
+def test_llm_worker():
+    """Test du worker LLM avec le modèle de substitution"""
+    print("🧪 TEST LLM WORKER")
+    print("="*25)
+
+    client = LLMWorkerClient(factory=load_stand_in,
+                             factory_kwargs={"token_delay_s": 0.05, "crash_on": "crash"})
+    client.start()
+
+    print("\n🎯 Test 1: Streaming")
+    print(f"   {list(client.stream('bonjour Luxa'))}")
+
+    print("\n🎯 Test 2: Échéance")
+    try:
+        client.generate("une réponse un peu plus longue que l'échéance", deadline_s=0.1)
+    except TimeoutError as e:
+        print(f"   TimeoutError: {e}")
+
+    print("\n🎯 Test 3: Crash et redémarrage")
+    try:
+        client.generate("crash")
+    except RuntimeError as e:
+        print(f"   RuntimeError: {e}")
+    print(f"   Après redémarrage: {client.generate('encore là ?')}")
+
+    print(f"\n📊 Statut: {client.get_status()}")
+    client.shutdown()
+
+    print("\n🎯 Test 4: Crashs au chargement (backoff puis échec)")
+    broken = LLMWorkerClient(factory=load_stand_in, factory_kwargs={"fail_on_load": True},
+                             max_startup_failures=3, restart_backoff_s=0.1)
+    start = time.perf_counter()
+    try:
+        broken.generate("bonjour")
+    except RuntimeError as e:
+        print(f"   RuntimeError après {time.perf_counter() - start:.1f}s: {e}")
+    status = broken.get_status()
+    print(f"   État: {status['state']}, lancements: {status['restarts'] + 1}")
+    broken.shutdown()
+    print("\n✅ Test LLM Worker terminé")
+
+if __name__ == "__main__":
+    test_llm_worker()
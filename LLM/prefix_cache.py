@@ -0,0 +1,119 @@
+# LLM/prefix_cache.py
+"""
+Cache des états llama_cpp (KV cache) après évaluation d'un préfixe commun
+(prompt système, persona) : chaque préfixe distinct n'est évalué qu'une fois,
+les nouvelles sessions restaurent l'instantané.
+"""
+
+import hashlib
+import logging
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+class PrefixStateCache:
+    def __init__(self, max_entries=8, persist_dir=None):
+        """
+        Args:
+            max_entries: Nombre d'instantanés gardés en mémoire (éviction LRU)
+            persist_dir: Répertoire de persistance optionnel (survit aux redémarrages)
+        """
+        self.max_entries = max_entries
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = OrderedDict()  # clé -> état llama_cpp
+
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "eval_count": 0,
+            "eval_ms_total": 0.0,
+            "restore_count": 0,
+            "restore_ms_total": 0.0
+        }
+
+    @staticmethod
+    def make_key(model_id, tokens):
+        """Clé d'un préfixe : identité du modèle + tokens exacts."""
+        digest = hashlib.sha1(str(model_id).encode("utf-8"))
+        digest.update(",".join(map(str, tokens)).encode("ascii"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Retourne l'instantané du préfixe (mémoire puis disque) ou None."""
+        state = self._entries.get(key)
+        if state is not None:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return state
+
+        state = self._load_from_disk(key)
+        if state is not None:
+            self.stats["disk_hits"] += 1
+            self._store(key, state)
+            return state
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, state, eval_ms):
+        """Enregistre l'instantané d'un préfixe fraîchement évalué."""
+        self.stats["eval_count"] += 1
+        self.stats["eval_ms_total"] += eval_ms
+        self._store(key, state)
+        self._save_to_disk(key, state, eval_ms)
+
+    def record_restore(self, restore_ms):
+        self.stats["restore_count"] += 1
+        self.stats["restore_ms_total"] += restore_ms
+
+    def _store(self, key, state):
+        self._entries[key] = state
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _path(self, key):
+        return self.persist_dir / f"{key}.state"
+
+    def _save_to_disk(self, key, state, eval_ms):
+        if not self.persist_dir:
+            return
+        try:
+            with open(self._path(key), "wb") as f:
+                pickle.dump({"state": state, "eval_ms": eval_ms}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f"⚠️ Persistance instantané préfixe échouée: {e}")
+
+    def _load_from_disk(self, key):
+        if not self.persist_dir or not self._path(key).exists():
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)["state"]
+        except Exception as e:
+            logger.warning(f"⚠️ Instantané préfixe illisible, ignoré: {e}")
+            return None
+
+    def get_status(self):
+        """Statistiques : temps de restauration vs temps d'évaluation."""
+        avg_eval = self.stats["eval_ms_total"] / self.stats["eval_count"] if self.stats["eval_count"] else 0.0
+        avg_restore = self.stats["restore_ms_total"] / self.stats["restore_count"] if self.stats["restore_count"] else 0.0
+        lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persistent": self.persist_dir is not None,
+            "hit_rate": (self.stats["hits"] + self.stats["disk_hits"]) / lookups if lookups else 0.0,
+            "avg_eval_ms": avg_eval,
+            "avg_restore_ms": avg_restore,
+            "speedup": avg_eval / avg_restore if avg_restore > 0 else None,
+            **self.stats
+        }
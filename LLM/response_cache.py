@@ -0,0 +1,90 @@
+# LLM/response_cache.py
+"""
+Cache des réponses LLM pour les requêtes répétées ("quelle heure est-il",
+"merci"...) : clé = prompt normalisé + paramètres de génération + modèle.
+"""
+
+import time
+import unicodedata
+from collections import OrderedDict
+
+def normalize_prompt(text):
+    """Casse, accents, ponctuation et espaces neutralisés."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    kept = []
+    for char in text:
+        category = unicodedata.category(char)
+        if category == "Mn":          # Accents combinants
+            continue
+        if category[0] in ("P", "S"):  # Ponctuation et symboles
+            kept.append(" ")
+            continue
+        kept.append(char)
+    return " ".join("".join(kept).split())
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl_s=300.0, metrics=None):
+        """
+        Args:
+            max_entries: Nombre maximum de réponses (éviction LRU)
+            ttl_s: Durée de validité d'une réponse
+            metrics: EnhancedMetricsCollector optionnel (taux de hit exporté)
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.metrics = metrics
+        self._entries = OrderedDict()  # clé -> (expiration, réponse)
+
+        self.stats = {"hits": 0, "misses": 0, "bypass": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(prompt, params, model_id):
+        return (normalize_prompt(prompt), tuple(sorted(params.items())), model_id)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self._record("hit")
+                return response
+            del self._entries[key]
+            self.stats["expired"] += 1
+
+        self._record("miss")
+        return None
+
+    def put(self, key, response):
+        if not response:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_s, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def record_bypass(self):
+        """Tour dépendant du contexte : le cache n'est pas consulté."""
+        self._record("bypass")
+
+    def _record(self, result):
+        self.stats["hits" if result == "hit" else "misses" if result == "miss" else "bypass"] += 1
+        if self.metrics:
+            self.metrics.record_llm_cache_lookup(result, self.hit_rate())
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_status(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hit_rate": self.hit_rate(),
+            **self.stats
+        }
@@ -0,0 +1,89 @@
+# LLM/sentence_chunker.py
+"""
+Découpage incrémental d'un flux de tokens en phrases (ou propositions)
+prêtes à être envoyées au TTS pendant que la génération continue.
+"""
+
+import re
+
+# Fin de phrase : ponctuation forte suivie d'un espace
+_SENTENCE_END = re.compile(r'[.!?…]+["»)\]]*\s')
+# Fin de proposition : ponctuation faible suivie d'un espace
+_CLAUSE_END = re.compile(r'[,;:]\s')
+
+# Abréviations courantes qui ne terminent pas une phrase
+_ABBREVIATIONS = ("M.", "Mme.", "Mlle.", "Dr.", "Pr.", "etc.", "cf.", "ex.", "p.", "av.", "J.-C.")
+
+class SentenceChunker:
+    def __init__(self, first_clause_min_chars=12, min_chars=2, max_chars=200):
+        """
+        Args:
+            first_clause_min_chars: Taille minimale pour couper le premier morceau
+                                    sur une virgule (réduit le temps jusqu'au premier son)
+            min_chars: Taille minimale d'une phrase émise
+            max_chars: Au-delà, coupure forcée sur le dernier espace
+        """
+        self.first_clause_min_chars = first_clause_min_chars
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.reset()
+
+    def reset(self):
+        self._buffer = ""
+        self._emitted = 0
+
+    def feed(self, text):
+        """Ajoute du texte (un ou plusieurs tokens) et retourne les morceaux complets."""
+        self._buffer += text
+        chunks = []
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        return chunks
+
+    def flush(self):
+        """Retourne le reste du tampon en fin de génération."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        if rest:
+            self._emitted += 1
+            return [rest]
+        return []
+
+    def _next_chunk(self):
+        cut = self._find_sentence_end()
+
+        # Premier morceau : couper dès une proposition suffisamment longue
+        if cut is None and self._emitted == 0 and self.first_clause_min_chars:
+            for match in _CLAUSE_END.finditer(self._buffer):
+                if match.start() >= self.first_clause_min_chars:
+                    cut = match.end()
+                    break
+
+        # Phrase trop longue sans ponctuation : couper sur le dernier espace
+        if cut is None and len(self._buffer) > self.max_chars:
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            cut = space + 1 if space > 0 else self.max_chars
+
+        if cut is None:
+            return None
+
+        chunk = self._buffer[:cut].strip()
+        self._buffer = self._buffer[cut:]
+        if not chunk:
+            return None
+        self._emitted += 1
+        return chunk
+
+    def _find_sentence_end(self):
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[:match.end()].rstrip()
+            if len(candidate) < self.min_chars:
+                continue
+            last_word = candidate.split()[-1] if candidate.split() else ""
+            if last_word in _ABBREVIATIONS:
+                continue
+            return match.end()
+        return None
@@ -0,0 +1,189 @@
+# LLM/speculative.py
+"""
+Décodage spéculatif : le petit modèle (brouillon, ex: phi-2) propose k tokens,
+le grand modèle (cible, ex: llama-2-13b) les vérifie en une seule passe et
+garde le plus long préfixe conforme à son propre décodage glouton, plus un
+token à lui. La sortie est identique au décodage glouton de la cible.
+
+Les deux modèles n'ont pas le même tokenizer : le brouillon circule sous
+forme de texte, retokenisé dans le vocabulaire de la cible.
+
+Le décodage est toujours glouton : LLMHandler n'active ce mode qu'avec
+temperature: 0 dans la section llm, pour ne pas changer l'échantillonnage.
+"""
+
+import time
+
+class SpeculativeDecoder:
+    def __init__(self, target, draft, k=4, baseline_tokens_per_s=None):
+        """
+        Args:
+            target: LLMBackend vérificateur (sortie de référence)
+            draft: LLMBackend rapide qui propose les tokens
+            k: Tokens proposés par tour
+            baseline_tokens_per_s: Débit de la cible seule (calcul du gain)
+        """
+        self.target = target
+        self.draft = draft
+        self.k = k
+        self.baseline_tokens_per_s = baseline_tokens_per_s
+        self.last_generation = None
+
+        self.stats = {
+            "generations": 0,
+            "rounds": 0,
+            "drafted_tokens": 0,
+            "accepted_tokens": 0,
+            "generated_tokens": 0,
+            "bridge_misses": 0,
+            "decode_s_total": 0.0
+        }
+
+    def stream(self, prompt, max_tokens, stop=None):
+        """Génère un morceau de texte par token de la cible (texte ou tokens en entrée)."""
+        if isinstance(prompt, (list, tuple)):
+            context = list(prompt)
+            prompt_text = self.target.detokenize(context)
+        else:
+            prompt_text = prompt
+            context = self.target.tokenize(prompt, add_bos=True)
+        prompt_len = len(context)
+
+        generation = {"rounds": 0, "drafted_tokens": 0, "accepted_tokens": 0, "generated_tokens": 0}
+        emitted = ""
+        start = time.perf_counter()
+        try:
+            while generation["generated_tokens"] < max_tokens:
+                budget = min(self.k, max_tokens - generation["generated_tokens"] - 1)
+                proposal = self._draft(context, prompt_text + emitted, budget) if budget > 0 else []
+
+                accepted, next_token = self.target.greedy_verify(context, proposal)
+                generation["rounds"] += 1
+                generation["drafted_tokens"] += len(proposal)
+                generation["accepted_tokens"] += accepted
+
+                for token in proposal[:accepted] + [next_token]:
+                    context.append(token)
+                    generation["generated_tokens"] += 1
+
+                    # Texte par différence : les fusions d'octets UTF-8 restent correctes
+                    text = self.target.detokenize(context[prompt_len:])
+                    piece = text[len(emitted):]
+                    cut = min((i for i in (text.find(s) for s in stop or []) if i >= 0), default=-1)
+                    if cut >= 0:
+                        if cut > len(emitted):
+                            yield text[len(emitted):cut]
+                        return
+                    emitted = text
+                    yield piece
+        finally:
+            self._record(generation, time.perf_counter() - start)
+
+    def _draft(self, context, context_text, budget):
+        """Brouillon du petit modèle, retokenisé pour la cible."""
+        draft_text = self.draft.generate(context_text, budget, greedy=True)
+        if not draft_text:
+            return []
+
+        # Retokeniser la jonction seulement (dernier token du contexte + brouillon) :
+        # un préfixe tokenisé autrement ne fait pas échouer chaque tour. Après un
+        # token d'espacement isolé (espace final du prompt "A: "), le texte suivant
+        # se tokenise seul
+        tail_text = self.target.detokenize(context[-1:])
+        if tail_text and not tail_text.isspace():
+            tokens = self.target.tokenize(tail_text + draft_text)
+            if tokens[:1] == context[-1:]:
+                return tokens[1:1 + budget]
+
+            # Le brouillon fusionne avec le dernier token émis : tokenisé seul,
+            # la vérification tranche
+            self.stats["bridge_misses"] += 1
+        return self.target.tokenize(draft_text)[:budget]
+
+    def _record(self, generation, decode_s):
+        for key, value in generation.items():
+            self.stats[key] += value
+        self.stats["generations"] += 1
+        self.stats["decode_s_total"] += decode_s
+
+        tokens_per_s = generation["generated_tokens"] / decode_s if decode_s > 0 else 0.0
+        self.last_generation = {
+            **generation,
+            "accept_rate": generation["accepted_tokens"] / generation["drafted_tokens"] if generation["drafted_tokens"] else 0.0,
+            "tokens_per_round": generation["generated_tokens"] / generation["rounds"] if generation["rounds"] else 0.0,
+            "tokens_per_s": tokens_per_s,
+            "speedup": tokens_per_s / self.baseline_tokens_per_s if self.baseline_tokens_per_s else None
+        }
+
+    def accept_rate(self):
+        return self.stats["accepted_tokens"] / self.stats["drafted_tokens"] if self.stats["drafted_tokens"] else 0.0
+
+    def tokens_per_s(self):
+        return self.stats["generated_tokens"] / self.stats["decode_s_total"] if self.stats["decode_s_total"] > 0 else 0.0
+
+    def benchmark(self, prompt, max_tokens, stop=None):
+        """Mesure le débit de la cible seule puis en spéculatif sur le même prompt."""
+        start = time.perf_counter()
+        self.target.reset()
+        reference = self.target.generate(prompt, max_tokens, stop, greedy=True)
+        # Le temps mesuré inclut l'évaluation du prompt dans les deux cas
+        baseline_s = time.perf_counter() - start
+        baseline_tokens = len(self.target.tokenize(reference))
+
+        self.target.reset()
+        self.draft.reset()
+        start = time.perf_counter()
+        speculative = "".join(self.stream(prompt, max_tokens, stop))
+        speculative_s = time.perf_counter() - start
+
+        self.baseline_tokens_per_s = baseline_tokens / baseline_s if baseline_s > 0 else None
+        return {
+            "identical_output": speculative == reference,
+            "baseline_tokens_per_s": self.baseline_tokens_per_s,
+            "speculative_tokens_per_s": self.last_generation["generated_tokens"] / speculative_s if speculative_s > 0 else 0.0,
+            "speedup": baseline_s / speculative_s if speculative_s > 0 else None,
+            "accept_rate": self.last_generation["accept_rate"]
+        }
+
+    def get_status(self):
+        tokens_per_s = self.tokens_per_s()
+        return {
+            "k": self.k,
+            "draft_model": self.draft.model_id,
+            "accept_rate": self.accept_rate(),
+            "tokens_per_round": self.stats["generated_tokens"] / self.stats["rounds"] if self.stats["rounds"] else 0.0,
+            "tokens_per_s": tokens_per_s,
+            "baseline_tokens_per_s": self.baseline_tokens_per_s,
+            "speedup": tokens_per_s / self.baseline_tokens_per_s if self.baseline_tokens_per_s else None,
+            "last_generation": self.last_generation,
+            **self.stats
+        }
+
+# Test du décodage spéculatif
+def test_speculative_decoding():
+    """Test avec deux backends stub : cible lente, brouillon rapide et imparfait"""
+    from LLM.backends import StubBackend
+
+    print("🧪 TEST SPECULATIVE DECODING")
+    print("="*30)
+
+    responses = StubBackend.DEFAULT_RESPONSES
+    # Le brouillon se trompe sur quelques mots
+    draft_responses = [r.replace("heures", "heure").replace("demande", "question") for r in responses]
+    target = StubBackend(prompt_eval_ms_per_token=1.0, token_latency_ms=30.0, model_id="cible")
+    draft = StubBackend(prompt_eval_ms_per_token=0.1, token_latency_ms=3.0,
+                        responses=draft_responses, model_id="brouillon")
+
+    decoder = SpeculativeDecoder(target, draft, k=4)
+    for prompt in ("Q: quelle heure est-il ? A: ", "Q: rappelle-moi demain A: "):
+        print(f"\n🎯 {prompt}")
+        result = decoder.benchmark(prompt, 32, stop=["Q:", "\n"])
+        print(f"   Sortie identique: {result['identical_output']}")
+        print(f"   Acceptation: {result['accept_rate']:.0%}, gain: x{result['speedup']:.2f} "
+              f"({result['baseline_tokens_per_s']:.0f} -> {result['speculative_tokens_per_s']:.0f} tok/s)")
+
+    print(f"\n📊 Statut: {decoder.get_status()}")
+    print("\n✅ Test Speculative Decoding terminé")
+
+if __name__ == "__main__":
+    test_speculative_decoding()
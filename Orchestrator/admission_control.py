@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Admission Control - Luxa v1.1
+==============================
+
+Contrôle d'admission avant tout travail STT/LLM : seaux à jetons par session
+et global (débit soutenu + rafale), puis délestage selon la latence prévue
+(travail en file devant la requête × temps de service récent de chaque
+étage). Au-delà d'une fraction du budget pipeline_total_ms, la requête est
+dégradée pour elle seule (post-traitement LLM sauté, modèles actifs
+inchangés) ; au-delà du budget, elle est rejetée explicitement plutôt que de
+s'empiler dans les files.
+"""
+
+import time
+import threading
+from typing import Dict, Any, Optional, Callable
+
+# Actions d'admission
+ADMIT = "admit"
+DEGRADE = "degrade"
+REJECT = "reject"
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate_per_s: Jetons regagnés par seconde (débit soutenu)
+            burst: Capacité du seau (requêtes acceptées d'affilée)
+            clock: Horloge monotone (injectable pour les tests)
+        """
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate_per_s)
+        self.updated_at = now
+
+    def try_take(self, n: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens >= n:
+            self.tokens -= n
+            return True
+        return False
+
+    def refund(self, n: float = 1.0):
+        self.tokens = min(self.burst, self.tokens + n)
+
+    def retry_after_s(self, n: float = 1.0) -> float:
+        """Délai avant que n jetons soient disponibles"""
+        self._refill()
+        missing = n - self.tokens
+        return max(0.0, missing / self.rate_per_s) if self.rate_per_s > 0 else float("inf")
+
+class AdmissionController:
+    def __init__(self, session_requests_per_minute: float = 60, global_requests_per_minute: float = 240,
+                 burst: Optional[float] = None, latency_budget_ms: float = 1200,
+                 degrade_ratio: float = 0.75, reject_ratio: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, metrics=None):
+        """
+        Args:
+            session_requests_per_minute: Débit par session (security.rate_limit_requests_per_minute)
+            global_requests_per_minute: Débit toutes sessions confondues
+            burst: Rafale tolérée par seau (défaut: un sixième du débit par minute, au moins 1)
+            latency_budget_ms: Budget de latence (performance_thresholds.pipeline_total_ms)
+            degrade_ratio: Latence prévue / budget au-delà de laquelle la requête est dégradée
+            reject_ratio: Latence prévue / budget au-delà de laquelle elle est rejetée
+            clock: Horloge monotone
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.session_rate_per_s = session_requests_per_minute / 60
+        self.session_burst = burst or max(1.0, session_requests_per_minute / 6)
+        self.latency_budget_ms = latency_budget_ms
+        self.degrade_ratio = degrade_ratio
+        self.reject_ratio = reject_ratio
+        self.clock = clock
+        self.metrics = metrics
+
+        self.global_bucket = TokenBucket(global_requests_per_minute / 60,
+                                         burst or max(1.0, global_requests_per_minute / 6), clock)
+        self.session_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "decisions": {ADMIT: 0, DEGRADE: 0, REJECT: 0},
+            "reasons": {},
+            "last_predicted_latency_ms": 0.0
+        }
+
+    def admit(self, session_id: str, predicted_latency_ms: float) -> Dict[str, Any]:
+        """
+        Décide du sort d'une nouvelle requête
+
+        Args:
+            session_id: Session émettrice
+            predicted_latency_ms: Latence prévue si elle est admise maintenant
+
+        Returns:
+            Dict avec action (admit, degrade, reject), reason, predicted_latency_ms,
+            retry_after_s (rejet) et latency_budget_ms
+        """
+        with self._lock:
+            # Délestage d'abord : une requête rejetée ne consomme pas de jeton
+            if predicted_latency_ms > self.latency_budget_ms * self.reject_ratio:
+                excess_s = (predicted_latency_ms - self.latency_budget_ms * self.degrade_ratio) / 1000
+                return self._decide(REJECT, "predicted_latency", predicted_latency_ms, retry_after_s=excess_s)
+
+            bucket = self.session_buckets.get(session_id)
+            if bucket is None:
+                bucket = self.session_buckets[session_id] = TokenBucket(self.session_rate_per_s,
+                                                                        self.session_burst, self.clock)
+            if not bucket.try_take():
+                return self._decide(REJECT, "session_rate_limit", predicted_latency_ms,
+                                    retry_after_s=bucket.retry_after_s())
+            if not self.global_bucket.try_take():
+                bucket.refund()
+                return self._decide(REJECT, "global_rate_limit", predicted_latency_ms,
+                                    retry_after_s=self.global_bucket.retry_after_s())
+
+            if predicted_latency_ms > self.latency_budget_ms * self.degrade_ratio:
+                return self._decide(DEGRADE, "predicted_latency", predicted_latency_ms)
+            return self._decide(ADMIT, "ok", predicted_latency_ms)
+
+    def _decide(self, action: str, reason: str, predicted_latency_ms: float,
+                retry_after_s: Optional[float] = None) -> Dict[str, Any]:
+        self.stats["decisions"][action] += 1
+        key = f"{action}:{reason}"
+        self.stats["reasons"][key] = self.stats["reasons"].get(key, 0) + 1
+        self.stats["last_predicted_latency_ms"] = predicted_latency_ms
+        if self.metrics:
+            self.metrics.record_admission(action, reason, predicted_latency_ms / 1000)
+        return {
+            "action": action,
+            "reason": reason,
+            "predicted_latency_ms": predicted_latency_ms,
+            "latency_budget_ms": self.latency_budget_ms,
+            "retry_after_s": retry_after_s
+        }
+
+    def forget(self, session_id: str):
+        """Libère le seau d'une session fermée"""
+        with self._lock:
+            self.session_buckets.pop(session_id, None)
+
+    def get_status(self) -> Dict[str, Any]:
+        decisions = self.stats["decisions"]
+        total = sum(decisions.values())
+        return {
+            "latency_budget_ms": self.latency_budget_ms,
+            "degrade_above_ms": self.latency_budget_ms * self.degrade_ratio,
+            "reject_above_ms": self.latency_budget_ms * self.reject_ratio,
+            "session_requests_per_minute": self.session_rate_per_s * 60,
+            "global_requests_per_minute": self.global_bucket.rate_per_s * 60,
+            "global_tokens": self.global_bucket.tokens,
+            "tracked_sessions": len(self.session_buckets),
+            "shed_rate": (decisions[DEGRADE] + decisions[REJECT]) / total if total else 0.0,
+            **self.stats,
+            "decisions": dict(decisions),
+            "reasons": dict(self.stats["reasons"])
+        }
+
+# Test du contrôle d'admission
+def test_admission_control():
+    """Test avec une horloge simulée : rafale, débit par session, délestage"""
+    print("🧪 TEST ADMISSION CONTROL")
+    print("="*30)
+
+    now = [0.0]
+    controller = AdmissionController(session_requests_per_minute=60, global_requests_per_minute=120,
+                                     burst=5, latency_budget_ms=1200, clock=lambda: now[0])
+
+    # Rafale d'une session : 5 acceptées, puis limitée à 1/s
+    actions = [controller.admit("salon", 300)["action"] for _ in range(7)]
+    print(f"   Rafale salon: {actions}")
+    rejected = controller.admit("salon", 300)
+    print(f"   Réessayer dans {rejected['retry_after_s']:.2f}s ({rejected['reason']})")
+    now[0] += 1.0
+    print(f"   Après 1s: {controller.admit('salon', 300)['action']}")
+
+    # Une autre session n'est pas pénalisée par le salon
+    print(f"   Cuisine: {controller.admit('cuisine', 300)['action']}")
+
+    # Délestage selon la latence prévue
+    for predicted in (600, 1000, 1500):
+        now[0] += 1.0
+        decision = controller.admit("bureau", predicted)
+        print(f"   Latence prévue {predicted}ms: {decision['action']} ({decision['reason']})")
+
+    status = controller.get_status()
+    print(f"   Décisions: {status['decisions']}, taux de délestage {status['shed_rate']:.0%}")
+    print("\n✅ Test Admission Control terminé")
+
+if __name__ == "__main__":
+    test_admission_control()
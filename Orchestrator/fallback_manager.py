@@ -17,6 +17,8 @@ from pathlib import Path
 import sys
 sys.path.append(str(Path(__file__).parent.parent))
 from utils.gpu_manager import get_gpu_manager
+from monitoring.quantile_sketch import SketchSet
+from monitoring.tracing import get_tracer
 
 class FallbackManager:
     def __init__(self, config_path: str = "config/fallbacks.yaml"):
@@ -25,6 +27,7 @@ class FallbackManager:
         self.active_components = {}
         self.gpu_manager = get_gpu_manager()
         self.performance_history = {}
+        self.latency_sketches = SketchSet()
         
         print(f"🔄 Fallback Manager initialisé")
         print(f"📋 Configuration: {config_path}")
@@ -157,12 +160,15 @@ class FallbackManager:
         config = self.config["fallback_config"][component_type]
         
         try:
-            if component_type == "stt":
-                return self._load_stt_model(config["primary"])
-            elif component_type == "llm":
-                return self._load_llm_model(config["primary"])
-            elif component_type == "tts":
-                return self._load_tts_model(config["primary"])
+            # Chargement visible sur la chronologie (trace propre hors requête)
+            with get_tracer().span(f"model_load.{component_type}", cat="model_load", root=True,
+                                   model=config["primary"], role="primary"):
+                if component_type == "stt":
+                    return self._load_stt_model(config["primary"])
+                elif component_type == "llm":
+                    return self._load_llm_model(config["primary"])
+                elif component_type == "tts":
+                    return self._load_tts_model(config["primary"])
         except Exception as e:
             print(f"❌ Erreur chargement {component_type} principal: {e}")
             return None
@@ -176,12 +182,14 @@ class FallbackManager:
         config = self.config["fallback_config"][component_type]
         
         try:
-            if component_type == "stt":
-                return self._load_stt_model(config["fallback"], is_fallback=True)
-            elif component_type == "llm":
-                return self._load_llm_model(config["fallback"], is_fallback=True)
-            elif component_type == "tts":
-                return self._load_tts_model(config["fallback"], is_fallback=True)
+            with get_tracer().span(f"model_load.{component_type}", cat="model_load", root=True,
+                                   model=config["fallback"], role="fallback"):
+                if component_type == "stt":
+                    return self._load_stt_model(config["fallback"], is_fallback=True)
+                elif component_type == "llm":
+                    return self._load_llm_model(config["fallback"], is_fallback=True)
+                elif component_type == "tts":
+                    return self._load_tts_model(config["fallback"], is_fallback=True)
         except Exception as e:
             print(f"❌ Erreur chargement {component_type} fallback: {e}")
             return None
@@ -232,19 +240,27 @@ class FallbackManager:
         print(f"🧠 Chargement LLM: {model_name} ({'fallback' if is_fallback else 'primary'})")
         
         try:
-            # Simuler chargement LLM (remplacer par vraie implémentation)
-            device = self.gpu_manager.get_device("llm")
+            from LLM.backends import create_backend
             
-            # Ici on chargerait le vrai modèle LLM
-            mock_model = {
-                "name": model_name,
-                "device": device,
-                "type": "fallback" if is_fallback else "primary",
-                "loaded": True
+            llm_config = self.config["fallback_config"].get("llm", {})
+            device_idx = self.gpu_manager.get_device_index("llm")
+            
+            # backend: llama_cpp (défaut) ou stub (CI sans GPU ni modèle)
+            backend_config = {
+                "backend": llm_config.get("backend", "llama_cpp"),
+                "model_path": str(Path(llm_config.get("models_dir", "models")) / model_name),
+                "n_gpu_layers": llm_config.get("n_gpu_layers", -1),
+                "gpu_device_index": max(device_idx, 0),
+                "context_length": llm_config.get("context_length"),
+                "stub": {"model_id": model_name, **llm_config.get("stub", {})}
             }
             
-            print(f"✅ LLM {model_name} chargé sur {device}")
-            return mock_model
+            start_time = time.time()
+            backend = create_backend(backend_config)
+            load_time = time.time() - start_time
+            
+            print(f"✅ LLM {backend.model_id} chargé ({backend_config['backend']}, {load_time:.1f}s)")
+            return backend
             
         except Exception as e:
             print(f"❌ Erreur chargement LLM: {e}")
@@ -301,36 +317,29 @@ class FallbackManager:
         }
         
         self.performance_history[component_type].append(record)
+        if "latency_ms" in metrics:
+            self.latency_sketches.observe(component_type, metrics["latency_ms"])
         
         # Garder seulement les 100 derniers enregistrements
         if len(self.performance_history[component_type]) > 100:
             self.performance_history[component_type] = self.performance_history[component_type][-100:]
             
     def get_performance_stats(self, component_type: str) -> Dict[str, Any]:
-        """Retourne les statistiques de performance"""
-        if component_type not in self.performance_history:
-            return {}
-            
-        history = self.performance_history[component_type]
-        if not history:
+        """Retourne les statistiques de performance (sketch de quantiles, O(1) mémoire)"""
+        sketch = self.latency_sketches.sketches.get(component_type)
+        if sketch is None or sketch.count == 0:
             return {}
             
-        recent_latencies = [
-            record["metrics"].get("latency_ms", 0) 
-            for record in history[-10:]  # 10 dernières mesures
-            if "latency_ms" in record["metrics"]
-        ]
-        
-        if recent_latencies:
-            import numpy as np
-            return {
-                "avg_latency_ms": np.mean(recent_latencies),
-                "max_latency_ms": np.max(recent_latencies),
-                "min_latency_ms": np.min(recent_latencies),
-                "sample_count": len(recent_latencies)
-            }
-        else:
-            return {}
+        status = sketch.get_status()
+        return {
+            "avg_latency_ms": status["avg"],
+            "max_latency_ms": status["max"],
+            "min_latency_ms": status["min"],
+            "p50_latency_ms": status["p50"],
+            "p90_latency_ms": status["p90"],
+            "p99_latency_ms": status["p99"],
+            "sample_count": status["count"]
+        }
             
     def force_fallback(self, component_type: str):
         """Force le basculement vers fallback"""
@@ -6,12 +6,14 @@ Master Handler Robuste - Luxa v1.1
 Pipeline principal avec gestion d'erreurs complète et basculements automatiques.
 """
 
+import os
 import time
+import yaml
 import torch
 import asyncio
 import logging
 import numpy as np
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
 from pathlib import Path
 import sys
 
@@ -20,7 +22,19 @@ sys.path.append(str(Path(__file__).parent.parent))
 from utils.gpu_manager import get_gpu_manager
 from Orchestrator.fallback_manager import FallbackManager
 from monitoring.prometheus_exporter_enhanced import EnhancedMetricsCollector
+from monitoring.turn_metrics import TurnLatencyTracker
+from monitoring.rolling_stats import RollingStats
+from monitoring.quantile_sketch import SketchSet
+from monitoring.tracing import get_tracer
+from Orchestrator.transcript_postprocessor import TranscriptPostProcessor
+from Orchestrator.staged_pipeline import PipelineStage, StagedPipeline
+from Orchestrator.session_manager import SessionManager, Session
+from Orchestrator.stage_executors import StageExecutors, ExecutorSaturated, WorkCancelled
+from Orchestrator.speculative_turn import SpeculativeTurns, Speculation
+from Orchestrator.admission_control import AdmissionController, DEGRADE, REJECT
 from STT.vad_manager import OptimizedVADManager
+from STT.utterance_segmenter import UtteranceSegmenter
+from STT.batch_scheduler import STTBatchScheduler, WhisperBatchAdapter
 
 # Configuration logging
 logging.basicConfig(
@@ -35,31 +49,115 @@ class RobustMasterHandler:
         
         print("🚀 Initialisation Master Handler Robuste...")
         
+        self.config_path = config_path
+        self.config = self._load_config()
+        
         # Composants de base
         self.gpu_manager = get_gpu_manager()
         self.fallback_manager = FallbackManager()
         self.metrics = EnhancedMetricsCollector(port=8000)
+        self.turn_tracker = TurnLatencyTracker(self.metrics)
         self.vad_manager = None
         
+        # Un pool de threads par étage : un STT lent n'affame ni le VAD ni la TTS
+        self.executors = StageExecutors(self.config.get("executors", {}), metrics=self.metrics)
+        
+        # Micro-batching STT (créé pour le modèle actif ; adaptateur si pas de transcribe_batch)
+        self.stt_batching_config = self.config.get("stt_batching", {})
+        self.stt_batcher = None
+        self._stt_batch_adapter = None
+        
+        # Post-traitement des transcriptions (backend LLM branché au pré-chargement)
+        self.postprocess_config = self.config.get("postprocessing", {})
+        self.postprocessor = None
+        if self.postprocess_config.get("enabled", False):
+            self.postprocessor = TranscriptPostProcessor(config=self.postprocess_config, metrics=self.metrics,
+                                                         executor=self.executors.get("llm"))
+        
+        # Pipeline en étages (démarré par start_pipeline)
+        self.pipeline_config = self.config.get("pipeline", {})
+        self.pipeline = None
+        
+        # LLM lancé sur la transcription partielle pendant le silence final
+        self.speculation = None
+        speculation_config = self.pipeline_config.get("speculation", {})
+        if speculation_config.get("enabled", False) and self.postprocessor:
+            self.speculation = SpeculativeTurns(min_silence_ms=speculation_config.get("min_silence_ms", 200),
+                                                metrics=self.metrics)
+        
+        # Sessions : plusieurs flux audio isolés sur les mêmes modèles
+        sessions_config = self.config.get("sessions", {})
+        self.sessions = SessionManager(
+            self._create_segmenter,
+            max_sessions=sessions_config.get("max_active", 8),
+            idle_timeout_s=sessions_config.get("idle_timeout_s", 300),
+            transcript_history=self.config.get("interface", {}).get("conversation_history", 10),
+            results_queue_size=self.pipeline_config.get("results_queue_size", 16),
+            max_in_flight=sessions_config.get("max_in_flight", 2),
+            metrics=self.metrics
+        )
+        
+        # Contrôle d'admission : débit par session et global, délestage selon la latence prévue
+        self.admission = None
+        admission_config = self.config.get("admission", {})
+        if admission_config.get("enabled", False):
+            self.admission = AdmissionController(
+                session_requests_per_minute=self.config.get("security", {}).get("rate_limit_requests_per_minute", 60),
+                global_requests_per_minute=admission_config.get("global_requests_per_minute", 240),
+                burst=admission_config.get("burst"),
+                latency_budget_ms=self.config.get("performance_thresholds", {}).get("pipeline_total_ms", 1200),
+                degrade_ratio=admission_config.get("degrade_ratio", 0.75),
+                reject_ratio=admission_config.get("reject_ratio", 1.0),
+                metrics=self.metrics
+            )
+        
         # État du pipeline
         self.components = {}
         self.is_initialized = False
         self.error_counts = {"stt": 0, "llm": 0, "tts": 0, "vad": 0}
         self.last_errors = {}
         
-        # Statistiques de performance
+        # Statistiques de performance : totaux + seaux glissants (1s sur 1h, 1min sur 24h)
         self.performance_stats = {
             "requests_processed": 0,
             "total_latency_ms": 0,
-            "errors_total": 0,
-            "last_24h_requests": []
+            "errors_total": 0
         }
+        self.rolling_stats = RollingStats()
+        
+        # Percentiles de latence par étage, exportés vers Prometheus
+        self.latency_sketches = SketchSet()
+        self.metrics.register_sketches(self.latency_sketches)
+        
+        # Traçage par requête (désactivé par défaut)
+        tracing_config = self.config.get("tracing", {})
+        self.tracer = get_tracer()
+        self.tracer.configure(
+            enabled=tracing_config.get("enabled", False),
+            max_traces=tracing_config.get("max_traces", 64),
+            max_spans_per_trace=tracing_config.get("max_spans_per_trace", 512)
+        )
         
         # Démarrer monitoring en arrière-plan
         self._start_monitoring()
         
         print("✅ Master Handler initialisé")
         
+    def _load_config(self) -> dict:
+        """Charge la section luxa de la configuration"""
+        try:
+            if os.path.exists(self.config_path):
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f) or {}
+                print(f"✅ Configuration chargée: {self.config_path}")
+                return config.get("luxa", config)
+            else:
+                print(f"⚠️ Config introuvable ({self.config_path}), valeurs par défaut")
+                return {}
+        except Exception as e:
+            print(f"❌ Erreur chargement config: {e}")
+            return {}
+            
     async def initialize(self):
         """Initialise tous les composants du pipeline"""
         if self.is_initialized:
@@ -114,30 +212,47 @@ class RobustMasterHandler:
         except Exception as e:
             logger.warning(f"⚠️ Pré-chargement STT échoué: {e}")
             
-    async def process_audio_safe(self, audio_chunk: np.ndarray) -> Dict[str, Any]:
+        # Pré-charger le LLM du post-traitement : jamais chargé sur le chemin d'une requête
+        if self.postprocessor and self.postprocess_config.get("use_llm", False):
+            try:
+                start_time = time.time()
+                llm_component = self.fallback_manager.get_component("llm")
+                load_time = time.time() - start_time
+                
+                if llm_component:
+                    self.postprocessor.backend = llm_component
+                    self.metrics.record_model_load_time("llm", "primary", load_time)
+                    self.metrics.set_component_status("llm", "primary", True)
+                    print(f"✅ LLM post-traitement pré-chargé ({load_time:.2f}s)")
+                    
+            except Exception as e:
+                logger.warning(f"⚠️ Pré-chargement LLM échoué: {e}, post-traitement par règles seules")
+                
+    async def process_audio_safe(self, audio_chunk: np.ndarray, session_id: str = "default") -> Dict[str, Any]:
         """
         Traite l'audio avec gestion d'erreurs complète et fallbacks automatiques
         
         Args:
             audio_chunk: Array numpy contenant l'audio (16kHz, mono)
+            session_id: Émetteur, pour la limite de débit par session
             
         Returns:
             Dict contenant le résultat du traitement et les métriques
+            (rejected et rejection si la requête est refusée à l'admission)
         """
         
         if not self.is_initialized:
             await self.initialize()
             
+        with self.tracer.trace("process_audio_safe", samples=len(audio_chunk)) as span:
+            result = await self._process_audio(audio_chunk, session_id)
+            span.set(success=result["success"], latency_ms=result["latency_ms"],
+                     admission=result.get("admission"))
+        return result
+        
+    async def _process_audio(self, audio_chunk: np.ndarray, session_id: str = "default") -> Dict[str, Any]:
         # Initialiser résultat
-        result = {
-            "success": False,
-            "text": "",
-            "confidence": 0.0,
-            "latency_ms": 0,
-            "components_used": {},
-            "errors": [],
-            "metrics": {}
-        }
+        result = self._new_result()
         
         pipeline_start = time.perf_counter()
         
@@ -151,18 +266,38 @@ class RobustMasterHandler:
                 result["success"] = True
                 return result
                 
+            # Admission après le VAD : un chunk silencieux ne consomme pas de jeton
+            decision = self._admit(session_id)
+            if decision and decision["action"] == REJECT:
+                result = self._rejection_result(decision, session_id)
+                result["admission"] = REJECT
+                return result
+            degraded = decision is not None and decision["action"] == DEGRADE
+            if decision:
+                result["admission"] = decision["action"]
+            if degraded:
+                result["degraded"] = True
+                
+            # Le chunk reçu est un énoncé complet : son arrivée marque l'endpoint
+            turn_id = self.turn_tracker.start_turn(timestamp=pipeline_start)
+            result["turn_id"] = turn_id
+            
             # Étape 2: STT avec fallback
             text = await self._process_stt_with_fallback(audio_chunk, result)
+            self.turn_tracker.mark("stt_final", turn_id)
             
             if not text:
                 result["errors"].append("STT returned empty text")
+                self.turn_tracker.end_turn(turn_id)
                 return result
                 
             # Étape 3: LLM (optionnel selon le contexte)
-            enhanced_text = await self._process_llm_if_needed(text, result)
+            enhanced_text = await self._process_llm_if_needed(text, result, allow_llm=not degraded)
             
             # Étape 4: Finaliser résultat
+            result["raw_text"] = text
             result["text"] = enhanced_text or text
+            result["metrics"]["turn"] = self.turn_tracker.end_turn(turn_id)
             result["success"] = True
             result["confidence"] = 0.9  # Placeholder
             
@@ -184,6 +319,8 @@ class RobustMasterHandler:
             
             result["errors"].append(error_msg)
             result["success"] = False
+            if "turn_id" in result:
+                self.turn_tracker.end_turn(result["turn_id"])
             
             # Métriques d'erreur
             total_latency = (time.perf_counter() - pipeline_start) * 1000
@@ -203,13 +340,15 @@ class RobustMasterHandler:
         try:
             vad_start = time.perf_counter()
             
-            speech_detected = self.vad_manager.is_speech(audio_chunk)
-            speech_prob = self.vad_manager.get_speech_probability(audio_chunk)
+            with self.tracer.span("vad", cat="vad", backend=self.vad_manager.backend):
+                speech_detected = self.vad_manager.is_speech(audio_chunk)
+                speech_prob = self.vad_manager.get_speech_probability(audio_chunk)
             
             vad_latency = (time.perf_counter() - vad_start) * 1000
             
             # Métriques VAD
             self.metrics.record_vad_latency(vad_latency / 1000, self.vad_manager.backend)
+            self.latency_sketches.observe("vad", vad_latency)
             self.metrics.set_speech_detection_rate(speech_prob)
             
             result["components_used"]["vad"] = {
@@ -243,10 +382,13 @@ class RobustMasterHandler:
                 raise Exception("Aucun modèle STT disponible")
                 
             # Transcription avec timeout
-            text = await self._transcribe_with_timeout(stt_model, audio_chunk, timeout=5.0)
+            with self.tracer.span("stt", cat="stt", model=getattr(stt_model, 'model_name', 'unknown'),
+                                  audio_s=len(audio_chunk) / 16000):
+                text = await self._transcribe_with_timeout(stt_model, audio_chunk, timeout=5.0)
             
             # Métriques de latence
             stt_latency = (time.perf_counter() - stt_start) * 1000
+            self.latency_sketches.observe("stt", stt_latency)
             metrics["latency_ms"] = stt_latency
             
             # Enregistrer métriques
@@ -273,6 +415,11 @@ class RobustMasterHandler:
             stt_model = self.fallback_manager.get_component("stt", metrics)
             text = await self._transcribe_with_timeout(stt_model, audio_chunk, timeout=10.0)
             
+        except ExecutorSaturated as e:
+            logger.warning(f"⚠️ STT saturé, énoncé ignoré: {e}")
+            self.metrics.increment_pipeline_requests("rejected")
+            text = ""
+            
         except asyncio.TimeoutError:
             logger.error("⏱️ Timeout STT")
             self.metrics.increment_pipeline_requests("timeout")
@@ -287,29 +434,69 @@ class RobustMasterHandler:
         return text.strip() if text else ""
         
     async def _transcribe_with_timeout(self, stt_model, audio: np.ndarray, timeout: float = 5.0) -> str:
-        """Transcription avec timeout et gestion d'erreur"""
+        """Transcription avec timeout et gestion d'erreur
+        
+        À l'expiration, le décodage est réellement interrompu (voir _do_transcribe).
+        """
         
         try:
-            return await asyncio.wait_for(
-                self._do_transcribe(stt_model, audio),
-                timeout=timeout
-            )
+            return await self._do_transcribe(stt_model, audio, timeout=timeout)
         except asyncio.TimeoutError:
             logger.warning(f"⏱️ Timeout STT ({timeout}s)")
             return ""
             
-    async def _do_transcribe(self, stt_model, audio: np.ndarray) -> str:
-        """Effectue la transcription selon le type de modèle"""
+    def _batch_transcriber(self, stt_model) -> Optional[Callable]:
+        """transcribe_batch du modèle, ou d'un adaptateur (faster-whisper, openai-whisper)"""
+        if hasattr(stt_model, "transcribe_batch"):
+            return stt_model.transcribe_batch
+        if not hasattr(stt_model, "transcribe"):
+            return None
+        # Adaptateur conservé : le même modèle garde le même ordonnanceur
+        if self._stt_batch_adapter is None or self._stt_batch_adapter.model is not stt_model:
+            self._stt_batch_adapter = WhisperBatchAdapter(stt_model)
+        return self._stt_batch_adapter.transcribe_batch
+        
+    async def _get_stt_batcher(self, stt_model) -> Optional[STTBatchScheduler]:
+        """Ordonnanceur de lots du modèle STT actif (recréé après un basculement)"""
+        if not self.stt_batching_config.get("enabled", False):
+            return None
+        transcribe_batch = self._batch_transcriber(stt_model)
+        if transcribe_batch is None:
+            return None
+        if self.stt_batcher is None or self.stt_batcher.transcribe_batch != transcribe_batch:
+            if self.stt_batcher is not None:
+                # La boucle de l'ancien modèle ne survit pas au basculement
+                await self.stt_batcher.stop()
+            config = self.stt_batching_config
+            self.stt_batcher = STTBatchScheduler(
+                transcribe_batch,
+                max_batch_size=config.get("max_batch_size", 8),
+                max_wait_ms=config.get("max_wait_ms", 10),
+                length_buckets_s=config.get("length_buckets_s", (2, 5, 10, 30)),
+                executor=self.executors.get("stt"),
+                metrics=self.metrics
+            )
+        return self.stt_batcher
+        
+    async def _do_transcribe(self, stt_model, audio: np.ndarray, timeout: Optional[float] = None) -> str:
+        """Effectue la transcription selon le type de modèle, dans le pool STT"""
         
-        # Wrapper async pour transcription
-        loop = asyncio.get_event_loop()
+        # Énoncés concurrents des sessions regroupés en une génération
+        batcher = await self._get_stt_batcher(stt_model)
+        if batcher is not None:
+            return await asyncio.wait_for(batcher.submit(audio), timeout=timeout)
         
-        def sync_transcribe():
+        def sync_transcribe(cancel):
             try:
-                # Faster Whisper
+                # Faster Whisper : les segments sont décodés paresseusement,
+                # une annulation arrête le décodage au segment suivant
                 if hasattr(stt_model, 'transcribe'):
                     segments, _ = stt_model.transcribe(audio, beam_size=1)
-                    return " ".join([segment.text for segment in segments])
+                    texts = []
+                    for segment in segments:
+                        cancel.check()
+                        texts.append(segment.text)
+                    return " ".join(texts)
                     
                 # Whisper standard
                 elif hasattr(stt_model, 'decode'):
@@ -320,27 +507,423 @@ class RobustMasterHandler:
                 else:
                     return ""
                     
+            except WorkCancelled:
+                raise
             except Exception as e:
                 logger.error(f"❌ Erreur transcription: {e}")
                 return ""
                 
-        return await loop.run_in_executor(None, sync_transcribe)
+        return await self.executors.run("stt", sync_transcribe, timeout=timeout)
         
-    async def _process_llm_if_needed(self, text: str, result: Dict) -> Optional[str]:
-        """Traite LLM si nécessaire (placeholder pour l'instant)"""
-        
-        # Pour l'instant, on retourne le texte tel quel
-        # Dans une vraie implémentation, on pourrait:
-        # - Corriger la grammaire
-        # - Améliorer la ponctuation
-        # - Traiter les commandes
+    async def _process_llm_if_needed(self, text: str, result: Dict, allow_llm: bool = True) -> Optional[str]:
+        """Post-traitement de la transcription : ponctuation, casse, commandes
         
+        Règles d'abord ; le LLM seulement si elles ne suffisent pas, borné en
+        tokens et en temps (postprocessing.max_tokens / deadline_ms). Sous
+        délestage (allow_llm=False), règles seules.
+        """
+        if not self.postprocessor:
+            result["components_used"]["llm"] = {
+                "processed": False,
+                "reason": "disabled"
+            }
+            return None
+            
+        try:
+            with self.tracer.span("postprocess", cat="llm") as span:
+                outcome = await self.postprocessor.process(text, allow_llm=allow_llm)
+                span.set(path=outcome["path"])
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur post-traitement: {e}")
+            self.error_counts["llm"] += 1
+            result["components_used"]["llm"] = {"processed": False, "reason": str(e)}
+            return None
+            
+        self.latency_sketches.observe("postprocess", outcome["latency_ms"])
         result["components_used"]["llm"] = {
-            "processed": False,
-            "reason": "Not implemented yet"
+            "processed": outcome["path"] == "llm",
+            "path": outcome["path"],
+            "latency_ms": outcome["latency_ms"]
+        }
+        if outcome["command"]:
+            result["command"] = outcome["command"]
+            
+        return outcome["text"]
+        
+    # Pipeline en étages : flux audio continu, une session par flux
+    
+    async def start_pipeline(self, on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                             tts_callback: Optional[Callable[[str], Any]] = None):
+        """
+        Démarre le pipeline en étages capture → VAD → STT → LLM → TTS
+        
+        Les trames audio arrivent par feed_audio ; chaque énoncé détecté
+        traverse les étages pendant que les suivants sont capturés. Les
+        étages et les modèles sont partagés par toutes les sessions.
+        
+        Args:
+            on_result: Coroutine de la session "default" (sinon sa file results)
+            tts_callback: Synthèse bloquante de la session "default", exécutée hors boucle
+        """
+        if self.pipeline and self.pipeline.running:
+            return
+        if not self.is_initialized:
+            await self.initialize()
+            
+        config = self.pipeline_config
+        handlers = {
+            "capture": self._stage_capture,
+            "vad": self._stage_vad,
+            "stt": self._stage_stt,
+            "llm": self._stage_llm,
+            "tts": self._stage_tts
+        }
+        stages = []
+        for name, handler in handlers.items():
+            stage_config = config.get("stages", {}).get(name, {})
+            put_timeout_ms = stage_config.get("put_timeout_ms")
+            stages.append(PipelineStage(
+                name, handler,
+                queue_size=stage_config.get("queue_size", 8),
+                overflow=stage_config.get("overflow", "block"),
+                put_timeout_s=put_timeout_ms / 1000 if put_timeout_ms else None,
+                metrics=self.metrics
+            ))
+            
+        self.pipeline = StagedPipeline(stages, on_output=self._deliver_result)
+        self.pipeline.start()
+        self.open_session("default", on_result=on_result, tts_callback=tts_callback)
+        print(f"✅ Pipeline en étages démarré ({' → '.join(handlers)})")
+        
+    def open_session(self, session_id: Optional[str] = None,
+                     on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                     tts_callback: Optional[Callable[[str], Any]] = None) -> Session:
+        """Ouvre un flux audio isolé ; SessionLimitError si sessions.max_active est atteint"""
+        return self.sessions.open_session(session_id, on_result=on_result, tts_callback=tts_callback)
+        
+    async def close_session(self, session_id: str, drain: bool = True):
+        """Ferme un flux ; drain=True traite d'abord l'énoncé en cours"""
+        session = self.sessions.get(session_id)
+        if drain and self.pipeline:
+            await self.pipeline.drain()
+            await self._flush_session(session)
+            await self.pipeline.drain()
+        if self.speculation:
+            self.speculation.cancel(session_id, "dropped")
+        if self.admission:
+            self.admission.forget(session_id)
+        self.sessions.close_session(session_id)
+        
+    def _create_segmenter(self) -> UtteranceSegmenter:
+        """État VAD d'une nouvelle session (le modèle VAD reste partagé)"""
+        config = self.pipeline_config
+        vad_available = self.vad_manager is not None and self.vad_manager.backend not in (None, "none")
+        return UtteranceSegmenter(
+            is_speech=self.vad_manager.is_speech if vad_available else None,
+            endpoint_silence_ms=config.get("endpoint_silence_ms", 480),
+            min_speech_ms=config.get("min_speech_ms", 200),
+            max_utterance_s=config.get("max_utterance_s", 30)
+        )
+        
+    async def feed_audio(self, frame: np.ndarray, session_id: str = "default") -> bool:
+        """Entrée temps réel d'une trame audio ; False si la capture est saturée"""
+        session = self.sessions.get(session_id)
+        session.touch()
+        session.stats["frames"] += 1
+        return await self.pipeline.submit(frame, session=session)
+        
+    async def stop_pipeline(self, drain: bool = True):
+        """Arrête le pipeline ; drain=True émet d'abord les énoncés en cours"""
+        if not self.pipeline:
+            return
+        if drain:
+            await self.pipeline.drain()
+            for session in list(self.sessions.sessions.values()):
+                await self._flush_session(session)
+        await self.pipeline.stop(drain=drain)
+        if self.speculation:
+            self.speculation.cancel_all()
+        if self.stt_batcher:
+            await self.stt_batcher.stop()
+        for session_id in list(self.sessions.sessions):
+            self.sessions.close_session(session_id)
+        print("🛑 Pipeline en étages arrêté")
+        
+    async def _flush_session(self, session: Session):
+        utterance = session.segmenter.flush()
+        if utterance is not None and session.admit_utterance():
+            await self.pipeline.get_stage("stt").put(self._new_utterance_item(session, utterance))
+            
+    def _new_result(self) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "text": "",
+            "confidence": 0.0,
+            "latency_ms": 0,
+            "components_used": {},
+            "errors": [],
+            "metrics": {}
+        }
+        
+    def _predict_latency_ms(self) -> float:
+        """Latence prévue d'une nouvelle requête : travail en file devant elle puis son service, étage par étage"""
+        if self.pipeline and self.pipeline.running:
+            # Le service d'un étage du pipeline inclut déjà l'attente dans son pool
+            return sum(self.pipeline.get_stage(name).predicted_latency_ms() for name in ("stt", "llm", "tts"))
+        return sum(self.executors.get(name).predicted_latency_ms() for name in ("stt", "llm"))
+        
+    def _admit(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Décision d'admission d'une nouvelle requête (None si le contrôle est désactivé)"""
+        if not self.admission:
+            return None
+        return self.admission.admit(session_id, self._predict_latency_ms())
+        
+    def _rejection_result(self, decision: Dict[str, Any], session_id: str) -> Dict[str, Any]:
+        """Résultat explicite d'une requête refusée : raison et délai avant de réessayer"""
+        logger.warning(f"⚠️ Requête rejetée (session {session_id}: {decision['reason']}, "
+                       f"{decision['predicted_latency_ms']:.0f}ms prévus)")
+        result = self._new_result()
+        result["session_id"] = session_id
+        result["rejected"] = True
+        result["rejection"] = {
+            "reason": decision["reason"],
+            "retry_after_s": decision["retry_after_s"],
+            "predicted_latency_ms": decision["predicted_latency_ms"],
+            "latency_budget_ms": decision["latency_budget_ms"]
+        }
+        result["errors"].append(f"Rejected: {decision['reason']}")
+        self.metrics.increment_pipeline_requests("rejected")
+        return result
+        
+    def _new_utterance_item(self, session: Session, utterance: np.ndarray) -> Dict[str, Any]:
+        """Élément d'énoncé : l'endpoint ouvre le tour et la trace"""
+        started = time.perf_counter()
+        result = self._new_result()
+        result["session_id"] = session.session_id
+        result["turn_id"] = self.turn_tracker.start_turn(timestamp=started)
+        
+        # La trace couvre l'énoncé depuis le début de parole ; l'attente de
+        # l'endpoint apparaît comme span "speech"
+        speech_started = session.segmenter.last_utterance_started_at or started
+        trace = self.tracer.begin_trace("utterance", start=speech_started,
+                                        session=session.session_id, turn_id=result["turn_id"])
+        self.tracer.record("speech", speech_started, started, cat="capture", parent=trace,
+                           audio_s=len(utterance) / 16000)
+        item = {
+            "payload": utterance,
+            "session": session,
+            "result": result,
+            "pipeline_start": started,
+            "trace": trace,
+            # La spéculation lancée pendant le silence final suit l'énoncé
+            "speculation": self.speculation.take(session.session_id) if self.speculation else None
         }
+        item["on_drop"] = lambda stage, reason: self._on_utterance_dropped(item, stage, reason)
+        return item
+        
+    def _on_utterance_dropped(self, item: Dict[str, Any], stage: str, reason: str):
+        """Un énoncé abandonné clôt son tour et sa trace"""
+        session = item["session"]
+        logger.warning(f"⚠️ Énoncé abandonné (session {session.session_id}, étage {stage}: {reason})")
+        self.turn_tracker.end_turn(item["result"]["turn_id"])
+        self.tracer.end_trace(item.get("trace"), outcome="dropped", stage=stage, reason=reason)
+        self._discard_speculation(item, "dropped")
+        session.finish_utterance("dropped")
+        self.metrics.increment_pipeline_requests("dropped")
         
-        return None
+    def _discard_if_closed(self, item: Dict[str, Any], stage: str) -> bool:
+        """Les énoncés d'une session fermée ne consomment plus les modèles"""
+        if not item["session"].closed:
+            return False
+        if "result" in item:
+            self._on_utterance_dropped(item, stage, "session_closed")
+        return True
+        
+    def _discard_speculation(self, item: Dict[str, Any], reason: str):
+        speculation = item.pop("speculation", None)
+        if speculation is not None:
+            self.speculation.discard(speculation, reason)
+            
+    def _maybe_speculate(self, session: Session, speech: bool):
+        """Pendant le silence final, transcrit l'audio déjà capté et lance le LLM"""
+        if speech:
+            self.speculation.cancel(session.session_id, "speech_resumed")
+            return
+        partial = session.segmenter.snapshot(self.speculation.min_silence_ms)
+        if partial is not None:
+            self.speculation.begin(session.session_id,
+                                   lambda: self._transcribe_partial(partial),
+                                   self._speculative_postprocess)
+            
+    async def _transcribe_partial(self, audio: np.ndarray) -> str:
+        stt_model = self.fallback_manager.get_component("stt")
+        if not stt_model:
+            return ""
+        try:
+            return await self._transcribe_with_timeout(stt_model, audio, timeout=5.0)
+        except ExecutorSaturated:
+            return ""
+            
+    async def _speculative_postprocess(self, text: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Post-traitement sur un résultat brouillon, fusionné dans le vrai résultat si repris"""
+        draft = self._new_result()
+        enhanced_text = await self._process_llm_if_needed(text, draft)
+        return enhanced_text, draft
+        
+    async def _stage_capture(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Normalise la trame (float32 mono)"""
+        frame = np.asarray(item["payload"], dtype=np.float32)
+        item["payload"] = frame.mean(axis=1) if frame.ndim > 1 else frame
+        return item
+        
+    async def _stage_vad(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """VAD par trame et endpointing de la session ; n'émet que les énoncés complets"""
+        if self._discard_if_closed(item, "vad"):
+            return None
+        session = item["session"]
+        frame = item["payload"]
+        vad_start = time.perf_counter()
+        try:
+            # Trames hors de toute trace : seul l'énoncé émis est tracé
+            speech = await self.executors.run("vad", lambda cancel: session.segmenter.is_speech(frame))
+        except Exception as e:
+            logger.warning(f"⚠️ Erreur VAD: {e}")
+            self.error_counts["vad"] += 1
+            speech = True
+        vad_latency = (time.perf_counter() - vad_start) * 1000
+        self.latency_sketches.observe("vad", vad_latency)
+        if self.vad_manager:
+            self.metrics.record_vad_latency(vad_latency / 1000, self.vad_manager.backend)
+            
+        utterance = session.segmenter.process(frame, speech=speech)
+        if utterance is None:
+            if self.speculation:
+                self._maybe_speculate(session, speech)
+            return None
+        # Surcharge : l'énoncé est refusé ici plutôt que d'attendre dans les files
+        decision = self._admit(session.session_id)
+        if decision and decision["action"] == REJECT:
+            if self.speculation:
+                self.speculation.cancel(session.session_id, "dropped")
+            await self._deliver_result({"session": session,
+                                        "result": self._rejection_result(decision, session.session_id)})
+            return None
+        # Une session en retard n'accumule pas d'énoncés au détriment des autres
+        if not session.admit_utterance():
+            if self.speculation:
+                self.speculation.cancel(session.session_id, "dropped")
+            logger.warning(f"⚠️ Session {session.session_id} saturée, énoncé abandonné")
+            self.metrics.record_stage_drop("vad", "session_backlog")
+            self.metrics.increment_pipeline_requests("dropped")
+            return None
+        item = self._new_utterance_item(session, utterance)
+        if decision and decision["action"] == DEGRADE:
+            item["degraded"] = item["result"]["degraded"] = True
+        return item
+        
+    async def _stage_stt(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._discard_if_closed(item, "stt"):
+            return None
+        result = item["result"]
+        text = None
+        speculation: Optional[Speculation] = item.get("speculation")
+        if speculation is not None:
+            # Seul du silence s'est ajouté depuis la transcription partielle : pas de second STT
+            stt_start = time.perf_counter()
+            with self.tracer.span("stt", cat="stt", reused_partial=True):
+                text = await self.speculation.partial_transcript(speculation)
+            if text:
+                result["components_used"]["stt"] = {
+                    "reused_partial": True,
+                    "latency_ms": (time.perf_counter() - stt_start) * 1000
+                }
+        if not text:
+            text = await self._process_stt_with_fallback(item["payload"], result)
+        self.turn_tracker.mark("stt_final", result["turn_id"])
+        
+        if not text:
+            result["errors"].append("STT returned empty text")
+            self.turn_tracker.end_turn(result["turn_id"])
+            self.tracer.end_trace(item.get("trace"), outcome="empty")
+            self._discard_speculation(item, "empty")
+            item["session"].finish_utterance("empty")
+            return None
+        result["raw_text"] = text
+        item["payload"] = text
+        return item
+        
+    async def _stage_llm(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._discard_if_closed(item, "llm"):
+            return None
+        result = item["result"]
+        
+        # Transcription partielle reprise comme finale : le LLM a déjà tourné
+        speculation: Optional[Speculation] = item.pop("speculation", None)
+        reused = await self.speculation.resolve(speculation) if speculation else None
+        if reused is not None:
+            enhanced_text, draft = reused
+            result["components_used"].update(draft["components_used"])
+            result["components_used"]["llm"]["speculative"] = True
+            if "command" in draft:
+                result["command"] = draft["command"]
+            self.tracer.record("llm.speculative", speculation.llm_started_at, speculation.llm_finished_at,
+                               cat="llm", parent=item.get("trace"), reused=True)
+        else:
+            enhanced_text = await self._process_llm_if_needed(item["payload"], result,
+                                                              allow_llm=not item.get("degraded", False))
+        result["text"] = enhanced_text or item["payload"]
+        return item
+        
+    async def _stage_tts(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self._discard_if_closed(item, "tts"):
+            return None
+        session = item["session"]
+        result = item["result"]
+        if session.tts_callback and result["text"] and not result.get("command"):
+            tts_start = time.perf_counter()
+            try:
+                with self.tracer.span("tts", cat="tts", chars=len(result["text"])):
+                    await self.executors.run("tts", lambda cancel: session.tts_callback(result["text"]))
+                tts_latency = (time.perf_counter() - tts_start) * 1000
+                self.latency_sketches.observe("tts", tts_latency)
+                result["components_used"]["tts"] = {"latency_ms": tts_latency}
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur TTS: {e}")
+                self.error_counts["tts"] += 1
+                result["errors"].append(f"TTS error: {e}")
+                
+        result["metrics"]["turn"] = self.turn_tracker.end_turn(result["turn_id"])
+        result["success"] = True
+        result["confidence"] = 0.9  # Placeholder
+        
+        total_latency = (time.perf_counter() - item["pipeline_start"]) * 1000
+        result["latency_ms"] = total_latency
+        result["metrics"]["pipeline_latency_ms"] = total_latency
+        session.finish_utterance("success", total_latency)
+        self.tracer.end_trace(item.get("trace"), outcome="success", latency_ms=total_latency)
+        self.metrics.increment_pipeline_requests("success")
+        self._update_performance_stats(total_latency, success=True)
+        return item
+        
+    async def _deliver_result(self, item: Dict[str, Any]):
+        session = item["session"]
+        try:
+            await session.deliver(item["result"])
+        except Exception as e:
+            # Un consommateur défaillant n'arrête pas le pipeline des autres sessions
+            logger.error(f"❌ Livraison résultat session {session.session_id}: {e}")
+            
+    def export_trace(self, path: Optional[str] = None, last: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Exporte les traces récentes au format Chrome trace / Perfetto
+        
+        Une ligne par énoncé : attente en file et service de chaque étage,
+        chevauchements entre énoncés et blocages visibles sur la chronologie.
+        """
+        document = self.tracer.export_chrome_trace(path=path, last=last)
+        if path:
+            print(f"📄 Traces exportées: {path} (chrome://tracing ou ui.perfetto.dev)")
+        return document
         
     def _start_monitoring(self):
         """Démarre le monitoring en arrière-plan"""
@@ -358,20 +941,9 @@ class RobustMasterHandler:
         if not success:
             self.performance_stats["errors_total"] += 1
             
-        # Historique 24h (simpliste)
-        current_time = time.time()
-        self.performance_stats["last_24h_requests"].append({
-            "timestamp": current_time,
-            "latency_ms": latency_ms,
-            "success": success
-        })
-        
-        # Nettoyer ancien historique (garder 24h)
-        cutoff = current_time - (24 * 3600)  # 24 heures
-        self.performance_stats["last_24h_requests"] = [
-            req for req in self.performance_stats["last_24h_requests"]
-            if req["timestamp"] > cutoff
-        ]
+        # Historique glissant en O(1), mémoire fixe
+        self.rolling_stats.record(latency_ms, success=success)
+        self.latency_sketches.observe("pipeline", latency_ms)
         
     def get_health_status(self) -> Dict[str, Any]:
         """Retourne le statut de santé complet du système"""
@@ -379,21 +951,11 @@ class RobustMasterHandler:
         # Mise à jour métriques GPU
         self.gpu_manager.update_memory_info()
         
-        # Calculer moyennes
-        avg_latency = 0
-        if self.performance_stats["requests_processed"] > 0:
-            avg_latency = (
-                self.performance_stats["total_latency_ms"] / 
-                self.performance_stats["requests_processed"]
-            )
-            
-        error_rate = 0
-        if self.performance_stats["requests_processed"] > 0:
-            error_rate = (
-                self.performance_stats["errors_total"] / 
-                self.performance_stats["requests_processed"]
-            ) * 100
-            
+        # Fenêtres glissantes : l'état de santé reflète les dernières 24h
+        windows = self.rolling_stats.get_status()["windows"]
+        last_24h = windows["24h"]
+        error_rate = last_24h["error_rate_percent"]
+        
         return {
             "status": "healthy" if error_rate < 5 else "degraded" if error_rate < 20 else "unhealthy",
             "initialized": self.is_initialized,
@@ -407,10 +969,22 @@ class RobustMasterHandler:
             },
             "performance": {
                 "requests_processed": self.performance_stats["requests_processed"],
-                "avg_latency_ms": avg_latency,
+                "avg_latency_ms": last_24h["avg_latency_ms"],
                 "error_rate_percent": error_rate,
+                "requests_per_minute": windows["1m"]["count"],
+                "windows": windows,
                 "error_counts": self.error_counts.copy()
             },
+            "latency_percentiles_ms": self.latency_sketches.get_status(),
+            "turns": self.turn_tracker.get_summary(),
+            "postprocessing": self.postprocessor.get_status() if self.postprocessor else {"status": "disabled"},
+            "pipeline": self.pipeline.get_status() if self.pipeline else {"status": "stopped"},
+            "executors": self.executors.get_status(),
+            "stt_batching": self.stt_batcher.get_status() if self.stt_batcher else {"status": "disabled"},
+            "speculation": self.speculation.get_status() if self.speculation else {"status": "disabled"},
+            "sessions": self.sessions.get_status(),
+            "admission": self.admission.get_status() if self.admission else {"status": "disabled"},
+            "tracing": self.tracer.get_status(),
             "system": self.metrics.get_current_metrics_summary(),
             "timestamp": time.time()
         }
@@ -436,6 +1010,19 @@ async def test_master_handler():
     
     print(f"Résultat: {result}")
     
+    # Flux continu : trames de 160ms à travers le pipeline en étages
+    print("\n🎯 Test pipeline en étages...")
+    await handler.start_pipeline()
+    room = handler.open_session("salon")
+    for start in range(0, len(test_audio), 2560):
+        await handler.feed_audio(test_audio[start:start + 2560])
+        await handler.feed_audio(test_audio[start:start + 2560] * 0.01, session_id="salon")
+    default = handler.sessions.get("default")
+    await handler.stop_pipeline()
+    print(f"Énoncés traités: default {default.results.qsize()}, salon {room.results.qsize()}")
+    for name, stage in handler.get_health_status()["pipeline"]["stages"].items():
+        print(f"   {name}: service {stage['avg_service_ms']:.1f}ms, attente {stage['avg_wait_ms']:.1f}ms, abandons {stage['dropped']}")
+    
     # Statut de santé
     print("\n📊 Statut de santé:")
     health = handler.get_health_status()
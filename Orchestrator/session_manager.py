@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Session Manager - Luxa v1.1
+============================
+
+Plusieurs flux audio concurrents (pièces, clients) partagent un seul jeu de
+modèles chargés. Chaque session possède son propre état : segmentation VAD,
+contexte des transcriptions récentes, file de
+résultats et métriques. Le nombre de sessions actives est borné.
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+class SessionLimitError(RuntimeError):
+    """Nombre maximal de sessions actives atteint"""
+
+class Session:
+    def __init__(self, session_id: str, segmenter, transcript_history: int = 10,
+                 results_queue_size: int = 16, max_in_flight: int = 2,
+                 on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                 tts_callback: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            session_id: Identifiant de la session
+            segmenter: UtteranceSegmenter propre au flux
+            transcript_history: Transcriptions récentes conservées
+            results_queue_size: Résultats non consommés (les plus anciens évincés)
+            max_in_flight: Énoncés en cours de traitement au-delà desquels les nouveaux sont abandonnés
+            on_result: Coroutine recevant chaque résultat (sinon file results)
+            tts_callback: Synthèse bloquante propre à la session
+        """
+        self.session_id = session_id
+        self.segmenter = segmenter
+        self.transcripts = deque(maxlen=transcript_history)
+        self.results = asyncio.Queue(maxsize=results_queue_size)
+        self.max_in_flight = max_in_flight
+        self.on_result = on_result
+        self.tts_callback = tts_callback
+
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.in_flight = 0
+        self.closed = False
+        self.latency = QuantileSketch()  # Fusionnable avec celui des autres sessions
+
+        self.stats = {
+            "frames": 0,
+            "utterances": 0,
+            "requests_success": 0,
+            "requests_empty": 0,
+            "requests_dropped": 0,
+            "results_evicted": 0,
+            "total_latency_ms": 0.0
+        }
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def admit_utterance(self) -> bool:
+        """Un flux qui produit plus vite qu'il n'est servi ne pénalise que lui-même"""
+        if self.in_flight >= self.max_in_flight:
+            self.stats["requests_dropped"] += 1
+            return False
+        self.in_flight += 1
+        self.stats["utterances"] += 1
+        return True
+
+    def finish_utterance(self, outcome: str, latency_ms: float = 0.0):
+        """outcome: success, empty ou dropped"""
+        self.in_flight = max(0, self.in_flight - 1)
+        self.stats[f"requests_{outcome}"] += 1
+        if outcome == "success":
+            self.stats["total_latency_ms"] += latency_ms
+            self.latency.add(latency_ms)
+
+    async def deliver(self, result: Dict[str, Any]):
+        if result.get("raw_text"):
+            self.transcripts.append(result["text"])
+        if self.on_result:
+            await self.on_result(result)
+            return
+        if self.results.full():
+            self.results.get_nowait()
+            self.stats["results_evicted"] += 1
+        self.results.put_nowait(result)
+
+    def get_status(self) -> Dict[str, Any]:
+        success = self.stats["requests_success"]
+        return {
+            "session_id": self.session_id,
+            "age_s": time.time() - self.created_at,
+            "idle_s": time.time() - self.last_active,
+            "in_flight": self.in_flight,
+            "pending_results": self.results.qsize(),
+            "avg_latency_ms": self.stats["total_latency_ms"] / success if success else 0.0,
+            "latency_percentiles_ms": self.latency.quantiles() if success else {},
+            "recent_transcripts": list(self.transcripts)[-3:],
+            "segmenter": self.segmenter.get_status(),
+            **self.stats
+        }
+
+class SessionManager:
+    def __init__(self, segmenter_factory: Callable[[], Any], max_sessions: int = 8,
+                 idle_timeout_s: float = 300, transcript_history: int = 10,
+                 results_queue_size: int = 16, max_in_flight: int = 2,
+                 metrics=None):
+        """
+        Args:
+            segmenter_factory: Crée l'état VAD d'une nouvelle session
+            max_sessions: Sessions actives simultanées
+            idle_timeout_s: Une session inactive depuis ce délai peut être fermée
+                pour laisser la place à une nouvelle
+            transcript_history: Transcriptions récentes conservées par session
+            results_queue_size: Taille de la file de résultats de chaque session
+            max_in_flight: Énoncés en cours par session
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.segmenter_factory = segmenter_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout_s = idle_timeout_s
+        self.transcript_history = transcript_history
+        self.results_queue_size = results_queue_size
+        self.max_in_flight = max_in_flight
+        self.metrics = metrics
+
+        self.sessions: Dict[str, Session] = {}
+        self.stats = {"opened": 0, "closed": 0, "expired": 0, "rejected": 0}
+
+    def open_session(self, session_id: Optional[str] = None,
+                     on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                     tts_callback: Optional[Callable[[str], Any]] = None) -> Session:
+        """Ouvre une session ; SessionLimitError si max_sessions est atteint"""
+        session_id = session_id or uuid.uuid4().hex[:8]
+        if session_id in self.sessions:
+            return self.sessions[session_id]
+
+        if len(self.sessions) >= self.max_sessions:
+            self.expire_idle()
+        if len(self.sessions) >= self.max_sessions:
+            self.stats["rejected"] += 1
+            if self.metrics:
+                self.metrics.record_session_rejected()
+            raise SessionLimitError(f"Sessions actives: {len(self.sessions)}/{self.max_sessions}")
+
+        session = Session(
+            session_id,
+            self.segmenter_factory(),
+            transcript_history=self.transcript_history,
+            results_queue_size=self.results_queue_size,
+            max_in_flight=self.max_in_flight,
+            on_result=on_result,
+            tts_callback=tts_callback
+        )
+        self.sessions[session_id] = session
+        self.stats["opened"] += 1
+        self._publish_active()
+        logger.info(f"🟢 Session {session_id} ouverte ({len(self.sessions)}/{self.max_sessions})")
+        return session
+
+    def get(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Session inconnue: {session_id}")
+        return session
+
+    def close_session(self, session_id: str):
+        """Ferme une session ; ses énoncés encore en vol sont abandonnés à leur sortie"""
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return
+        session.closed = True
+        session.segmenter.reset()
+        self.stats["closed"] += 1
+        self._publish_active()
+        logger.info(f"🔴 Session {session_id} fermée")
+
+    def expire_idle(self) -> int:
+        """Ferme les sessions inactives sans énoncé en cours"""
+        now = time.time()
+        expired = [
+            session_id for session_id, session in self.sessions.items()
+            if session.in_flight == 0 and now - session.last_active > self.idle_timeout_s
+        ]
+        for session_id in expired:
+            self.close_session(session_id)
+        self.stats["expired"] += len(expired)
+        return len(expired)
+
+    def _publish_active(self):
+        if self.metrics:
+            self.metrics.set_active_sessions(len(self.sessions))
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "active": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "idle_timeout_s": self.idle_timeout_s,
+            "sessions": {session_id: session.get_status() for session_id, session in self.sessions.items()},
+            **self.stats
+        }
+
+# Test du gestionnaire de sessions
+async def test_session_manager():
+    """Test d'isolation et de limite de sessions"""
+    from pathlib import Path
+    import sys
+    import numpy as np
+    sys.path.append(str(Path(__file__).parent.parent))
+    from STT.utterance_segmenter import UtteranceSegmenter
+
+    print("🧪 TEST SESSION MANAGER")
+    print("="*30)
+
+    manager = SessionManager(UtteranceSegmenter, max_sessions=2, idle_timeout_s=0.05)
+    salon = manager.open_session("salon")
+    cuisine = manager.open_session("cuisine")
+
+    # Chaque session découpe son propre flux : la parole du salon
+    # n'ouvre pas d'énoncé dans la cuisine
+    speech = (np.random.randn(2560) * 0.2).astype(np.float32)
+    salon.segmenter.process(speech)
+    print(f"   Salon en parole: {salon.segmenter.in_speech}, cuisine: {cuisine.segmenter.in_speech}")
+
+    try:
+        manager.open_session("bureau")
+    except SessionLimitError as e:
+        print(f"   Refus attendu: {e}")
+
+    # Après le délai d'inactivité, la place est reprise
+    await asyncio.sleep(0.1)
+    manager.open_session("bureau")
+    print(f"   Sessions actives: {list(manager.sessions)}")
+    print(f"\n📊 Statut: {manager.get_status()['opened']} ouvertes, {manager.stats['expired']} expirées")
+    print("\n✅ Test Session Manager terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_session_manager())
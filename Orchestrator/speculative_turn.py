@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Speculative Turn - Luxa v1.1
+=============================
+
+Démarrage spéculatif du LLM pendant le silence qui termine un énoncé : dès
+que le silence dure assez pour que la transcription partielle soit stable,
+l'audio déjà capté est transcrit et le LLM lancé, sans attendre l'endpoint.
+La reprise de la parole annulant la spéculation, l'énoncé final n'ajoute que
+du silence à l'audio transcrit : la transcription partielle sert de
+transcription finale (pas de second passage STT) et le résultat LLM est
+repris sans contrôle de concordance. Le taux de succès est rapporté aux
+énoncés terminés (endpoints), spéculés ou non.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger(__name__)
+
+class Speculation:
+    __slots__ = ("key", "task", "text", "transcribed", "started_at", "llm_started_at", "llm_finished_at")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.task: Optional[asyncio.Task] = None
+        self.text: Optional[str] = None         # Transcription partielle (une fois connue)
+        self.transcribed = asyncio.get_running_loop().create_future()  # Résolu avec text (None si échec)
+        self.started_at = time.perf_counter()
+        self.llm_started_at = None
+        self.llm_finished_at = None
+
+class SpeculativeTurns:
+    OUTCOMES = ("hit", "empty", "speech_resumed", "dropped", "error")
+
+    def __init__(self, min_silence_ms: float = 200, metrics=None):
+        """
+        Args:
+            min_silence_ms: Silence final au-delà duquel la transcription partielle
+                est jugée stable (inférieur à pipeline.endpoint_silence_ms)
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.min_silence_ms = min_silence_ms
+        self.metrics = metrics
+        self.pending: Dict[str, Speculation] = {}
+
+        self.stats = {
+            "started": 0,
+            "turns": 0,
+            "outcomes": {outcome: 0 for outcome in self.OUTCOMES},
+            "saved_ms_total": 0.0,
+            "wasted_llm_ms_total": 0.0
+        }
+
+    def begin(self, key: str, transcribe: Callable[[], Awaitable[str]],
+              respond: Callable[[str], Awaitable[Any]]) -> Speculation:
+        """
+        Lance transcription partielle puis LLM en tâche de fond
+
+        Args:
+            key: Flux concerné (une spéculation en cours par session)
+            transcribe: Coroutine -> transcription de l'audio déjà capté
+            respond: Coroutine texte -> résultat LLM (repris tel quel en cas de succès)
+        """
+        self.cancel(key, "speech_resumed")
+        speculation = Speculation(key)
+        speculation.task = asyncio.create_task(self._run(speculation, transcribe, respond),
+                                               name=f"speculation-{key}")
+        self.pending[key] = speculation
+        self.stats["started"] += 1
+        return speculation
+
+    async def _run(self, speculation: Speculation, transcribe, respond):
+        try:
+            text = await transcribe()
+        except BaseException:
+            self._release_transcript(speculation)
+            raise
+        speculation.text = text.strip() if text else ""
+        speculation.transcribed.set_result(speculation.text)
+        if not speculation.text:
+            return None
+        speculation.llm_started_at = time.perf_counter()
+        try:
+            return await respond(speculation.text)
+        finally:
+            speculation.llm_finished_at = time.perf_counter()
+
+    async def partial_transcript(self, speculation: Speculation) -> Optional[str]:
+        """
+        Transcription partielle réutilisable comme finale (attendue si en cours)
+
+        Rien n'a été dit depuis snapshot(), sinon la spéculation aurait été
+        annulée : l'audio final n'y ajoute que du silence.
+
+        Returns:
+            Texte, ou None si la transcription partielle a échoué ou été annulée
+        """
+        try:
+            return await asyncio.shield(speculation.transcribed)
+        except asyncio.CancelledError:
+            if speculation.transcribed.cancelled():
+                return None
+            raise
+
+    def take(self, key: str) -> Optional[Speculation]:
+        """Détache la spéculation du flux à l'endpoint (elle suit l'énoncé) ; compte l'énoncé"""
+        self.stats["turns"] += 1
+        return self.pending.pop(key, None)
+
+    def cancel(self, key: str, reason: str):
+        """Annule la spéculation en cours d'un flux (ex: la parole a repris)"""
+        speculation = self.pending.pop(key, None)
+        if speculation is not None:
+            self.discard(speculation, reason)
+
+    def discard(self, speculation: Speculation, reason: str):
+        """Abandonne une spéculation détachée (énoncé abandonné, transcription vide)"""
+        speculation.task.cancel()
+        self._release_transcript(speculation)
+        if speculation.llm_started_at is not None:
+            end = speculation.llm_finished_at or time.perf_counter()
+            self.stats["wasted_llm_ms_total"] += (end - speculation.llm_started_at) * 1000
+        self._record(reason)
+
+    def _release_transcript(self, speculation: Speculation):
+        # Tâche annulée ou en échec : qui attend la transcription partielle repasse par le STT
+        if not speculation.transcribed.done():
+            speculation.transcribed.set_result(None)
+
+    def cancel_all(self, reason: str = "dropped"):
+        for key in list(self.pending):
+            self.cancel(key, reason)
+
+    async def resolve(self, speculation: Speculation) -> Optional[Any]:
+        """
+        Reprend le résultat LLM d'une spéculation dont la transcription partielle
+        a servi de transcription finale (voir partial_transcript)
+
+        Returns:
+            Résultat LLM spéculatif, ou None si la transcription partielle a échoué
+            ou est vide (la spéculation est alors annulée)
+        """
+        if speculation.text is None:
+            # Transcription partielle en échec ou annulée : le STT complet a pris le relais
+            self.discard(speculation, "error")
+            return None
+        if not speculation.text:
+            self.discard(speculation, "empty")
+            return None
+
+        resolved_at = time.perf_counter()
+        try:
+            outcome = await speculation.task
+        except asyncio.CancelledError:
+            if speculation.task.cancelled():
+                self._record("error")
+                return None
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Spéculation LLM échouée ({speculation.key}): {e}")
+            self._record("error")
+            return None
+
+        # Sans spéculation, le LLM aurait démarré maintenant et duré autant
+        llm_ms = (speculation.llm_finished_at - speculation.llm_started_at) * 1000
+        wait_ms = (time.perf_counter() - resolved_at) * 1000
+        saved_ms = max(0.0, llm_ms - wait_ms)
+        self.stats["saved_ms_total"] += saved_ms
+        self._record("hit", saved_ms)
+        return outcome
+
+    def _record(self, outcome: str, saved_ms: float = 0.0):
+        self.stats["outcomes"][outcome] += 1
+        if self.metrics:
+            self.metrics.record_llm_speculation(outcome, saved_ms / 1000)
+
+    def get_status(self) -> Dict[str, Any]:
+        outcomes = self.stats["outcomes"]
+        turns = self.stats["turns"]
+        return {
+            "min_silence_ms": self.min_silence_ms,
+            "pending": len(self.pending),
+            # Transcription partielle reprise telle quelle : aucune concordance vérifiée
+            "match_check": "skipped",
+            "hit_rate": outcomes["hit"] / turns if turns else 0.0,
+            "avg_saved_ms": self.stats["saved_ms_total"] / outcomes["hit"] if outcomes["hit"] else 0.0,
+            **self.stats,
+            "outcomes": dict(outcomes)
+        }
+
+# Test de la spéculation
+async def test_speculative_turns():
+    """Test avec STT et LLM simulés : reprise, endpoint sans spéculation, reprise de parole"""
+    print("🧪 TEST SPECULATIVE TURNS")
+    print("="*30)
+
+    turns = SpeculativeTurns(min_silence_ms=200)
+
+    def stt(text):
+        async def transcribe():
+            await asyncio.sleep(0.03)
+            return text
+        return transcribe
+
+    async def llm(text):
+        await asyncio.sleep(0.12)
+        return f"Réponse à « {text} »"
+
+    # L'endpoint arrive 280ms après le début de la spéculation
+    turns.begin("salon", stt("Allume la lumière"), llm)
+    await asyncio.sleep(0.28)
+    speculation = turns.take("salon")
+    final_text = await turns.partial_transcript(speculation)
+    result = await turns.resolve(speculation)
+    print(f"   Reprise: {final_text!r} -> {result}")
+
+    # Endpoint pendant la transcription partielle : attendue puis reprise
+    turns.begin("bureau", stt("Quel temps fait-il"), llm)
+    await asyncio.sleep(0.01)
+    speculation = turns.take("bureau")
+    final_text = await turns.partial_transcript(speculation)
+    result = await turns.resolve(speculation)
+    print(f"   Transcription attendue: {final_text!r} -> {result}")
+
+    # Silence trop court pour spéculer : énoncé sans spéculation
+    print(f"   Sans spéculation: {turns.take('salon')}")
+
+    # La parole reprend avant l'endpoint
+    turns.begin("cuisine", stt("Quelle heure"), llm)
+    await asyncio.sleep(0.05)
+    turns.cancel("cuisine", "speech_resumed")
+
+    status = turns.get_status()
+    print(f"   Taux de succès: {status['hit_rate']:.0%}, gain moyen {status['avg_saved_ms']:.0f}ms")
+    print(f"   Issues: {status['outcomes']}, LLM gaspillé {status['wasted_llm_ms_total']:.0f}ms")
+    print("\n✅ Test Speculative Turns terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_speculative_turns())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Stage Executors - Luxa v1.1
+============================
+
+Un pool de threads dédié par étage (VAD, STT, LLM, TTS) au lieu du pool par
+défaut d'asyncio : un décodage STT lent ne peut plus affamer le VAD ou la
+TTS. Chaque travail reçoit un jeton d'annulation ; à l'expiration ou à
+l'annulation de l'appelant, un travail encore en file est retiré, un
+travail en cours s'arrête au prochain point de contrôle (ex: entre deux
+segments faster-whisper) ou, à défaut, son résultat est abandonné.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Poids du dernier travail dans le temps d'exécution récent (prévision d'attente)
+RECENT_WEIGHT = 0.2
+
+class WorkCancelled(Exception):
+    """Levée par CancelToken.check() dans un travail annulé"""
+
+class ExecutorSaturated(RuntimeError):
+    """File de l'étage pleine : travail refusé sans attendre"""
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """Point de contrôle à appeler entre deux unités de travail"""
+        if self._event.is_set():
+            raise WorkCancelled()
+
+class StageExecutor:
+    def __init__(self, name: str, workers: int = 1, max_queue: int = 8, metrics=None):
+        """
+        Args:
+            name: Étage (labels des métriques, nom des threads)
+            workers: Threads du pool
+            max_queue: Travaux en attente au-delà desquels run() lève ExecutorSaturated
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = metrics
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"luxa-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "cancelled": {"before_start": 0, "stopped": 0, "abandoned": 0},
+            "errors": 0,
+            "queue_ms_total": 0.0,
+            "run_ms_total": 0.0,
+            "max_queue_ms": 0.0,
+            "recent_run_ms": 0.0
+        }
+
+    async def run(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        """
+        Exécute fn(token, *args) dans le pool de l'étage
+
+        Raises:
+            ExecutorSaturated: File pleine
+            asyncio.TimeoutError: timeout dépassé (le travail est annulé)
+        """
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.stats["rejected"] += 1
+                if self.metrics:
+                    self.metrics.record_executor_rejected(self.name)
+                raise ExecutorSaturated(f"Étage {self.name}: {self.queued} travaux en attente")
+            self.queued += 1
+            self.stats["submitted"] += 1
+        self._publish_load()
+
+        token = CancelToken()
+        # Le contexte (trace courante) suit le travail dans le thread du pool
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, self._execute, token, time.perf_counter(), fn, args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            token.cancel()
+            # Pas encore démarré : retiré de la file, aucun thread consommé
+            if future.cancel():
+                with self._lock:
+                    self.queued -= 1
+                self._count_cancel("before_start")
+                self._publish_load()
+            raise
+
+    def _execute(self, token: CancelToken, submitted: float, fn: Callable[..., Any], args: tuple) -> Any:
+        started = time.perf_counter()
+        wait_s = started - submitted
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.stats["queue_ms_total"] += wait_s * 1000
+            self.stats["max_queue_ms"] = max(self.stats["max_queue_ms"], wait_s * 1000)
+        self._publish_load()
+        if self.metrics:
+            self.metrics.record_executor_wait(self.name, wait_s)
+        tracer = get_tracer()
+        tracer.record(f"pool_wait.{self.name}", submitted, started, cat="executor")
+
+        try:
+            if token.cancelled:
+                self._count_cancel("before_start")
+                return None
+            with tracer.span(f"pool_run.{self.name}", cat="executor") as span:
+                result = fn(token, *args)
+                span.set(cancelled=token.cancelled)
+            # L'appelant a abandonné pendant l'exécution : résultat jeté
+            if token.cancelled:
+                self._count_cancel("abandoned")
+                return None
+            with self._lock:
+                self.stats["completed"] += 1
+            return result
+        except WorkCancelled:
+            self._count_cancel("stopped")
+            return None
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            run_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                self.stats["run_ms_total"] += run_ms
+                recent = self.stats["recent_run_ms"] or run_ms
+                self.stats["recent_run_ms"] = recent + RECENT_WEIGHT * (run_ms - recent)
+            self._publish_load()
+
+    def _count_cancel(self, when: str):
+        with self._lock:
+            self.stats["cancelled"][when] += 1
+        if self.metrics:
+            self.metrics.record_executor_cancelled(self.name, when)
+
+    def _publish_load(self):
+        if self.metrics:
+            self.metrics.set_executor_load(self.name, self.in_flight, self.queued)
+
+    def predicted_latency_ms(self) -> float:
+        """Délai prévu d'un nouveau travail : travaux en file et en cours devant lui, puis le sien"""
+        with self._lock:
+            ahead = self.queued + self.in_flight
+            return (ahead / self.workers + 1) * self.stats["recent_run_ms"]
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            # Les travaux refusés ne sont jamais comptés dans submitted
+            started = self.stats["submitted"] - self.queued - self.stats["cancelled"]["before_start"]
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "avg_queue_ms": self.stats["queue_ms_total"] / started if started > 0 else 0.0,
+                "avg_run_ms": self.stats["run_ms_total"] / started if started > 0 else 0.0,
+                **self.stats,
+                "cancelled": dict(self.stats["cancelled"])
+            }
+
+class StageExecutors:
+    DEFAULT_STAGE = {"workers": 1, "max_queue": 8}
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, metrics=None):
+        """
+        Args:
+            config: Section executors (étage -> workers, max_queue)
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.config = config or {}
+        self.metrics = metrics
+        self.executors: Dict[str, StageExecutor] = {}
+        for name in self.config:
+            self.get(name)
+
+    def get(self, stage: str) -> StageExecutor:
+        """Pool de l'étage (créé avec les valeurs par défaut s'il n'est pas configuré)"""
+        executor = self.executors.get(stage)
+        if executor is None:
+            stage_config = {**self.DEFAULT_STAGE, **self.config.get(stage, {})}
+            executor = StageExecutor(stage, workers=stage_config["workers"],
+                                     max_queue=stage_config["max_queue"], metrics=self.metrics)
+            self.executors[stage] = executor
+        return executor
+
+    async def run(self, stage: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None) -> Any:
+        return await self.get(stage).run(fn, *args, timeout=timeout)
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown()
+
+    def get_status(self) -> Dict[str, Any]:
+        return {name: executor.get_status() for name, executor in self.executors.items()}
+
+# Test des exécuteurs par étage
+async def test_stage_executors():
+    """Test d'isolation et d'annulation réelle"""
+    print("🧪 TEST STAGE EXECUTORS")
+    print("="*30)
+
+    executors = StageExecutors({"stt": {"workers": 1, "max_queue": 2}, "vad": {"workers": 1, "max_queue": 16}})
+
+    def slow_decode(token, segments):
+        # Générateur paresseux : contrôle entre chaque segment
+        decoded = []
+        for i in range(segments):
+            token.check()
+            time.sleep(0.05)
+            decoded.append(f"segment{i}")
+        return " ".join(decoded)
+
+    def vad_frame(token):
+        time.sleep(0.001)
+        return True
+
+    # STT lent : le VAD reste servi par son propre pool
+    stt_task = asyncio.create_task(executors.run("stt", slow_decode, 20, timeout=0.2))
+    start = time.perf_counter()
+    for _ in range(10):
+        await executors.run("vad", vad_frame)
+    print(f"   10 trames VAD pendant le STT: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    try:
+        await stt_task
+    except asyncio.TimeoutError:
+        print("   ⏱️ Timeout STT : décodage arrêté au segment suivant")
+
+    # File pleine : refus immédiat plutôt qu'attente
+    tasks = [asyncio.create_task(executors.run("stt", slow_decode, 2)) for _ in range(4)]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"   Résultats: {[type(r).__name__ if isinstance(r, Exception) else r for r in results]}")
+
+    await asyncio.sleep(0.1)
+    for name, status in executors.get_status().items():
+        print(f"   {name}: terminés {status['completed']}, refusés {status['rejected']}, "
+              f"annulés {status['cancelled']}, attente moy. {status['avg_queue_ms']:.1f}ms")
+    executors.shutdown()
+    print("\n✅ Test Stage Executors terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_stage_executors())
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Staged Pipeline - Luxa v1.1
+============================
+
+Pipeline en étages concurrents (capture → VAD → STT → LLM → TTS) reliés par
+des files asyncio bornées : pendant que le STT décode l'énoncé N, la capture
+et le VAD de l'énoncé N+1 continuent. Une file pleine applique la contre-
+pression à l'étage amont, ou abandonne l'élément (métrique) selon la
+politique de l'étage. Profondeur de file, attente et temps de service sont
+mesurés par étage.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# Poids du dernier élément dans le temps de service récent (prévision d'attente)
+RECENT_WEIGHT = 0.2
+
+# Politiques de débordement d'une file d'étage
+OVERFLOW_POLICIES = (
+    "block",        # Contre-pression : l'amont attend (put_timeout_s borne l'attente)
+    "drop_newest",  # L'élément entrant est abandonné
+    "drop_oldest",  # L'élément le plus ancien est évincé
+)
+
+class PipelineStage:
+    def __init__(self, name: str, handler: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+                 queue_size: int = 8, workers: int = 1, overflow: str = "block",
+                 put_timeout_s: Optional[float] = None, metrics=None):
+        """
+        Args:
+            name: Nom de l'étage (labels des métriques)
+            handler: Coroutine item -> item transmis à l'étage suivant, ou None (consommé)
+            queue_size: Capacité de la file d'entrée
+            workers: Tâches concurrentes (1 pour un étage à état ordonné, ex: VAD)
+            overflow: Politique de débordement (voir OVERFLOW_POLICIES)
+            put_timeout_s: Attente maximale en contre-pression avant abandon
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Politique de débordement inconnue: {overflow}")
+
+        self.name = name
+        self.handler = handler
+        self.queue_size = queue_size
+        self.workers = workers
+        self.overflow = overflow
+        self.put_timeout_s = put_timeout_s
+        self.metrics = metrics
+
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=queue_size)
+        self.downstream: Optional["PipelineStage"] = None
+        self.sink: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+        self._tasks: List[asyncio.Task] = []
+        self._busy = 0
+
+        self.stats = {
+            "accepted": 0,
+            "processed": 0,
+            "forwarded": 0,
+            "errors": 0,
+            "dropped": {},
+            "max_depth": 0,
+            "service_ms_total": 0.0,
+            "wait_ms_total": 0.0,
+            "last_service_ms": 0.0,
+            "recent_service_ms": 0.0
+        }
+
+    async def put(self, item: Dict[str, Any]) -> bool:
+        """Dépose un élément selon la politique de l'étage ; False si abandonné"""
+        item["enqueued_at"] = time.perf_counter()
+
+        if self.overflow == "block":
+            if self.put_timeout_s is None:
+                await self.queue.put(item)
+            else:
+                try:
+                    await asyncio.wait_for(self.queue.put(item), timeout=self.put_timeout_s)
+                except asyncio.TimeoutError:
+                    self._drop(item, "backpressure_timeout")
+                    return False
+
+        elif self.overflow == "drop_newest":
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self._drop(item, "queue_full")
+                return False
+
+        else:  # drop_oldest
+            while self.queue.full():
+                evicted = self.queue.get_nowait()
+                self.queue.task_done()
+                self._drop(evicted, "evicted")
+            self.queue.put_nowait(item)
+
+        self.stats["accepted"] += 1
+        self._observe_depth()
+        return True
+
+    def _drop(self, item: Dict[str, Any], reason: str):
+        self.stats["dropped"][reason] = self.stats["dropped"].get(reason, 0) + 1
+        if self.metrics:
+            self.metrics.record_stage_drop(self.name, reason)
+        on_drop = item.get("on_drop")
+        if on_drop:
+            on_drop(self.name, reason)
+
+    def _observe_depth(self):
+        depth = self.queue.qsize()
+        self.stats["max_depth"] = max(self.stats["max_depth"], depth)
+        if self.metrics:
+            self.metrics.set_stage_queue_depth(self.name, depth)
+
+    def start(self):
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"stage-{self.name}-{i}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            self._observe_depth()
+            started = time.perf_counter()
+            wait_s = started - item["enqueued_at"]
+            self._busy += 1
+
+            output = None
+            tracer = get_tracer()
+            try:
+                try:
+                    # La trace de l'élément (un énoncé) est reprise dans la tâche de l'étage
+                    with tracer.activate(item.get("trace")):
+                        tracer.record(f"queue.{self.name}", item["enqueued_at"], started, cat="stage_queue")
+                        with tracer.span(f"stage.{self.name}", cat="stage"):
+                            output = await self.handler(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Étage {self.name}: {e}")
+                    # L'élément ne sera jamais transmis : son tour et sa trace sont clos
+                    self._drop(item, "error")
+                finally:
+                    self._busy -= 1
+                    service_s = time.perf_counter() - started
+                    self.stats["processed"] += 1
+                    self.stats["service_ms_total"] += service_s * 1000
+                    self.stats["wait_ms_total"] += wait_s * 1000
+                    self.stats["last_service_ms"] = service_s * 1000
+                    # Moyenne mobile exponentielle : suit la charge actuelle, pas l'historique
+                    recent = self.stats["recent_service_ms"] or service_s * 1000
+                    self.stats["recent_service_ms"] = recent + RECENT_WEIGHT * (service_s * 1000 - recent)
+                    if self.metrics:
+                        self.metrics.record_stage_service(self.name, service_s, wait_s)
+
+                if output is not None:
+                    self.stats["forwarded"] += 1
+                    # En mode "block", attendre ici propage la contre-pression vers l'amont
+                    try:
+                        if self.downstream is not None:
+                            await self.downstream.put(output)
+                        elif self.sink is not None:
+                            await self.sink(output)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        # Une transmission en échec ne doit pas arrêter le worker
+                        self.stats["errors"] += 1
+                        logger.error(f"❌ Étage {self.name}, transmission: {e}")
+                        self._drop(output, "forward_error")
+            finally:
+                # Terminé seulement une fois transmis : drain() ne perd rien en vol
+                self.queue.task_done()
+
+    def predicted_latency_ms(self) -> float:
+        """Temps de passage prévu d'un nouvel élément : file et éléments en cours devant lui, puis son service"""
+        ahead = self.queue.qsize() + self._busy
+        return (ahead / self.workers + 1) * self.stats["recent_service_ms"]
+
+    def get_status(self) -> Dict[str, Any]:
+        processed = self.stats["processed"]
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "busy_workers": self._busy,
+            "overflow": self.overflow,
+            "avg_service_ms": self.stats["service_ms_total"] / processed if processed else 0.0,
+            "avg_wait_ms": self.stats["wait_ms_total"] / processed if processed else 0.0,
+            **self.stats
+        }
+
+class StagedPipeline:
+    def __init__(self, stages: List[PipelineStage],
+                 on_output: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        """
+        Args:
+            stages: Étages dans l'ordre du flux
+            on_output: Coroutine recevant les éléments sortis du dernier étage
+        """
+        self.stages = stages
+        for upstream, downstream in zip(stages, stages[1:]):
+            upstream.downstream = downstream
+        stages[-1].sink = on_output
+        self.running = False
+
+    def start(self):
+        """Démarre les tâches de chaque étage (dans la boucle asyncio courante)"""
+        if self.running:
+            return
+        for stage in self.stages:
+            stage.start()
+        self.running = True
+
+    def get_stage(self, name: str) -> PipelineStage:
+        return next(stage for stage in self.stages if stage.name == name)
+
+    async def submit(self, payload: Any, **meta) -> bool:
+        """Entrée du pipeline (étage de capture) ; False si abandonné"""
+        item = {"payload": payload, "created_at": time.perf_counter(), **meta}
+        return await self.stages[0].put(item)
+
+    async def drain(self):
+        """Attend que tous les éléments en cours aient traversé le pipeline"""
+        for stage in self.stages:
+            await stage.queue.join()
+
+    async def stop(self, drain: bool = True):
+        if drain:
+            await self.drain()
+        for stage in self.stages:
+            await stage.stop()
+        self.running = False
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "stages": {stage.name: stage.get_status() for stage in self.stages}
+        }
+
+# Test du pipeline en étages
+async def test_staged_pipeline():
+    """Test avec des étages simulés : STT lent, capture temps réel"""
+    print("🧪 TEST STAGED PIPELINE")
+    print("="*30)
+
+    async def passthrough(item):
+        return item
+
+    async def vad(item):
+        # Un énoncé toutes les 5 trames
+        return item if item["frame"] % 5 == 4 else None
+
+    async def slow_stt(item):
+        await asyncio.sleep(0.05)
+        return item
+
+    async def flaky_tts(item):
+        if item["frame"] == 19:
+            raise RuntimeError("synthèse en échec")
+        return item
+
+    outputs = []
+    dropped = []
+
+    async def collect(item):
+        # Un consommateur en échec n'arrête pas le dernier étage
+        if item["frame"] == 9:
+            raise RuntimeError("consommateur en échec")
+        outputs.append(item["frame"])
+
+    pipeline = StagedPipeline([
+        PipelineStage("capture", passthrough, queue_size=4, overflow="drop_newest"),
+        PipelineStage("vad", vad, queue_size=4),
+        PipelineStage("stt", slow_stt, queue_size=1, overflow="drop_oldest"),
+        PipelineStage("llm", passthrough, queue_size=4),
+        PipelineStage("tts", flaky_tts, queue_size=4),
+    ], on_output=collect)
+    pipeline.start()
+
+    # Trames toutes les 5ms : l'étage STT (50ms) est saturé
+    for frame in range(100):
+        await pipeline.submit(None, frame=frame,
+                              on_drop=lambda stage, reason, frame=frame: dropped.append((frame, stage, reason)))
+        await asyncio.sleep(0.005)
+    await pipeline.stop()
+
+    print(f"   Énoncés sortis: {outputs}")
+    print(f"   Énoncés clos par abandon: {[d for d in dropped if d[2] in ('error', 'forward_error')]}")
+    for name, status in pipeline.get_status()["stages"].items():
+        print(f"   {name:>8}: traités {status['processed']:3d}, service {status['avg_service_ms']:5.1f}ms, "
+              f"attente {status['avg_wait_ms']:5.1f}ms, max file {status['max_depth']}, abandons {status['dropped']}")
+
+    print("\n✅ Test Staged Pipeline terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_staged_pipeline())
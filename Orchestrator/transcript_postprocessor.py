@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Transcript Post-Processor - Luxa v1.1
+======================================
+
+Post-traitement des transcriptions STT : ponctuation, casse et normalisation
+des commandes vocales. Un chemin rapide à base de règles traite la majorité
+des transcriptions (déjà bien formées, très courtes, commandes, ponctuation
+dictée) ; le LLM n'intervient que pour le reste, avec un nombre de tokens
+borné et une échéance au-delà de laquelle le résultat des règles est gardé.
+"""
+
+import re
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from LLM.response_cache import normalize_prompt
+from Orchestrator.stage_executors import ExecutorSaturated
+
+logger = logging.getLogger(__name__)
+
+# Ponctuation dictée -> symbole (ordre : expressions longues d'abord)
+SPOKEN_PUNCTUATION = [
+    (r"point d'interrogation", "?"),
+    (r"point d'exclamation", "!"),
+    (r"points de suspension", "…"),
+    (r"point[- ]virgule", ";"),
+    (r"deux[- ]points", ":"),
+    (r"point final", "."),
+    (r"virgule", ","),
+    (r"à la ligne", "\n"),
+    (r"nouveau paragraphe", "\n\n"),
+]
+
+# Commandes vocales reconnues (texte normalisé : minuscules, sans accents ni ponctuation)
+VOICE_COMMANDS = {
+    "stop": r"(stop|arrete|arrete toi|tais toi|silence)",
+    "pause": r"(pause|attends|attends un peu)",
+    "resume": r"(reprends|continue)",
+    "repeat": r"(repete|repete s il te plait|encore une fois)",
+    "cancel": r"(annule|laisse tomber|oublie)",
+    "volume_up": r"(plus fort|monte le son|augmente le volume)",
+    "volume_down": r"(moins fort|baisse le son|baisse le volume)",
+}
+
+# Début de phrase interrogative (ponctuation finale "?") ; "qui"/"que" seuls
+# ouvrent aussi des affirmatives ("que la lumière soit"), d'où l'inversion exigée
+QUESTION_START = re.compile(
+    r"^(est-ce que|est ce que|qu'est-ce|quel|quelle|quels|quelles|comment|pourquoi|"
+    r"où|quand|combien|quoi|peux-tu|pourrais-tu|sais-tu|as-tu|es-tu|"
+    r"(qui|que) \S+-(t-)?(je|tu|il|elle|on|nous|vous|ils|elles|ce))\b",
+    re.IGNORECASE
+)
+
+LLM_PROMPT = (
+    "Corrige la ponctuation et les majuscules de la transcription sans changer, "
+    "ajouter ni retirer de mots.\n"
+    "Transcription: quel temps fait-il à paris demain\n"
+    "Corrigé: Quel temps fait-il à Paris demain ?\n"
+    "Transcription: {text}\n"
+    "Corrigé:"
+)
+
+class TranscriptPostProcessor:
+    def __init__(self, backend=None, config: Optional[Dict[str, Any]] = None, metrics=None, executor=None):
+        """
+        Args:
+            backend: LLMBackend optionnel (sans backend : règles seules)
+            config: Section postprocessing (max_tokens, deadline_ms, min_words, ...)
+            metrics: EnhancedMetricsCollector optionnel
+            executor: StageExecutor de l'étage LLM (sinon pool par défaut d'asyncio)
+        """
+        config = config or {}
+        self.backend = backend
+        self.metrics = metrics
+        self.executor = executor
+        self.max_tokens = config.get("max_tokens", 64)
+        self.deadline_ms = config.get("deadline_ms", 250)
+        self.min_words = config.get("min_words", 4)
+        self.max_unpunctuated_words = config.get("max_unpunctuated_words", 12)
+
+        # Un seul appel LLM à la fois : si occupé, les règles suffisent
+        self._llm_lock = threading.Lock()
+
+        self._spoken_punctuation = [
+            (re.compile(rf"\s*\b{pattern}\b", re.IGNORECASE), symbol)
+            for pattern, symbol in SPOKEN_PUNCTUATION
+        ]
+        self._commands = {
+            name: re.compile(rf"^{pattern}$") for name, pattern in VOICE_COMMANDS.items()
+        }
+
+        self.stats = {"requests": 0, "paths": {}, "llm_ms_total": 0.0, "llm_calls": 0}
+
+    # Chemin rapide
+
+    def match_command(self, text: str) -> Optional[str]:
+        """Commande vocale canonique, ou None"""
+        normalized = normalize_prompt(text)
+        for name, pattern in self._commands.items():
+            if pattern.match(normalized):
+                return name
+        return None
+
+    def apply_rules(self, text: str) -> str:
+        """Espaces, ponctuation dictée, majuscule initiale et ponctuation finale"""
+        text = " ".join(text.split())
+        for pattern, symbol in self._spoken_punctuation:
+            text = pattern.sub(symbol, text)
+        # Espace avant ? ! : ; (typographie française), aucun avant , . …
+        text = re.sub(r"(?<!\d)\s*([?!:;])(?!\d)", r" \1", text)
+        text = re.sub(r"\s+([,.…])", r"\1", text).strip()
+
+        if text and text[0].islower():
+            text = text[0].upper() + text[1:]
+        if text and text[-1] not in ".?!…:;\n":
+            text += " ?" if QUESTION_START.match(text) else "."
+        return text
+
+    def _longest_unpunctuated_run(self, text: str) -> int:
+        return max(len(chunk.split()) for chunk in re.split(r"[,;:.?!…\n]", text))
+
+    def needs_llm(self, text: str, ruled: str) -> Tuple[bool, str]:
+        """Décide si le LLM apporte quelque chose : (besoin, raison)
+
+        text est la transcription brute, ruled le résultat des règles.
+        """
+        if len(text.split()) < self.min_words:
+            return False, "short"
+
+        # Transcription déjà ponctuée par le STT
+        if (text[0].isupper() and text.rstrip()[-1] in ".?!…"
+                and self._longest_unpunctuated_run(text) <= self.max_unpunctuated_words):
+            return False, "well_formed"
+
+        # Les règles suffisent tant qu'il ne reste pas de longue phrase sans ponctuation
+        if self._longest_unpunctuated_run(ruled) <= self.max_unpunctuated_words:
+            return False, "rules"
+        return True, "llm"
+
+    # Chemin LLM
+
+    def _llm_normalize(self, text: str, deadline: float, cancel=None) -> Tuple[Optional[str], str]:
+        """Appel LLM borné ; (texte, chemin). Exécuté hors boucle asyncio.
+
+        cancel (CancelToken) arrête la génération au token suivant (WorkCancelled).
+        """
+        if not self._llm_lock.acquire(blocking=False):
+            return None, "llm_busy"
+        try:
+            prompt = LLM_PROMPT.format(text=text)
+            # Sortie attendue ~ longueur de l'entrée
+            budget = min(self.max_tokens, int(len(self.backend.tokenize(text)) * 1.5) + 8)
+
+            pieces = []
+            for piece in self.backend.stream(prompt, budget, stop=["\n", "Transcription:"]):
+                pieces.append(piece)
+                if cancel is not None:
+                    cancel.check()
+                if time.perf_counter() > deadline:
+                    return None, "llm_deadline"
+            return "".join(pieces).strip(), "llm"
+        finally:
+            self._llm_lock.release()
+
+    def _accept_llm_output(self, source: str, candidate: Optional[str]) -> bool:
+        """Le LLM ne doit changer que la ponctuation et la casse"""
+        return bool(candidate) and normalize_prompt(candidate) == normalize_prompt(source)
+
+    async def process(self, text: str, allow_llm: bool = True) -> Dict[str, Any]:
+        """
+        Post-traite une transcription
+
+        Args:
+            text: Transcription brute
+            allow_llm: False sous délestage (contrôle d'admission) : règles seules
+
+        Returns:
+            Dict avec text, path (short, well_formed, command, rules, shed, llm, llm_deadline,
+            llm_rejected, llm_busy, llm_error), command et latency_ms
+        """
+        start = time.perf_counter()
+        outcome = {"text": text, "path": None, "command": None, "latency_ms": 0.0}
+
+        command = self.match_command(text)
+        if command:
+            outcome.update(path="command", command=command)
+        else:
+            ruled = self.apply_rules(text)
+            needs_llm, reason = self.needs_llm(text, ruled)
+            # Sans backend, le résultat des règles est gardé
+            outcome.update(text=ruled, path=reason if not needs_llm else "rules")
+
+            if needs_llm and not allow_llm:
+                outcome["path"] = "shed"
+            elif needs_llm and self.backend is not None:
+                deadline = start + self.deadline_ms / 1000
+                loop = asyncio.get_running_loop()
+                llm_start = time.perf_counter()
+                try:
+                    # La boucle de génération s'arrête d'elle-même à l'échéance ;
+                    # wait_for couvre une évaluation de prompt plus longue que l'échéance
+                    timeout = max(0.0, deadline - time.perf_counter()) + 0.05
+                    if self.executor is not None:
+                        candidate, path = await self.executor.run(
+                            lambda cancel: self._llm_normalize(ruled, deadline, cancel), timeout=timeout
+                        )
+                    else:
+                        candidate, path = await asyncio.wait_for(
+                            loop.run_in_executor(None, self._llm_normalize, ruled, deadline),
+                            timeout=timeout
+                        )
+                except asyncio.TimeoutError:
+                    candidate, path = None, "llm_deadline"
+                except ExecutorSaturated:
+                    candidate, path = None, "llm_busy"
+                except Exception as e:
+                    logger.warning(f"⚠️ Post-traitement LLM échoué: {e}")
+                    candidate, path = None, "llm_error"
+
+                self.stats["llm_calls"] += 1
+                self.stats["llm_ms_total"] += (time.perf_counter() - llm_start) * 1000
+                if path == "llm" and not self._accept_llm_output(ruled, candidate):
+                    path = "llm_rejected"
+                if path == "llm":
+                    outcome["text"] = candidate
+                outcome["path"] = path
+
+        outcome["latency_ms"] = (time.perf_counter() - start) * 1000
+        self._record(outcome)
+        return outcome
+
+    def _record(self, outcome: Dict[str, Any]):
+        self.stats["requests"] += 1
+        self.stats["paths"][outcome["path"]] = self.stats["paths"].get(outcome["path"], 0) + 1
+        if self.metrics:
+            self.metrics.record_postprocess(outcome["path"], outcome["latency_ms"] / 1000)
+
+    def get_status(self) -> Dict[str, Any]:
+        llm_calls = self.stats["llm_calls"]
+        skipped = sum(n for path, n in self.stats["paths"].items() if not path.startswith("llm"))
+        return {
+            "llm_available": self.backend is not None,
+            "deadline_ms": self.deadline_ms,
+            "max_tokens": self.max_tokens,
+            "skip_rate": skipped / self.stats["requests"] if self.stats["requests"] else 0.0,
+            "avg_llm_ms": self.stats["llm_ms_total"] / llm_calls if llm_calls else 0.0,
+            **self.stats
+        }
+
+# Test du post-traitement
+async def test_transcript_postprocessor():
+    """Test du post-traitement avec le backend LLM stub"""
+    from LLM.backends import StubBackend
+
+    print("🧪 TEST TRANSCRIPT POST-PROCESSOR")
+    print("="*35)
+
+    processor = TranscriptPostProcessor(
+        backend=StubBackend(prompt_eval_ms_per_token=0.2, token_latency_ms=5.0),
+        config={"deadline_ms": 100}
+    )
+
+    samples = [
+        "Quelle heure est-il ?",
+        "merci",
+        "arrête",
+        "rappelle moi d'acheter du pain virgule du lait et des œufs point final",
+        "est-ce que tu peux allumer la lumière du salon",
+        "que fais-tu demain soir après le travail",
+        "rappelle moi le rendez-vous chez le dentiste à 15:30",
+        "alors demain matin je dois appeler le garage ensuite passer à la banque puis récupérer les enfants à l'école",
+    ]
+    for text in samples:
+        outcome = await processor.process(text)
+        print(f"   [{outcome['path']:>12}] {text!r} -> {outcome['text']!r} "
+              f"({outcome['latency_ms']:.1f}ms){' commande=' + outcome['command'] if outcome['command'] else ''}")
+
+    print(f"\n📊 Statut: {processor.get_status()}")
+    print("\n✅ Test Transcript Post-Processor terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_transcript_postprocessor())
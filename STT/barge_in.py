@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Barge-In Monitor - Luxa v1.1
+=============================
+
+Écoute du microphone pendant que l'assistant répond : dès que l'utilisateur
+parle (VAD sur quelques trames consécutives), un événement d'arrêt est levé
+pour interrompre la génération LLM, la synthèse Piper et la lecture. L'audio
+capté depuis le début de la parole est conservé pour le tour suivant.
+"""
+
+import time
+import threading
+import logging
+import numpy as np
+import sounddevice as sd
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.quantile_sketch import QuantileSketch
+
+logger = logging.getLogger(__name__)
+
+class BargeInMonitor:
+    def __init__(self, is_speech: Optional[Callable[[np.ndarray], bool]] = None,
+                 sample_rate: int = 16000, frame_ms: float = 30, min_speech_ms: float = 150,
+                 energy_threshold: float = 0.02, pre_roll_ms: float = 300,
+                 max_capture_s: float = 5.0, device: Optional[Any] = None, metrics=None):
+        """
+        Args:
+            is_speech: Décision VAD par trame (None : seuil d'énergie RMS)
+            sample_rate: Fréquence du flux d'entrée
+            frame_ms: Durée d'une trame analysée
+            min_speech_ms: Parole continue exigée avant d'interrompre (toux, clics)
+            energy_threshold: Seuil RMS sans VAD ; plus haut qu'à l'écoute car le
+                micro entend aussi la réponse (casque ou annulation d'écho conseillés)
+            pre_roll_ms: Audio conservé avant la détection (début de la phrase)
+            max_capture_s: Audio conservé au plus après la détection
+            device: Périphérique d'entrée sounddevice (None = défaut)
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.is_speech = is_speech or self._is_speech_energy
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.min_speech_ms = min_speech_ms
+        self.energy_threshold = energy_threshold
+        self.pre_roll_ms = pre_roll_ms
+        self.max_capture_s = max_capture_s
+        self.device = device
+        self.metrics = metrics
+
+        self._stream = None
+        self._lock = threading.Lock()
+        self._pre_roll = deque(maxlen=max(1, int(pre_roll_ms / frame_ms)))
+        self._captured = []
+        self._captured_frames = 0
+        self._speech_ms = 0.0
+        self._on_barge_in = None
+        self.stop_event = threading.Event()
+        self.detected_at = None
+
+        self.cancel_latency = QuantileSketch()
+        self.stats = {
+            "armed": 0,
+            "barge_ins": 0,
+            "generated_tokens": 0,
+            "wasted_tokens": 0,
+            "dropped_audio_ms": 0.0,
+            "last_cancel_latency_ms": 0.0
+        }
+
+    def _is_speech_energy(self, frame: np.ndarray) -> bool:
+        return float(np.sqrt(np.mean(frame ** 2))) > self.energy_threshold
+
+    def arm(self, on_barge_in: Optional[Callable[[], Any]] = None) -> threading.Event:
+        """
+        Commence la surveillance d'une réponse
+
+        Args:
+            on_barge_in: Appelé (thread audio) à la détection, ex: arrêt immédiat de la lecture
+
+        Returns:
+            Événement levé à la détection (à transmettre au LLM et à la TTS)
+        """
+        with self._lock:
+            self.stop_event = threading.Event()
+            self.detected_at = None
+            self._on_barge_in = on_barge_in
+            self._pre_roll.clear()
+            self._captured = []
+            self._captured_frames = 0
+            self._speech_ms = 0.0
+        self.stats["armed"] += 1
+
+        if self._stream is None:
+            self._stream = sd.InputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype='float32',
+                blocksize=self.frame_size,
+                device=self.device,
+                callback=self._callback
+            )
+            self._stream.start()
+        return self.stop_event
+
+    def disarm(self):
+        """Ferme le flux d'entrée (le micro est rendu à l'écoute suivante)"""
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        self.process(indata[:, 0].copy())
+
+    def process(self, frame: np.ndarray) -> bool:
+        """Analyse une trame ; True à la trame qui déclenche le barge-in"""
+        duration_ms = len(frame) * 1000 / self.sample_rate
+        with self._lock:
+            if self.detected_at is not None:
+                # Déjà interrompu : la suite de la phrase est gardée pour le STT
+                if self._captured_frames < self.max_capture_s * self.sample_rate:
+                    self._captured.append(frame)
+                    self._captured_frames += len(frame)
+                return False
+
+            self._pre_roll.append(frame)
+            if not self.is_speech(frame):
+                self._speech_ms = 0.0
+                return False
+            self._speech_ms += duration_ms
+            if self._speech_ms < self.min_speech_ms:
+                return False
+
+            self.detected_at = time.perf_counter()
+            self._captured = list(self._pre_roll)
+            self._captured_frames = sum(len(f) for f in self._captured)
+            self._pre_roll.clear()
+            on_barge_in = self._on_barge_in
+
+        self.stop_event.set()
+        logger.info("✋ Parole détectée pendant la réponse, interruption")
+        if on_barge_in:
+            try:
+                on_barge_in()
+            except Exception as e:
+                logger.warning(f"⚠️ Erreur callback barge-in: {e}")
+        return True
+
+    @property
+    def triggered(self) -> bool:
+        return self.stop_event.is_set()
+
+    def captured_audio(self) -> Optional[np.ndarray]:
+        """Parole captée depuis juste avant la détection (None sans barge-in)"""
+        with self._lock:
+            if self.detected_at is None or not self._captured:
+                return None
+            return np.concatenate(self._captured)
+
+    def record_cancel(self, generated_tokens: int, wasted_tokens: int, dropped_audio_ms: float = 0.0) -> float:
+        """
+        Clôt une interruption une fois LLM, synthèse et lecture arrêtés
+
+        Args:
+            generated_tokens: Tokens générés pour la réponse interrompue
+            wasted_tokens: Tokens générés mais jamais passés à la lecture
+            dropped_audio_ms: Audio synthétisé abandonné dans la file de lecture
+
+        Returns:
+            Latence d'annulation en ms (détection → tout arrêté)
+        """
+        if self.detected_at is None:
+            return 0.0
+        latency_ms = (time.perf_counter() - self.detected_at) * 1000
+        self.cancel_latency.add(latency_ms)
+        self.stats["barge_ins"] += 1
+        self.stats["generated_tokens"] += generated_tokens
+        self.stats["wasted_tokens"] += wasted_tokens
+        self.stats["dropped_audio_ms"] += dropped_audio_ms
+        self.stats["last_cancel_latency_ms"] = latency_ms
+        if self.metrics:
+            self.metrics.record_barge_in(wasted_tokens, latency_ms / 1000)
+        return latency_ms
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "listening": self._stream is not None,
+            "triggered": self.triggered,
+            "min_speech_ms": self.min_speech_ms,
+            "cancel_latency_ms": self.cancel_latency.get_status(),
+            **self.stats
+        }
+
+# Test du barge-in
+def test_barge_in():
+    """Test sur trames synthétiques (sans micro)"""
+    print("🧪 TEST BARGE-IN MONITOR")
+    print("="*30)
+
+    monitor = BargeInMonitor(min_speech_ms=90)
+    # Surveillance sans flux d'entrée : les trames sont poussées à la main
+    monitor.stop_event = threading.Event()
+    stopped = []
+    monitor._on_barge_in = lambda: stopped.append(time.perf_counter())
+
+    silence = np.zeros(monitor.frame_size, dtype=np.float32)
+    click = (np.random.randn(monitor.frame_size) * 0.2).astype(np.float32)
+    speech = [(np.random.randn(monitor.frame_size) * 0.1).astype(np.float32) for _ in range(6)]
+
+    frames = [silence] * 5 + [click, silence] + speech
+    triggered_at = next((i for i, frame in enumerate(frames) if monitor.process(frame)), None)
+    print(f"   Clic isolé ignoré, barge-in à la trame {triggered_at} (3e trame de parole continue)")
+    print(f"   Callback d'arrêt appelé: {len(stopped) == 1}, événement levé: {monitor.triggered}")
+
+    # Simule l'arrêt du LLM (un token de plus) et de la lecture
+    time.sleep(0.03)
+    latency_ms = monitor.record_cancel(generated_tokens=42, wasted_tokens=17, dropped_audio_ms=850)
+    audio = monitor.captured_audio()
+    print(f"   Annulation: {latency_ms:.0f}ms, audio capté {len(audio) / monitor.sample_rate * 1000:.0f}ms")
+    print(f"   Statut: {monitor.get_status()}")
+    print("\n✅ Test Barge-In Monitor terminé")
+
+if __name__ == "__main__":
+    test_barge_in()
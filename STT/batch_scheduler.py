@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+STT Batch Scheduler - Luxa v1.1
+================================
+
+Micro-batching des transcriptions entre sessions : les énoncés en attente
+sont collectés pendant une courte fenêtre (ou jusqu'à une taille de lot),
+regroupés par classe de durée pour qu'un énoncé court n'attende pas la fin
+du décodage d'un long, puis transcrits en une seule génération. Chaque
+appelant reçoit son propre texte.
+"""
+
+import time
+import bisect
+import asyncio
+import logging
+import contextvars
+import numpy as np
+from typing import Dict, Any, Optional, Callable, List, Sequence
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+class WhisperBatchAdapter:
+    """Expose transcribe_batch pour les modèles chargés par FallbackManager
+
+    openai-whisper : mels de 30s empilés, une seule génération whisper.decode.
+    faster-whisper (pas de génération multi-énoncés) : énoncés décodés l'un
+    après l'autre dans le même travail du pool STT.
+    """
+
+    def __init__(self, model, beam_size: int = 1):
+        self.model = model
+        self.beam_size = beam_size
+
+    def transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        audios = [np.asarray(audio, dtype=np.float32).ravel() for audio in audios]
+        # openai-whisper : le modèle porte ses dimensions (n_mels)
+        if hasattr(self.model, "dims"):
+            import torch
+            import whisper
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), self.model.dims.n_mels)
+                for audio in audios
+            ]).to(self.model.device)
+            options = whisper.DecodingOptions(fp16=self.model.device.type == "cuda", without_timestamps=True)
+            return [result.text.strip() for result in whisper.decode(self.model, mels, options)]
+
+        texts = []
+        for audio in audios:
+            segments, _ = self.model.transcribe(audio, beam_size=self.beam_size)
+            texts.append(" ".join(segment.text for segment in segments))
+        return texts
+
+class STTBatchScheduler:
+    def __init__(self, transcribe_batch: Callable[[List[np.ndarray]], List[str]],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0,
+                 length_buckets_s: Sequence[float] = (2.0, 5.0, 10.0, 30.0),
+                 sample_rate: int = 16000, executor=None, metrics=None):
+        """
+        Args:
+            transcribe_batch: Liste d'audios -> liste de textes (ex: STTHandler.transcribe_batch)
+            max_batch_size: Énoncés par génération
+            max_wait_ms: Attente maximale ajoutée au premier énoncé d'un lot
+            length_buckets_s: Bornes des classes de durée
+            sample_rate: Fréquence d'échantillonnage
+            executor: StageExecutor de l'étage STT (sinon pool par défaut d'asyncio)
+            metrics: EnhancedMetricsCollector optionnel
+        """
+        self.transcribe_batch = transcribe_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.length_buckets_s = sorted(length_buckets_s)
+        self.sample_rate = sample_rate
+        self.executor = executor
+        self.metrics = metrics
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "requests": 0,
+            "batches": 0,
+            "cancelled": 0,
+            "errors": 0,
+            "audio_s_total": 0.0,
+            "decode_s_total": 0.0,
+            "wait_ms_total": 0.0,
+            "max_wait_ms": 0.0,
+            "batch_sizes": {}
+        }
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            # Contexte vierge : la boucle des lots n'hérite pas de la trace du premier appelant
+            self._task = contextvars.Context().run(asyncio.create_task, self._run(), name="stt-batch-scheduler")
+
+    async def stop(self):
+        """Arrête la boucle des lots ; les énoncés encore en file échouent au lieu d'attendre"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Ordonnanceur STT arrêté"))
+
+    async def submit(self, audio: np.ndarray) -> str:
+        """Transcrit un énoncé via le prochain lot ; annulable (timeout de l'appelant)"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        entry = (np.asarray(audio, dtype=np.float32).ravel(), future, time.perf_counter(), get_tracer().current())
+        await self._queue.put(entry)
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # La fenêtre part de l'arrivée du premier énoncé : attente ajoutée bornée
+            deadline = batch[0][2] + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Pendant un décodage, les arrivées s'accumulent pour le lot suivant
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._dispatch(batch)
+
+    def _bucket(self, audio: np.ndarray) -> int:
+        return bisect.bisect_left(self.length_buckets_s, len(audio) / self.sample_rate)
+
+    async def _dispatch(self, batch: list):
+        pending = [entry for entry in batch if not entry[1].cancelled()]
+        self.stats["cancelled"] += len(batch) - len(pending)
+
+        buckets: Dict[int, list] = {}
+        for entry in pending:
+            buckets.setdefault(self._bucket(entry[0]), []).append(entry)
+
+        # Classes courtes d'abord : leur latence est la plus visible
+        for bucket in sorted(buckets):
+            entries = [entry for entry in buckets[bucket] if not entry[1].cancelled()]
+            if entries:
+                await self._decode(entries)
+
+    async def _decode(self, entries: list):
+        started = time.perf_counter()
+        waits = [started - enqueued for _, _, enqueued, _ in entries]
+        audios = [audio for audio, _, _, _ in entries]
+        try:
+            if self.executor is not None:
+                texts = await self.executor.run(lambda cancel: self.transcribe_batch(audios))
+            else:
+                texts = await asyncio.get_running_loop().run_in_executor(None, self.transcribe_batch, audios)
+        except asyncio.CancelledError:
+            # Ordonnanceur arrêté pendant le décodage : le lot n'aura pas de résultat
+            for _, future, _, _ in entries:
+                if not future.done():
+                    future.set_exception(RuntimeError("Ordonnanceur STT arrêté"))
+            raise
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Lot STT ({len(entries)} énoncés) échoué: {e}")
+            for _, future, _, _ in entries:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        decode_s = finished - started
+        audio_s = sum(len(audio) for audio in audios) / self.sample_rate
+        tracer = get_tracer()
+        for (_, future, enqueued, span), text in zip(entries, texts):
+            # Dans la trace de chaque appelant : attente du lot puis décodage partagé
+            tracer.record("stt.batch_wait", enqueued, started, cat="stt", parent=span)
+            tracer.record("stt.batch_decode", started, finished, cat="stt", parent=span,
+                          batch_size=len(entries), batch_audio_s=audio_s)
+            if not future.done():
+                future.set_result(text)
+        self._record(len(entries), waits, decode_s, audio_s)
+
+    def _record(self, batch_size: int, waits: List[float], decode_s: float, audio_s: float):
+        self.stats["requests"] += batch_size
+        self.stats["batches"] += 1
+        self.stats["batch_sizes"][batch_size] = self.stats["batch_sizes"].get(batch_size, 0) + 1
+        self.stats["audio_s_total"] += audio_s
+        self.stats["decode_s_total"] += decode_s
+        self.stats["wait_ms_total"] += sum(waits) * 1000
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], max(waits) * 1000)
+        if self.metrics:
+            self.metrics.record_stt_batch(batch_size, waits, decode_s, audio_s)
+
+    def get_status(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        decode_s = self.stats["decode_s_total"]
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000,
+            "length_buckets_s": self.length_buckets_s,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "avg_batch_size": requests / self.stats["batches"] if self.stats["batches"] else 0.0,
+            "avg_wait_ms": self.stats["wait_ms_total"] / requests if requests else 0.0,
+            "requests_per_decode_s": requests / decode_s if decode_s > 0 else 0.0,
+            "audio_s_per_decode_s": self.stats["audio_s_total"] / decode_s if decode_s > 0 else 0.0,
+            **self.stats
+        }
+
+# Test du micro-batching
+async def test_batch_scheduler():
+    """Test avec un décodeur simulé : coût fixe par génération + coût par énoncé"""
+    print("🧪 TEST STT BATCH SCHEDULER")
+    print("="*30)
+
+    def fake_transcribe_batch(audios):
+        longest = max(len(audio) for audio in audios) / 16000
+        time.sleep(0.040 + 0.004 * len(audios) + 0.002 * longest)
+        return [f"énoncé de {len(audio) / 16000:.1f}s" for audio in audios]
+
+    rng = np.random.default_rng(0)
+    utterances = [np.zeros(int(16000 * d), dtype=np.float32) for d in rng.uniform(0.5, 8.0, 16)]
+
+    # Référence : un décodage par énoncé
+    start = time.perf_counter()
+    for audio in utterances:
+        fake_transcribe_batch([audio])
+    sequential_s = time.perf_counter() - start
+
+    scheduler = STTBatchScheduler(fake_transcribe_batch, max_batch_size=8, max_wait_ms=10)
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(scheduler.submit(audio) for audio in utterances))
+    batched_s = time.perf_counter() - start
+    await scheduler.stop()
+
+    status = scheduler.get_status()
+    print(f"   16 énoncés concurrents: séquentiel {sequential_s * 1000:.0f}ms, par lots {batched_s * 1000:.0f}ms")
+    print(f"   Lots: {status['batch_sizes']}, attente moy. {status['avg_wait_ms']:.1f}ms (max {status['max_wait_ms']:.1f}ms)")
+    print(f"   Débit: {status['requests_per_decode_s']:.0f} énoncés/s de décodage, "
+          f"x{status['audio_s_per_decode_s']:.0f} temps réel")
+    matched = all(text == f"énoncé de {len(audio) / 16000:.1f}s" for text, audio in zip(texts, utterances))
+    print(f"   Chaque appelant reçoit son texte: {matched}")
+    print("\n✅ Test STT Batch Scheduler terminé")
+
+if __name__ == "__main__":
+    asyncio.run(test_batch_scheduler())
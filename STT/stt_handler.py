@@ -18,8 +18,12 @@ class STTHandler:
         self.sample_rate = 16000
         print(f"STT Handler initialisé avec Whisper sur {self.device}")
 
-    def listen_and_transcribe(self, duration=5):
-        """Écoute le microphone pendant une durée donnée et transcrit le son."""
+    def listen_and_transcribe(self, duration=5, on_recording_end=None, prefix_audio=None):
+        """Écoute le microphone pendant une durée donnée et transcrit le son.
+        
+        on_recording_end est appelé dès la fin de l'enregistrement (fin de parole).
+        prefix_audio : début de phrase déjà capté (ex: parole qui a interrompu la réponse).
+        """
         print("🎤 Écoute en cours...")
         audio_data = sd.rec(
             int(duration * self.sample_rate),
@@ -28,14 +32,33 @@ class STTHandler:
             dtype='float32'
         )
         sd.wait()  # Attendre la fin de l'enregistrement
+        if on_recording_end:
+            on_recording_end()
         print("🎤 Enregistrement terminé, transcription en cours...")
+        if prefix_audio is not None and len(prefix_audio):
+            audio_data = np.concatenate([np.asarray(prefix_audio, dtype=np.float32).ravel(), audio_data.ravel()])
+        
+        transcription = self.transcribe(audio_data)
+        
+        print(f"Transcription: '{transcription}'")
+        return transcription
+
+    def transcribe(self, audio):
+        """Transcrit un énoncé (16kHz mono)."""
+        return self.transcribe_batch([audio])[0]
+
+    def transcribe_batch(self, audios):
+        """Transcrit plusieurs énoncés en une seule génération (micro-batching).
         
+        La génération s'arrête quand tous les énoncés sont terminés : les lots
+        regroupent des durées proches (voir STT/batch_scheduler.py).
+        """
         # Préparer l'audio pour Whisper
-        audio_input = audio_data.flatten()
+        audio_inputs = [np.asarray(audio, dtype=np.float32).flatten() for audio in audios]
         
         # Traitement avec Whisper
         input_features = self.processor(
-            audio_input, 
+            audio_inputs, 
             sampling_rate=self.sample_rate, 
             return_tensors="pt"
         ).input_features.to(self.device)
@@ -43,7 +66,4 @@ class STTHandler:
         # Génération du texte
         with torch.no_grad():
             predicted_ids = self.model.generate(input_features)
-            transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
-        
-        print(f"Transcription: '{transcription}'")
-        return transcription 
\ No newline at end of file
+            return self.processor.batch_decode(predicted_ids, skip_special_tokens=True) 
\ No newline at end of file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Utterance Segmenter - Luxa v1.1
+================================
+
+Découpage d'un flux de trames audio en énoncés : la décision parole/silence
+de chaque trame (VAD, ou énergie en l'absence de VAD) alimente une machine à
+états qui émet l'énoncé complet après un silence de fin (endpoint). Un état
+par flux audio ; le VAD lui-même reste partagé.
+"""
+
+import time
+import numpy as np
+from collections import deque
+from typing import Dict, Any, Optional, Callable
+
+class UtteranceSegmenter:
+    def __init__(self, is_speech: Optional[Callable[[np.ndarray], bool]] = None,
+                 sample_rate: int = 16000, endpoint_silence_ms: float = 480,
+                 min_speech_ms: float = 200, max_utterance_s: float = 30.0,
+                 pre_roll_ms: float = 160, energy_threshold: float = 0.01):
+        """
+        Args:
+            is_speech: Décision VAD par trame (None : seuil d'énergie RMS)
+            sample_rate: Fréquence d'échantillonnage
+            endpoint_silence_ms: Silence qui clôt un énoncé
+            min_speech_ms: Énoncés plus courts ignorés (clics, bruits)
+            max_utterance_s: Énoncé émis de force au-delà de cette durée
+            pre_roll_ms: Audio conservé avant le début détecté de la parole
+            energy_threshold: Seuil RMS sans VAD
+        """
+        self.is_speech = is_speech or self._is_speech_energy
+        self.sample_rate = sample_rate
+        self.endpoint_silence_ms = endpoint_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.max_utterance_s = max_utterance_s
+        self.pre_roll_ms = pre_roll_ms
+        self.energy_threshold = energy_threshold
+
+        self._pre_roll = deque()
+        self._pre_roll_ms = 0.0
+        self.last_utterance_started_at = None  # Début de parole du dernier énoncé émis (perf_counter)
+        self.reset()
+
+        self.stats = {"frames": 0, "speech_frames": 0, "utterances": 0, "discarded_short": 0, "forced_cuts": 0}
+
+    def _is_speech_energy(self, frame: np.ndarray) -> bool:
+        return float(np.sqrt(np.mean(frame ** 2))) > self.energy_threshold
+
+    def reset(self):
+        """Oublie l'énoncé en cours (ex: nouvelle session, interruption)"""
+        self.in_speech = False
+        self._frames = []
+        self._speech_ms = 0.0
+        self._silence_ms = 0.0
+        self._total_ms = 0.0
+        self._snapshot_taken = False
+        self.speech_started_at = None
+
+    def process(self, frame: np.ndarray, speech: Optional[bool] = None) -> Optional[np.ndarray]:
+        """
+        Ajoute une trame ; retourne l'énoncé complet à l'endpoint, sinon None
+
+        Args:
+            frame: Trame audio float32 mono
+            speech: Décision VAD déjà calculée (sinon is_speech est appelé)
+        """
+        duration_ms = len(frame) * 1000 / self.sample_rate
+        if speech is None:
+            speech = self.is_speech(frame)
+        self.stats["frames"] += 1
+        self.stats["speech_frames"] += int(speech)
+
+        if not self.in_speech:
+            if not speech:
+                self._push_pre_roll(frame, duration_ms)
+                return None
+            # Début de parole : l'audio de pré-roulage évite de couper l'attaque
+            self.in_speech = True
+            self.speech_started_at = time.perf_counter()
+            self._frames = list(self._pre_roll)
+            self._total_ms = self._pre_roll_ms
+            self._pre_roll.clear()
+            self._pre_roll_ms = 0.0
+
+        self._frames.append(frame)
+        self._total_ms += duration_ms
+        if speech:
+            self._speech_ms += duration_ms
+            self._silence_ms = 0.0
+            self._snapshot_taken = False
+        else:
+            self._silence_ms += duration_ms
+
+        if self._total_ms >= self.max_utterance_s * 1000:
+            self.stats["forced_cuts"] += 1
+            return self._emit()
+        if self._silence_ms >= self.endpoint_silence_ms:
+            return self._emit()
+        return None
+
+    def snapshot(self, min_silence_ms: float) -> Optional[np.ndarray]:
+        """
+        Énoncé en cours pendant le silence final, avant l'endpoint
+
+        Une seule fois par silence : la reprise de la parole en autorise un autre.
+        """
+        if (not self.in_speech or self._snapshot_taken or self._silence_ms < min_silence_ms
+                or self._speech_ms < self.min_speech_ms):
+            return None
+        self._snapshot_taken = True
+        return np.concatenate(self._frames)
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Émet l'énoncé en cours (fin de flux)"""
+        return self._emit() if self.in_speech else None
+
+    def _push_pre_roll(self, frame: np.ndarray, duration_ms: float):
+        self._pre_roll.append(frame)
+        self._pre_roll_ms += duration_ms
+        while self._pre_roll and self._pre_roll_ms - len(self._pre_roll[0]) * 1000 / self.sample_rate >= self.pre_roll_ms:
+            dropped = self._pre_roll.popleft()
+            self._pre_roll_ms -= len(dropped) * 1000 / self.sample_rate
+
+    def _emit(self) -> Optional[np.ndarray]:
+        speech_ms = self._speech_ms
+        started_at = self.speech_started_at
+        utterance = np.concatenate(self._frames) if self._frames else None
+        self.reset()
+
+        if utterance is None or speech_ms < self.min_speech_ms:
+            self.stats["discarded_short"] += 1
+            return None
+        self.stats["utterances"] += 1
+        self.last_utterance_started_at = started_at
+        return utterance
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "in_speech": self.in_speech,
+            "buffered_ms": self._total_ms,
+            "endpoint_silence_ms": self.endpoint_silence_ms,
+            **self.stats
+        }
+
+# Test du segmenteur
+def test_utterance_segmenter():
+    """Test sur un flux synthétique silence / parole / silence"""
+    print("🧪 TEST UTTERANCE SEGMENTER")
+    print("="*30)
+
+    segmenter = UtteranceSegmenter()
+    frame_samples = 2560  # 160ms @ 16kHz
+    silence = np.zeros(frame_samples, dtype=np.float32)
+    speech = (np.random.randn(frame_samples) * 0.2).astype(np.float32)
+
+    stream = [silence] * 3 + [speech] * 8 + [silence] * 4 + [speech] + [silence] * 4
+    for i, frame in enumerate(stream):
+        utterance = segmenter.process(frame)
+        if utterance is not None:
+            print(f"   Énoncé à la trame {i}: {len(utterance) / 16000:.2f}s")
+
+    print(f"\n📊 Statut: {segmenter.get_status()}")
+    print("\n✅ Test Utterance Segmenter terminé")
+
+if __name__ == "__main__":
+    test_utterance_segmenter()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Audio Output Format - Luxa v1.1
+================================
+
+Conversion unique de l'audio TTS vers le format natif du périphérique :
+décodage PCM vectorisé, mixage des canaux et rééchantillonnage polyphase
+en flux (filtre mis en cache, buffers float32 préalloués).
+"""
+
+import math
+import numpy as np
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Tuple
+
+# Échelles de normalisation PCM entier → float32 [-1, 1]
+_PCM_SCALES = {1: 128.0, 2: 32768.0, 3: 8388608.0, 4: 2147483648.0}
+
+def decode_pcm(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """
+    Décode des frames PCM entrelacées en float32 de forme (frames, canaux)
+
+    Supporte 8 bits (non signé), 16, 24 et 32 bits (signés).
+    """
+    if sample_width == 1:
+        audio = np.frombuffer(frames, dtype=np.uint8).astype(np.float32)
+        audio -= 128.0
+    elif sample_width == 2:
+        audio = np.frombuffer(frames, dtype='<i2').astype(np.float32)
+    elif sample_width == 3:
+        # 24 bits : placer les 3 octets dans le poids fort d'un int32 pour garder le signe
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((raw.shape[0], 4), dtype=np.uint8)
+        padded[:, 1:] = raw
+        audio = (padded.view('<i4').ravel() >> 8).astype(np.float32)
+    elif sample_width == 4:
+        audio = np.frombuffer(frames, dtype='<i4').astype(np.float32)
+    else:
+        raise ValueError(f"Largeur d'échantillon non supportée: {sample_width} octet(s)")
+
+    audio *= 1.0 / _PCM_SCALES[sample_width]
+    return audio.reshape(-1, channels)
+
+def query_output_format(device=None, max_channels: int = 2) -> Tuple[int, int]:
+    """Retourne (fréquence native, nombre de canaux) du périphérique de sortie"""
+    import sounddevice as sd
+
+    info = sd.query_devices(device, 'output')
+    sample_rate = int(info['default_samplerate'])
+    channels = max(1, min(int(info['max_output_channels']), max_channels))
+    return sample_rate, channels
+
+def channel_mix_matrix(src_channels: int, dst_channels: int) -> np.ndarray:
+    """Matrice de mixage (src, dst) : duplication mono, moyenne vers mono, sinon identité tronquée"""
+    if src_channels == dst_channels:
+        return np.eye(src_channels, dtype=np.float32)
+    if src_channels == 1:
+        return np.ones((1, dst_channels), dtype=np.float32)
+    if dst_channels == 1:
+        return np.full((src_channels, 1), 1.0 / src_channels, dtype=np.float32)
+    return np.eye(src_channels, dst_channels, dtype=np.float32)
+
+@lru_cache(maxsize=16)
+def design_polyphase_filter(up: int, down: int, taps_per_phase: int = 32) -> np.ndarray:
+    """
+    Banc de filtres polyphase (up, taps_per_phase) pour un rapport up/down
+
+    Filtre passe-bas sinc fenêtré (Kaiser), coupure au plus petit des deux
+    Nyquist. Les coefficients de chaque phase sont inversés pour un produit
+    scalaire direct avec une fenêtre d'entrée chronologique.
+    """
+    num_taps = up * taps_per_phase
+    cutoff = 0.94 / max(up, down)
+    k = np.arange(num_taps) - (num_taps - 1) / 2.0
+    h = cutoff * np.sinc(cutoff * k) * np.kaiser(num_taps, 8.6)
+    h *= up / h.sum()  # gain unitaire après insertion des zéros
+    bank = h.reshape(taps_per_phase, up).T[:, ::-1]
+    return np.ascontiguousarray(bank, dtype=np.float32)
+
+class PolyphaseResampler:
+    def __init__(self, in_rate: int, out_rate: int, channels: int = 1,
+                 max_chunk_frames: int = 4096, taps_per_phase: int = 32):
+        """
+        Rééchantillonneur polyphase en flux : l'état (historique d'entrée, phase)
+        est conservé entre les chunks, la sortie est continue.
+        """
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.channels = channels
+        self.max_chunk_frames = max_chunk_frames
+        self.taps = taps_per_phase
+        self.bank = design_polyphase_filter(self.up, self.down, taps_per_phase)
+
+        # Buffers préalloués
+        self.max_out_frames = (max_chunk_frames * self.up) // self.down + 2
+        self._in_buf = np.zeros((self.taps - 1 + max_chunk_frames, channels), dtype=np.float32)
+        self._win_buf = np.empty((self.max_out_frames, channels, self.taps), dtype=np.float32)
+        self._coef_buf = np.empty((self.max_out_frames, self.taps), dtype=np.float32)
+        self._out_buf = np.empty((self.max_out_frames, channels), dtype=np.float32)
+
+        # Compensation du retard de groupe du filtre (en frames de sortie)
+        self.delay_frames = int(round((self.up * self.taps - 1) / 2.0 / self.down))
+        self.reset()
+
+    def reset(self):
+        """Réinitialise l'état de flux (nouvel énoncé)"""
+        self._in_buf[:self.taps - 1] = 0.0
+        self._consumed = 0       # Frames d'entrée reçues
+        self._produced = 0       # Frames de sortie calculées (retard inclus)
+        self._to_skip = self.delay_frames
+        self._emitted = 0        # Frames de sortie rendues à l'appelant
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Rééchantillonne un chunk (frames, canaux) ; retourne une nouvelle copie"""
+        outputs = []
+        for start in range(0, len(chunk), self.max_chunk_frames):
+            out = self._process_block(chunk[start:start + self.max_chunk_frames])
+            if len(out):
+                outputs.append(out.copy())
+        if not outputs:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+    def flush(self) -> np.ndarray:
+        """Vide l'historique du filtre (fin d'énoncé)"""
+        remaining = -(-self._consumed * self.up // self.down) - self._emitted
+        tail = np.zeros((self.taps + self.delay_frames * self.down // self.up + 1, self.channels), dtype=np.float32)
+        out = self.process(tail)[:max(0, remaining)]
+        self.reset()
+        return out
+
+    def _process_block(self, block: np.ndarray) -> np.ndarray:
+        n_in = len(block)
+        history = self.taps - 1
+        buf = self._in_buf[:history + n_in]
+        buf[history:] = block
+
+        # Sorties n telles que l'entrée floor(n*down/up) est disponible
+        first_in = self._consumed - history      # Index global de buf[0]
+        last_in = self._consumed + n_in - 1
+        n_start = self._produced
+        n_end = ((last_in + 1) * self.up - 1) // self.down + 1
+        n_out = max(0, n_end - n_start)
+
+        if n_out:
+            positions = np.arange(n_start, n_end, dtype=np.int64) * self.down
+            phases = positions % self.up
+            window_starts = positions // self.up - first_in - history
+
+            windows = sliding_window_view(buf, self.taps, axis=0)
+            win = self._win_buf[:n_out]
+            coef = self._coef_buf[:n_out]
+            out = self._out_buf[:n_out]
+            np.take(windows, window_starts, axis=0, out=win)
+            np.take(self.bank, phases, axis=0, out=coef)
+            np.einsum('nct,nt->nc', win, coef, out=out)
+        else:
+            out = self._out_buf[:0]
+
+        # Conserver l'historique pour le chunk suivant
+        self._in_buf[:history] = buf[n_in:n_in + history]
+        self._consumed += n_in
+        self._produced = max(n_start, n_end)
+
+        if self._to_skip:
+            skip = min(self._to_skip, len(out))
+            self._to_skip -= skip
+            out = out[skip:]
+        self._emitted += len(out)
+        return out
+
+class OutputFormatConverter:
+    def __init__(self, src_rate: int, src_channels: int, dst_rate: int, dst_channels: int,
+                 max_chunk_frames: int = 4096):
+        """
+        Convertit l'audio source (modèle TTS) vers le format du périphérique,
+        chunk par chunk, en une seule passe.
+        """
+        self.src_rate = src_rate
+        self.src_channels = src_channels
+        self.dst_rate = dst_rate
+        self.dst_channels = dst_channels
+        self.mix = channel_mix_matrix(src_channels, dst_channels)
+        self.needs_mix = src_channels != dst_channels
+
+        # Rééchantillonner sur le plus petit nombre de canaux
+        self.mix_first = dst_channels < src_channels
+        resample_channels = dst_channels if self.mix_first else src_channels
+        self.resampler = None
+        if src_rate != dst_rate:
+            self.resampler = PolyphaseResampler(src_rate, dst_rate, resample_channels, max_chunk_frames)
+
+    def convert(self, chunk: np.ndarray) -> np.ndarray:
+        """Convertit un chunk (frames,) ou (frames, canaux) vers le format de sortie"""
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.ndim == 1:
+            chunk = chunk.reshape(-1, 1)
+
+        if self.needs_mix and self.mix_first:
+            chunk = chunk @ self.mix
+        if self.resampler is not None:
+            chunk = self.resampler.process(chunk)
+        if self.needs_mix and not self.mix_first:
+            chunk = chunk @ self.mix
+        return np.ascontiguousarray(chunk, dtype=np.float32)
+
+    def flush(self) -> np.ndarray:
+        """Fin d'énoncé : vide l'état du rééchantillonneur"""
+        if self.resampler is None:
+            return np.zeros((0, self.dst_channels), dtype=np.float32)
+        tail = self.resampler.flush()
+        if self.needs_mix and not self.mix_first:
+            tail = tail @ self.mix
+        return np.ascontiguousarray(tail, dtype=np.float32)
+
+    def reset(self):
+        if self.resampler is not None:
+            self.resampler.reset()
+
+# Test du convertisseur
+def test_audio_format():
+    """Test de la conversion de format"""
+    import time
+
+    print("🧪 TEST AUDIO OUTPUT FORMAT")
+    print("="*35)
+
+    src_rate, dst_rate = 22050, 48000
+    t = np.arange(src_rate) / src_rate
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    print("\n🎯 Test 1: Conversion en une fois vs chunk par chunk")
+    whole = OutputFormatConverter(src_rate, 1, dst_rate, 2)
+    ref = np.concatenate([whole.convert(tone), whole.flush()])
+
+    streamed = OutputFormatConverter(src_rate, 1, dst_rate, 2)
+    parts = [streamed.convert(tone[i:i + 1000]) for i in range(0, len(tone), 1000)]
+    out = np.concatenate(parts + [streamed.flush()])
+    print(f"Frames: {len(ref)} vs {len(out)}, écart max: {np.abs(ref - out).max():.2e}")
+
+    print("\n🎯 Test 2: Performance")
+    start = time.perf_counter()
+    for _ in range(10):
+        streamed.convert(tone)
+    elapsed_ms = (time.perf_counter() - start) * 100
+    print(f"1s d'audio converti en {elapsed_ms:.2f}ms")
+
+    print("\n✅ Test Audio Output Format terminé")
+
+if __name__ == "__main__":
+    test_audio_format()
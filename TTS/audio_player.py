@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Async Audio Player - Luxa v1.1
+===============================
+
+Moteur de lecture audio non bloquant : file audio bornée, flux de sortie
+piloté par callback et annulation immédiate (barge-in).
+"""
+
+import queue
+import threading
+import time
+import asyncio
+import logging
+import numpy as np
+import sounddevice as sd
+from typing import Dict, Any, Optional
+
+from TTS.audio_format import OutputFormatConverter, query_output_format
+
+logger = logging.getLogger(__name__)
+
+class AsyncAudioPlayer:
+    def __init__(self, sample_rate: Optional[int] = None, channels: Optional[int] = None,
+                 blocksize: int = 512, max_queue_chunks: int = 32,
+                 device: Optional[Any] = None):
+        """
+        Args:
+            sample_rate: Fréquence du flux de sortie (None = fréquence native du périphérique)
+            channels: Nombre de canaux du flux de sortie (None = disposition native)
+            blocksize: Taille des blocs demandés par le callback (latence d'annulation)
+            max_queue_chunks: Nombre maximum de segments audio en attente
+            device: Périphérique de sortie sounddevice (None = défaut)
+        """
+        self.blocksize = blocksize
+        self.device = device
+        self.sample_rate, self.channels = self._resolve_output_format(sample_rate, channels)
+
+        # Conversion vers le format du flux, conservée entre segments d'un même énoncé
+        self._converter = None
+
+        # File bornée : (génération, audio float32, final)
+        self._queue = queue.Queue(maxsize=max_queue_chunks)
+        self._stream = None
+        self._lock = threading.Lock()
+
+        # Segment en cours de lecture
+        self._current = None
+        self._current_generation = 0
+        self._current_final = True
+        self._offset = 0
+
+        # Chaque annulation incrémente la génération : tout segment plus ancien est ignoré
+        self._generation = 0
+        self._queued_frames = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._on_playback_start = None
+        self._started_at = None
+        self._cancel_requested_at = None
+
+        self.stats = {
+            "chunks_played": 0,
+            "frames_played": 0,
+            "underruns": 0,
+            "cancellations": 0,
+            "max_queue_depth": 0,
+            "last_cancel_latency_ms": 0.0
+        }
+
+    def _resolve_output_format(self, sample_rate, channels):
+        """Format natif du périphérique : le son n'est converti qu'une fois, par nous"""
+        if sample_rate is not None and channels is not None:
+            return sample_rate, channels
+        try:
+            native_rate, native_channels = query_output_format(self.device)
+        except Exception as e:
+            logger.warning(f"⚠️ Format natif du périphérique inconnu ({e}), 22050Hz mono")
+            native_rate, native_channels = 22050, 1
+        return sample_rate or native_rate, channels or native_channels
+
+    def start(self):
+        """Ouvre le flux de sortie (reste ouvert et joue du silence au repos)"""
+        if self._stream is not None:
+            return
+
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype='float32',
+            blocksize=self.blocksize,
+            device=self.device,
+            callback=self._callback
+        )
+        self._stream.start()
+        logger.info(f"🔈 Flux de sortie ouvert ({self.sample_rate}Hz, {self.channels} canal/canaux, bloc {self.blocksize})")
+
+    def close(self):
+        """Arrête et ferme le flux de sortie"""
+        self.cancel()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            finally:
+                self._stream = None
+
+    def set_playback_start_callback(self, callback):
+        """Callback appelé (thread audio) au premier échantillon audible d'un segment"""
+        self._on_playback_start = callback
+
+    def play(self, audio: np.ndarray, final: bool = True, timeout: Optional[float] = None,
+             sample_rate: Optional[int] = None) -> bool:
+        """
+        Met un segment audio en file sans attendre la fin de la lecture
+
+        Args:
+            audio: Échantillons float32 (frames,) ou (frames, canaux)
+            final: False si d'autres segments du même énoncé vont suivre (streaming)
+            timeout: Attente maximale si la file est pleine (None = attente illimitée)
+            sample_rate: Fréquence de l'audio source (None = fréquence du flux)
+
+        Returns:
+            True si le segment a été mis en file, False si annulé ou file pleine
+        """
+        if audio is None or len(audio) == 0:
+            return False
+
+        self.start()
+        generation = self._generation
+        audio = self._convert(audio, sample_rate or self.sample_rate, final)
+        if len(audio) == 0:
+            return True
+
+        with self._lock:
+            self._queued_frames += len(audio)
+            self._idle.clear()
+
+        try:
+            self._queue.put((generation, audio, final), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._queued_frames -= len(audio)
+                self._update_idle()
+            logger.warning("⚠️ File audio pleine, segment ignoré")
+            return False
+
+        # Une annulation a pu survenir pendant l'attente
+        if generation != self._generation:
+            return False
+
+        depth = self._queue.qsize()
+        if depth > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = depth
+        return True
+
+    def cancel(self) -> int:
+        """
+        Interrompt immédiatement la lecture et vide la file
+
+        Returns:
+            Nombre de frames abandonnées
+        """
+        self._generation += 1
+        self._cancel_requested_at = time.perf_counter()
+        self._converter = None
+        dropped = 0
+
+        # Vider la file côté producteur pour libérer la place immédiatement
+        while True:
+            try:
+                _, audio, _ = self._queue.get_nowait()
+                dropped += len(audio)
+            except queue.Empty:
+                break
+
+        with self._lock:
+            if self._current is not None:
+                dropped += len(self._current) - self._offset
+            self._queued_frames = max(0, self._queued_frames - dropped)
+
+        if dropped:
+            self.stats["cancellations"] += 1
+
+        # Sans flux actif, personne ne finalisera l'annulation
+        if self._stream is None:
+            with self._lock:
+                self._current = None
+                self._offset = 0
+                self._queued_frames = 0
+                self._update_idle()
+
+        return dropped
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Attend la fin de la lecture de tous les segments en file"""
+        return self._idle.wait(timeout)
+
+    async def wait_async(self, poll_interval: float = 0.01):
+        """Variante asyncio de wait() qui ne bloque pas la boucle d'événements"""
+        while not self._idle.is_set():
+            await asyncio.sleep(poll_interval)
+
+    @property
+    def is_playing(self) -> bool:
+        return not self._idle.is_set()
+
+    def get_queue_depth(self) -> Dict[str, Any]:
+        """Profondeur de file en segments et en millisecondes d'audio"""
+        return {
+            "chunks": self._queue.qsize(),
+            "frames": self._queued_frames,
+            "ms": self._queued_frames / self.sample_rate * 1000
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """Retourne le statut du moteur de lecture"""
+        return {
+            "stream_open": self._stream is not None,
+            "playing": self.is_playing,
+            "sample_rate": self.sample_rate,
+            "channels": self.channels,
+            "blocksize": self.blocksize,
+            "queue": self.get_queue_depth(),
+            **self.stats
+        }
+
+    def _convert(self, audio: np.ndarray, sample_rate: int, final: bool) -> np.ndarray:
+        """Convertit un segment vers la fréquence et la disposition du flux"""
+        audio = np.asarray(audio, dtype=np.float32)
+        src_channels = 1 if audio.ndim == 1 else audio.shape[1]
+
+        converter = self._converter
+        if converter is None or converter.src_rate != sample_rate or converter.src_channels != src_channels:
+            converter = OutputFormatConverter(sample_rate, src_channels, self.sample_rate, self.channels,
+                                              max_chunk_frames=self.blocksize * 8)
+            self._converter = converter
+
+        out = converter.convert(audio)
+        if final:
+            # Fin d'énoncé : vider l'état du filtre
+            tail = converter.flush()
+            if len(tail):
+                out = np.concatenate([out, tail])
+        return out
+
+    def _update_idle(self):
+        """À appeler sous verrou"""
+        if self._current is None and self._queued_frames <= 0 and self._queue.empty():
+            self._idle.set()
+
+    def _callback(self, outdata, frames, time_info, status):
+        """Callback PortAudio : remplit le bloc de sortie depuis la file"""
+        if status.output_underflow:
+            self.stats["underruns"] += 1
+
+        written = 0
+        generation = self._generation
+
+        with self._lock:
+            # Annulation : abandonner le segment courant
+            if self._cancel_requested_at is not None or (
+                    self._current is not None and self._current_generation != generation):
+                self._current = None
+                self._offset = 0
+                self._finish_cancel()
+
+            while written < frames:
+                if self._current is None:
+                    try:
+                        item_generation, audio, final = self._queue.get_nowait()
+                    except queue.Empty:
+                        # File vide alors que l'énoncé n'est pas terminé : famine
+                        if not self._current_final:
+                            self.stats["underruns"] += 1
+                            self._current_final = True
+                        break
+
+                    if item_generation != generation:
+                        # Segment mis en file pendant une annulation
+                        self._queued_frames -= len(audio)
+                        continue
+
+                    self._current = audio
+                    self._current_generation = item_generation
+                    self._current_final = final
+                    self._offset = 0
+
+                    if self._started_at is None:
+                        self._started_at = time.perf_counter()
+                        if self._on_playback_start:
+                            try:
+                                self._on_playback_start()
+                            except Exception as e:
+                                logger.warning(f"⚠️ Erreur callback début lecture: {e}")
+
+                n = min(frames - written, len(self._current) - self._offset)
+                outdata[written:written + n] = self._current[self._offset:self._offset + n]
+                written += n
+                self._offset += n
+                self._queued_frames -= n
+                self.stats["frames_played"] += n
+
+                if self._offset >= len(self._current):
+                    self._current = None
+                    self._offset = 0
+                    self.stats["chunks_played"] += 1
+
+            if written < frames:
+                outdata[written:] = 0
+
+            if self._current is None and self._queue.empty():
+                self._queued_frames = max(0, self._queued_frames)
+                if self._current_final:
+                    self._started_at = None
+                self._update_idle()
+
+    def _finish_cancel(self):
+        """Enregistre la latence entre cancel() et l'arrêt effectif du son"""
+        if self._cancel_requested_at is not None:
+            latency_ms = (time.perf_counter() - self._cancel_requested_at) * 1000
+            self.stats["last_cancel_latency_ms"] = latency_ms
+            self._cancel_requested_at = None
+        self._current_final = True
+        self._started_at = None
+
+# Test du lecteur audio
+def test_audio_player():
+    """Test du lecteur audio asynchrone"""
+    print("🧪 TEST ASYNC AUDIO PLAYER")
+    print("="*35)
+
+    player = AsyncAudioPlayer(sample_rate=22050)
+    t = np.arange(22050 * 2) / 22050
+    tone = (0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    print("\n🎯 Test 1: Lecture non bloquante")
+    start = time.perf_counter()
+    player.play(tone)
+    print(f"play() rendu en {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    print("\n🎯 Test 2: Annulation après 500ms")
+    time.sleep(0.5)
+    dropped = player.cancel()
+    player.wait(timeout=1.0)
+    print(f"Frames abandonnées: {dropped}")
+
+    print("\n🎯 Test 3: Statut")
+    print(f"Statut: {player.get_status()}")
+
+    player.close()
+    print("\n✅ Test Async Audio Player terminé")
+
+if __name__ == "__main__":
+    test_audio_player()
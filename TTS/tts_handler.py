@@ -5,12 +5,17 @@ Solution de contournement pour éviter les problèmes avec piper-phonemize
 """
 
 import json
+import shutil
 import subprocess
 import tempfile
+import time
+import uuid
 import wave
 from pathlib import Path
 import numpy as np
-import sounddevice as sd
+
+from TTS.audio_player import AsyncAudioPlayer
+from TTS.audio_format import decode_pcm
 
 class TTSHandler:
     def __init__(self, config):
@@ -18,6 +23,21 @@ class TTSHandler:
         self.speaker_map = {}
         self.piper_executable = None
         
+        # Fréquence native du modèle Piper (source de la conversion de sortie)
+        self.sample_rate = config.get('sample_rate', 22050)
+        
+        # Lecture asynchrone au format natif du périphérique (None = détection)
+        self.player = AsyncAudioPlayer(
+            sample_rate=config.get('output_sample_rate'),
+            max_queue_chunks=config.get('playback_queue_chunks', 32)
+        )
+        
+        # Nombre de workers du pool multi-sessions (0 = selon les CPU)
+        self.pool_workers = config.get('pool_workers', 0)
+        
+        # Instrumentation par tour (optionnelle)
+        self.turn_tracker = None
+        
         print("🔊 Initialisation du moteur TTS Piper (avec gestion multi-locuteurs)...")
         
         model_p = Path(self.model_path)
@@ -96,8 +116,34 @@ class TTSHandler:
         except Exception as e:
             print(f"⚠️ Erreur lors de la lecture des locuteurs : {e}")
 
-    def speak(self, text: str):
-        """Synthétise le texte en parole en utilisant l'exécutable piper avec gestion des locuteurs."""
+    def _get_speaker_id(self) -> int:
+        """Détermine le speaker_id à utiliser."""
+        # Pour ce MVP, nous utiliserons l'ID 0 par défaut
+        if self.speaker_map:
+            # Si nous avons une carte des locuteurs, utiliser le premier disponible
+            return next(iter(self.speaker_map.values()))
+        return 0
+
+    def create_worker_pool(self, num_workers=None):
+        """Crée un pool de workers Piper persistants partageant ce modèle."""
+        from TTS.tts_pool import TTSWorkerPool
+        
+        pool = TTSWorkerPool(self, num_workers=num_workers or self.pool_workers or None)
+        pool.start()
+        return pool
+
+    def attach_turn_tracker(self, turn_tracker):
+        """Horodate le premier chunk synthétisé et le début de lecture du tour courant."""
+        self.turn_tracker = turn_tracker
+        self.player.set_playback_start_callback(lambda: turn_tracker.mark("playback_start"))
+
+    def speak(self, text: str, blocking: bool = True, stop_event=None):
+        """Synthétise le texte en parole en utilisant l'exécutable piper avec gestion des locuteurs.
+        
+        Avec blocking=False, rend la main dès que l'audio est en file de lecture.
+        stop_event (threading.Event) interrompt la synthèse en cours (barge-in) :
+        piper est arrêté et rien n'est joué.
+        """
         if not text:
             print("⚠️ Texte vide, aucune synthèse à faire.")
             return
@@ -106,12 +152,8 @@ class TTSHandler:
             print("❌ Exécutable Piper non disponible")
             return
 
-        # Déterminer le speaker_id à utiliser
-        # Pour ce MVP, nous utiliserons l'ID 0 par défaut
-        speaker_id = 0
+        speaker_id = self._get_speaker_id()
         if self.speaker_map:
-            # Si nous avons une carte des locuteurs, utiliser le premier disponible
-            speaker_id = next(iter(self.speaker_map.values()))
             print(f"🎭 Utilisation du locuteur avec l'ID : {speaker_id}")
         else:
             print("🎭 Utilisation du locuteur par défaut (ID: 0)")
@@ -132,18 +174,17 @@ class TTSHandler:
             ]
             
             # Exécuter piper avec le texte en entrée
-            result = subprocess.run(
-                cmd,
-                input=text,
-                text=True,
-                capture_output=True,
-                timeout=30
-            )
+            result = self._run_piper(cmd, text, timeout=30, stop_event=stop_event)
+            if result is None or (stop_event is not None and stop_event.is_set()):
+                print("⏹️ Synthèse Piper interrompue")
+                return
             
             if result.returncode == 0:
                 # Lire et jouer le fichier généré
                 if Path(tmp_path).exists():
-                    self._play_wav_file(tmp_path)
+                    if self.turn_tracker:
+                        self.turn_tracker.mark("tts_first_chunk")
+                    self._play_wav_file(tmp_path, blocking=blocking)
                     print("✅ Synthèse Piper terminée avec succès.")
                 else:
                     print("❌ Fichier de sortie non généré")
@@ -166,33 +207,165 @@ class TTSHandler:
             except:
                 pass
 
-    def _play_wav_file(self, file_path):
-        """Joue un fichier WAV."""
+    def _run_piper(self, cmd, text, timeout, stop_event=None, poll_interval=0.02):
+        """Exécute piper ; None si stop_event est levé avant la fin (processus tué)."""
+        if stop_event is None:
+            return subprocess.run(cmd, input=text, text=True, capture_output=True, timeout=timeout)
+        if stop_event.is_set():
+            return None
+
+        deadline = time.perf_counter() + timeout
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True)
+        pending_input = text
+        while True:
+            try:
+                stdout, stderr = process.communicate(input=pending_input, timeout=poll_interval)
+                return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+            except subprocess.TimeoutExpired:
+                # L'entrée n'est transmise qu'au premier appel
+                pending_input = None
+                if stop_event.is_set() or time.perf_counter() > deadline:
+                    process.kill()
+                    process.communicate()
+                    if stop_event.is_set():
+                        return None
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+
+    def synthesize_many(self, texts, output_dir=None, timeout=None, names=None):
+        """Synthétise une liste de phrases en une seule exécution de Piper.
+        
+        Le modèle n'est chargé qu'une fois : chaque phrase est envoyée comme une
+        ligne JSON (--json-input) avec son propre fichier de sortie, ce qui permet
+        de récupérer l'audio phrase par phrase.
+        
+        Args:
+            texts: Liste de phrases à synthétiser
+            output_dir: Répertoire où conserver les WAV (ex: annonces pré-générées),
+                        sinon fichiers temporaires supprimés après lecture
+            timeout: Timeout global (défaut: 30s + 5s par phrase)
+            names: Noms des fichiers (sans extension), un par phrase ; par défaut
+                   un préfixe propre à l'appel, pour ne pas écraser un lot précédent
+            
+        Returns:
+            Liste de (audio float32, sample_rate), dans l'ordre des phrases
+            (tableau vide pour une phrase vide)
+        """
+        if not texts:
+            return []
+        if names is not None and len(names) != len(texts):
+            raise ValueError(f"{len(names)} noms pour {len(texts)} phrases")
+
+        empty = np.zeros(0, dtype=np.float32)
+        spoken = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not spoken:
+            # Rien à dire : Piper n'est pas lancé pour rien
+            return [(empty, self.sample_rate) for _ in texts]
+
+        if not self.piper_executable:
+            raise RuntimeError("Exécutable Piper non disponible")
+
+        speaker_id = self._get_speaker_id()
+        keep_files = output_dir is not None
+        work_dir = Path(output_dir) if keep_files else Path(tempfile.mkdtemp(prefix="luxa_piper_batch_"))
+        work_dir.mkdir(parents=True, exist_ok=True)
+        prefix = time.strftime("%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+
+        # Une ligne JSON par phrase non vide, chacune vers son propre fichier
+        output_files = {}
+        lines = []
+        for i in spoken:
+            text = texts[i]
+            stem = names[i] if names is not None else f"{prefix}_{i:04d}"
+            output_files[i] = str(work_dir / f"{stem}.wav")
+            lines.append(json.dumps(
+                {"text": text, "speaker_id": speaker_id, "output_file": output_files[i]},
+                ensure_ascii=False
+            ))
+
+        cmd = [
+            self.piper_executable,
+            "--model", str(self.model_path),
+            "--json-input",
+            "--output_dir", str(work_dir)
+        ]
+
+        print(f"🎵 Synthèse Piper groupée : {len(lines)} phrase(s) en une exécution")
+        start_time = time.perf_counter()
+
         try:
-            with wave.open(file_path, 'rb') as wav_file:
-                frames = wav_file.readframes(-1)
-                sample_rate = wav_file.getframerate()
-                channels = wav_file.getnchannels()
-                sample_width = wav_file.getsampwidth()
-                
-                # Convertir en numpy array
-                if sample_width == 1:
-                    audio_data = np.frombuffer(frames, dtype=np.uint8)
-                    audio_data = (audio_data.astype(np.float32) - 128) / 128.0
-                elif sample_width == 2:
-                    audio_data = np.frombuffer(frames, dtype=np.int16)
-                    audio_data = audio_data.astype(np.float32) / 32767.0
-                else:
-                    audio_data = np.frombuffer(frames, dtype=np.int32)
-                    audio_data = audio_data.astype(np.float32) / 2147483647.0
-                
-                # Gérer stéréo → mono
-                if channels == 2:
-                    audio_data = audio_data.reshape(-1, 2).mean(axis=1)
-                
-                # Jouer l'audio
-                sd.play(audio_data, samplerate=sample_rate)
-                sd.wait()
+            result = subprocess.run(
+                cmd,
+                input="\n".join(lines) + "\n",
+                text=True,
+                encoding="utf-8",
+                capture_output=True,
+                timeout=timeout or 30 + 5 * len(lines)
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"Erreur piper (code {result.returncode}): {result.stderr}")
+
+            audios = []
+            for i in range(len(texts)):
+                if i not in output_files:
+                    audios.append((empty, self.sample_rate))
+                    continue
+                if not Path(output_files[i]).exists():
+                    raise RuntimeError(f"Fichier de sortie non généré pour la phrase {i}")
+                audios.append(self._read_wav_file(output_files[i]))
+
+            elapsed = time.perf_counter() - start_time
+            total_audio_s = sum(len(audio) / sr for audio, sr in audios if sr)
+            print(f"✅ {len(lines)} phrase(s) synthétisée(s) en {elapsed:.2f}s ({total_audio_s:.1f}s d'audio)")
+            return audios
+
+        finally:
+            if not keep_files:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _read_wav_file(self, file_path):
+        """Lit un fichier WAV et retourne (audio float32, sample_rate).
+        
+        L'audio est de forme (frames,) en mono, (frames, canaux) sinon.
+        """
+        with wave.open(file_path, 'rb') as wav_file:
+            frames = wav_file.readframes(-1)
+            sample_rate = wav_file.getframerate()
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            
+        audio_data = decode_pcm(frames, sample_width, channels)
+        if channels == 1:
+            audio_data = audio_data.reshape(-1)
+            
+        return audio_data, sample_rate
+
+    def _play_wav_file(self, file_path, blocking: bool = True):
+        """Joue un fichier WAV via le lecteur asynchrone."""
+        try:
+            audio_data, sample_rate = self._read_wav_file(file_path)
+            
+            # Conversion unique vers le format du périphérique, puis lecture
+            # sans bloquer la boucle de l'assistant
+            self.player.play(audio_data, sample_rate=sample_rate)
+            if blocking:
+                self.player.wait()
                 
         except Exception as e:
-            print(f"❌ Erreur lecture WAV: {e}") 
\ No newline at end of file
+            print(f"❌ Erreur lecture WAV: {e}")
+
+    def stop_playback(self) -> int:
+        """Interrompt immédiatement la lecture en cours (barge-in)."""
+        return self.player.cancel()
+
+    def wait_playback(self, timeout=None) -> bool:
+        """Attend la fin de la lecture en cours."""
+        return self.player.wait(timeout)
+
+    @property
+    def is_playing(self) -> bool:
+        return self.player.is_playing
+
+    def get_playback_status(self):
+        """Statut du moteur de lecture (profondeur de file, underruns...)."""
+        return self.player.get_status()
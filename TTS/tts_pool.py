@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+TTS Worker Pool - Luxa v1.1
+============================
+
+Pool de workers Piper persistants pour la synthèse multi-sessions :
+file équitable entre sessions, échéances et utilisation par worker.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+def default_worker_count() -> int:
+    """Nombre de workers par défaut : un par paire de cœurs, plafonné à 4"""
+    cpu_count = os.cpu_count() or 1
+    return max(1, min(4, cpu_count // 2))
+
+class _TTSRequest:
+    def __init__(self, text: str, session_id: str, deadline: Optional[float]):
+        self.text = text
+        self.session_id = session_id
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.future = Future()
+
+class PiperWorker:
+    """Processus Piper persistant alimenté en JSON ligne par ligne"""
+
+    def __init__(self, worker_id: int, piper_executable: str, model_path: str):
+        self.worker_id = worker_id
+        self.piper_executable = piper_executable
+        self.model_path = model_path
+        self.process = None
+        self.output_dir = tempfile.mkdtemp(prefix=f"luxa_piper_{worker_id}_")
+        self._stdout_lines = queue.Queue()
+        self._reader = None
+
+        # Statistiques d'utilisation
+        self.started_at = time.monotonic()
+        self.busy_time_s = 0.0
+        self.requests_done = 0
+        self.restarts = 0
+
+    def start(self):
+        """Démarre le processus Piper en mode --json-input"""
+        cmd = [
+            self.piper_executable,
+            "--model", str(self.model_path),
+            "--json-input",
+            "--output_dir", self.output_dir
+        ]
+        self.process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1
+        )
+        # Lecture de stdout dans un thread : readline() avec timeout portable (Windows)
+        self._stdout_lines = queue.Queue()
+        self._reader = threading.Thread(target=self._read_stdout, args=(self.process, self._stdout_lines), daemon=True)
+        self._reader.start()
+
+    def _read_stdout(self, process, lines: queue.Queue):
+        for line in process.stdout:
+            lines.put(line.strip())
+        lines.put(None)  # Fin de flux : processus terminé
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def restart(self):
+        """Relance le processus après un crash ou un timeout"""
+        self.stop()
+        self.restarts += 1
+        self.start()
+        logger.warning(f"🔄 Worker Piper {self.worker_id} relancé ({self.restarts} redémarrage(s))")
+
+    def synthesize(self, text: str, speaker_id: int, timeout: float = 30.0) -> str:
+        """Synthétise une ligne et retourne le chemin du WAV produit"""
+        if not self.is_alive():
+            self.restart()
+
+        output_file = str(Path(self.output_dir) / f"{uuid.uuid4().hex}.wav")
+        line = json.dumps({"text": text, "speaker_id": speaker_id, "output_file": output_file}, ensure_ascii=False)
+
+        start = time.monotonic()
+        try:
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+
+            # Piper écrit le chemin du fichier généré sur stdout
+            produced = self._stdout_lines.get(timeout=timeout)
+            if produced is None:
+                raise RuntimeError(f"Worker Piper {self.worker_id} terminé (code {self.process.poll()})")
+            return produced or output_file
+
+        except queue.Empty:
+            self.restart()
+            raise TimeoutError(f"Timeout synthèse worker {self.worker_id} ({timeout}s)")
+        finally:
+            self.busy_time_s += time.monotonic() - start
+            self.requests_done += 1
+
+    def utilization(self) -> float:
+        """Fraction du temps passé à synthétiser depuis le démarrage"""
+        elapsed = time.monotonic() - self.started_at
+        return self.busy_time_s / elapsed if elapsed > 0 else 0.0
+
+    def stop(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=2)
+            except Exception:
+                self.process.kill()
+            self.process = None
+
+    def cleanup(self):
+        self.stop()
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+class TTSWorkerPool:
+    def __init__(self, tts_handler, num_workers: Optional[int] = None,
+                 max_pending: int = 64, request_timeout_s: float = 30.0):
+        """
+        Args:
+            tts_handler: TTSHandler initialisé (exécutable, modèle, locuteur)
+            num_workers: Nombre de processus Piper (None = selon les CPU)
+            max_pending: Nombre maximum de requêtes en attente, toutes sessions
+            request_timeout_s: Timeout d'une synthèse individuelle
+        """
+        self.tts_handler = tts_handler
+        self.num_workers = num_workers or default_worker_count()
+        self.max_pending = max_pending
+        self.request_timeout_s = request_timeout_s
+
+        # Une file par session, servie en round-robin
+        self._sessions: "OrderedDict[str, deque]" = OrderedDict()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._running = False
+
+        self.workers = []
+        self._threads = []
+
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "dropped_deadline": 0,
+            "rejected_full": 0,
+            "errors": 0,
+            "total_queue_wait_s": 0.0
+        }
+
+        print(f"🔊 TTS Worker Pool: {self.num_workers} worker(s) Piper")
+
+    def start(self):
+        """Démarre les processus Piper et leurs threads de service"""
+        if self._running:
+            return
+
+        self._running = True
+        for worker_id in range(self.num_workers):
+            worker = PiperWorker(worker_id, self.tts_handler.piper_executable, self.tts_handler.model_path)
+            worker.start()
+            self.workers.append(worker)
+
+            thread = threading.Thread(target=self._worker_loop, args=(worker,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        print(f"✅ {self.num_workers} worker(s) Piper démarré(s)")
+
+    def shutdown(self):
+        """Arrête le pool et annule les requêtes en attente"""
+        with self._condition:
+            self._running = False
+            for requests in self._sessions.values():
+                for request in requests:
+                    request.future.cancel()
+            self._sessions.clear()
+            self._pending = 0
+            self._condition.notify_all()
+
+        for thread in self._threads:
+            thread.join(timeout=5)
+        for worker in self.workers:
+            worker.cleanup()
+
+        self.workers.clear()
+        self._threads.clear()
+        print("🛑 TTS Worker Pool arrêté")
+
+    def submit(self, text: str, session_id: str = "default", deadline_s: Optional[float] = None) -> Future:
+        """
+        Met une synthèse en file pour une session
+
+        Args:
+            text: Texte à synthétiser
+            session_id: Identifiant de session (équité entre sessions)
+            deadline_s: Délai maximal avant que la réponse soit considérée périmée
+
+        Returns:
+            Future résolue en (audio float32, sample_rate)
+        """
+        deadline = time.monotonic() + deadline_s if deadline_s is not None else None
+        request = _TTSRequest(text, session_id, deadline)
+
+        with self._condition:
+            if not self._running:
+                request.future.set_exception(RuntimeError("TTS Worker Pool non démarré"))
+                return request.future
+
+            if self._pending >= self.max_pending:
+                self.stats["rejected_full"] += 1
+                request.future.set_exception(queue.Full(f"File TTS pleine ({self.max_pending})"))
+                return request.future
+
+            self._sessions.setdefault(session_id, deque()).append(request)
+            self._pending += 1
+            self.stats["submitted"] += 1
+            self._condition.notify()
+
+        return request.future
+
+    def synthesize(self, text: str, session_id: str = "default", deadline_s: Optional[float] = None):
+        """Variante bloquante de submit()"""
+        return self.submit(text, session_id, deadline_s).result()
+
+    def _next_request(self) -> Optional[_TTSRequest]:
+        """Round-robin entre sessions (à appeler sous verrou)"""
+        while self._sessions:
+            session_id, requests = next(iter(self._sessions.items()))
+            request = requests.popleft()
+            self._pending -= 1
+
+            if requests:
+                self._sessions.move_to_end(session_id)
+            else:
+                del self._sessions[session_id]
+
+            # Réponse périmée : inutile de la synthétiser (sauf si l'appelant a déjà annulé)
+            if request.deadline is not None and time.monotonic() > request.deadline:
+                if request.future.set_running_or_notify_cancel():
+                    self.stats["dropped_deadline"] += 1
+                    request.future.set_exception(TimeoutError("Échéance TTS dépassée avant synthèse"))
+                continue
+
+            return request
+        return None
+
+    def _worker_loop(self, worker: PiperWorker):
+        speaker_id = self.tts_handler._get_speaker_id()
+
+        while True:
+            with self._condition:
+                request = self._next_request()
+                while request is None and self._running:
+                    self._condition.wait()
+                    request = self._next_request()
+                if request is None:
+                    return
+
+            if not request.future.set_running_or_notify_cancel():
+                continue
+
+            self._count("total_queue_wait_s", time.monotonic() - request.enqueued_at)
+            wav_path = None
+            try:
+                wav_path = worker.synthesize(request.text, speaker_id, timeout=self.request_timeout_s)
+                result = self.tts_handler._read_wav_file(wav_path)
+
+                # La synthèse a pu finir après l'échéance
+                if request.deadline is not None and time.monotonic() > request.deadline:
+                    self._count("dropped_deadline")
+                    request.future.set_exception(TimeoutError("Échéance TTS dépassée pendant la synthèse"))
+                else:
+                    self._count("completed")
+                    request.future.set_result(result)
+
+            except Exception as e:
+                self._count("errors")
+                logger.error(f"❌ Erreur worker Piper {worker.worker_id}: {e}")
+                request.future.set_exception(e)
+            finally:
+                if wav_path:
+                    Path(wav_path).unlink(missing_ok=True)
+
+    def _count(self, key: str, amount: float = 1):
+        """Statistiques partagées entre les threads workers"""
+        with self._condition:
+            self.stats[key] += amount
+
+    def get_status(self) -> Dict[str, Any]:
+        """Retourne le statut du pool (files par session, utilisation par worker)"""
+        with self._condition:
+            queues = {session_id: len(requests) for session_id, requests in self._sessions.items()}
+            stats = dict(self.stats)
+
+        served = stats["completed"] + stats["errors"]
+        return {
+            "num_workers": self.num_workers,
+            "running": self._running,
+            "pending": self._pending,
+            "session_queues": queues,
+            "avg_queue_wait_ms": (stats["total_queue_wait_s"] / served * 1000) if served else 0.0,
+            "workers": {
+                f"worker_{worker.worker_id}": {
+                    "alive": worker.is_alive(),
+                    "utilization": worker.utilization(),
+                    "requests": worker.requests_done,
+                    "restarts": worker.restarts
+                }
+                for worker in self.workers
+            },
+            **stats
+        }
+
+# Test du pool TTS
+def test_tts_pool():
+    """Test du pool de workers Piper"""
+    import sys
+    import yaml
+    sys.path.append(str(Path(__file__).parent.parent))
+    from TTS.tts_handler import TTSHandler
+
+    print("🧪 TEST TTS WORKER POOL")
+    print("="*30)
+
+    with open("config/mvp_settings.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+
+    tts_handler = TTSHandler(config['tts'])
+    pool = tts_handler.create_worker_pool(num_workers=2)
+
+    print("\n🎯 Test 1: Deux sessions concurrentes")
+    futures = [pool.submit(f"Phrase {i} de la session A.", session_id="A") for i in range(3)]
+    futures += [pool.submit(f"Phrase {i} de la session B.", session_id="B") for i in range(3)]
+    for future in futures:
+        audio, sample_rate = future.result()
+        print(f"   {len(audio) / sample_rate:.2f}s d'audio")
+
+    print("\n🎯 Test 2: Échéance dépassée")
+    stale = pool.submit("Réponse périmée.", session_id="A", deadline_s=0.0)
+    print(f"   Exception: {stale.exception()}")
+
+    print(f"\n📊 Statut: {pool.get_status()}")
+    pool.shutdown()
+    print("\n✅ Test TTS Worker Pool terminé")
+
+if __name__ == "__main__":
+    test_tts_pool()
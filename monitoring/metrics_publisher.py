@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Metrics Publisher - Luxa v1.1
+==============================
+
+Publication asynchrone des métriques : les chemins chauds (boucle de
+génération LLM, callbacks audio) déposent leurs mesures dans une file bornée,
+un thread dédié les pousse vers le collecteur Prometheus. Un collecteur lent
+ne ralentit jamais la génération ; en cas de saturation les mesures sont
+abandonnées et comptées.
+"""
+
+import logging
+import queue
+import threading
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class MetricsPublisher:
+    def __init__(self, max_pending: int = 1024, name: str = "metrics-publisher"):
+        """
+        Args:
+            max_pending: Taille de la file avant abandon des mesures
+            name: Nom du thread de publication
+        """
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+        self.stats = {"published": 0, "dropped": 0, "errors": 0}
+
+    def publish(self, fn: Callable, *args, **kwargs) -> bool:
+        """Programme fn(*args, **kwargs) sur le thread de publication (non bloquant)"""
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def _run(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+                self.stats["published"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"⚠️ Publication métrique échouée: {e}")
+
+    def flush(self, timeout: float = 1.0) -> bool:
+        """Attend que la file soit vide (tests, arrêt propre)"""
+        done = threading.Event()
+        if not self.publish(done.set):
+            return False
+        return done.wait(timeout)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"pending": self._queue.qsize(), **self.stats}
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+def get_metrics_publisher() -> MetricsPublisher:
+    """Publisher partagé par les composants du processus"""
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = MetricsPublisher()
+    return _publisher
@@ -54,7 +54,7 @@ class EnhancedMetricsCollector:
         self.pipeline_requests = Counter(
             'luxa_pipeline_requests_total', 
             'Total pipeline requests',
-            ['status'],  # success, error, timeout
+            ['status'],  # success, error, timeout, dropped, rejected
             registry=self.registry
         )
         
@@ -155,6 +155,278 @@ class EnhancedMetricsCollector:
             registry=self.registry
         )
         
+        # Cache de réponses LLM
+        self.llm_cache_lookups = Counter(
+            'luxa_llm_response_cache_lookups_total',
+            'LLM response cache lookups',
+            ['result'],  # hit, miss, bypass
+            registry=self.registry
+        )
+        
+        self.llm_cache_hit_rate = Gauge(
+            'luxa_llm_response_cache_hit_rate',
+            'LLM response cache hit rate (0.0-1.0)',
+            registry=self.registry
+        )
+        
+        # Métriques par tour de parole (fin de parole → premier son audible)
+        self.turn_stage_latency = Histogram(
+            'luxa_turn_stage_seconds',
+            'Turn stage duration since previous stage in seconds',
+            ['stage'],  # stt_final, llm_first_token, tts_first_chunk, playback_start
+            registry=self.registry
+        )
+        
+        self.turn_time_to_stage = Histogram(
+            'luxa_turn_time_to_stage_seconds',
+            'Time from VAD endpoint to stage in seconds',
+            ['stage'],
+            registry=self.registry
+        )
+        
+        self.time_to_first_audio = Histogram(
+            'luxa_time_to_first_audio_seconds',
+            'End-of-speech to first audible sample per turn in seconds',
+            buckets=(0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 3.0, 5.0, 10.0),
+            registry=self.registry
+        )
+        
+        # Débit de génération LLM par requête
+        self.llm_prompt_tokens = Histogram(
+            'luxa_llm_prompt_tokens',
+            'LLM prompt size in tokens per request',
+            buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+            registry=self.registry
+        )
+        
+        self.llm_generated_tokens = Histogram(
+            'luxa_llm_generated_tokens',
+            'LLM generated tokens per request',
+            buckets=(1, 4, 8, 16, 32, 64, 128, 256, 512),
+            registry=self.registry
+        )
+        
+        self.llm_prompt_eval_time = Histogram(
+            'luxa_llm_prompt_eval_seconds',
+            'LLM prompt evaluation time (call to first token) in seconds',
+            registry=self.registry
+        )
+        
+        self.llm_time_to_first_token = Histogram(
+            'luxa_llm_time_to_first_token_seconds',
+            'LLM request start to first token in seconds',
+            registry=self.registry
+        )
+        
+        # Décodage spéculatif (brouillon petit modèle, vérification grand modèle)
+        self.llm_speculative_tokens = Counter(
+            'luxa_llm_speculative_tokens_total',
+            'Speculative decoding draft tokens',
+            ['result'],  # drafted, accepted
+            registry=self.registry
+        )
+        
+        self.llm_speculative_tokens_per_pass = Gauge(
+            'luxa_llm_speculative_tokens_per_pass',
+            'Tokens produced per target model verification pass',
+            registry=self.registry
+        )
+        
+        self.llm_speculative_speedup = Gauge(
+            'luxa_llm_speculative_speedup',
+            'Speculative decoding throughput vs target model alone',
+            registry=self.registry
+        )
+        
+        # Post-traitement des transcriptions (règles ou LLM)
+        self.postprocess_requests = Counter(
+            'luxa_postprocess_requests_total',
+            'Transcript post-processing requests by path',
+            ['path'],  # short, well_formed, command, rules, llm, llm_deadline, llm_rejected, llm_busy, llm_error
+            registry=self.registry
+        )
+        
+        self.postprocess_latency = Histogram(
+            'luxa_postprocess_latency_seconds',
+            'Transcript post-processing latency in seconds',
+            ['path'],
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0),
+            registry=self.registry
+        )
+        
+        # Pipeline en étages : files bornées entre capture, VAD, STT, LLM et TTS
+        self.stage_queue_depth = Gauge(
+            'luxa_pipeline_stage_queue_depth',
+            'Items waiting in a pipeline stage input queue',
+            ['stage'],
+            registry=self.registry
+        )
+        
+        self.stage_service_time = Histogram(
+            'luxa_pipeline_stage_service_seconds',
+            'Pipeline stage service time per item in seconds',
+            ['stage'],
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+            registry=self.registry
+        )
+        
+        self.stage_wait_time = Histogram(
+            'luxa_pipeline_stage_wait_seconds',
+            'Time an item spent queued before a pipeline stage in seconds',
+            ['stage'],
+            buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+            registry=self.registry
+        )
+        
+        self.stage_dropped = Counter(
+            'luxa_pipeline_stage_dropped_total',
+            'Items dropped by a saturated pipeline stage',
+            ['stage', 'reason'],  # queue_full, evicted, backpressure_timeout
+            registry=self.registry
+        )
+        
+        # Sessions (flux audio concurrents sur les mêmes modèles)
+        self.active_sessions = Gauge(
+            'luxa_sessions_active',
+            'Active audio sessions sharing the loaded models',
+            registry=self.registry
+        )
+        
+        self.sessions_rejected = Counter(
+            'luxa_sessions_rejected_total',
+            'Sessions refused because the maximum of active sessions was reached',
+            registry=self.registry
+        )
+        
+        # Pools de threads par étage
+        self.executor_in_flight = Gauge(
+            'luxa_executor_in_flight',
+            'Work items running in a stage executor',
+            ['stage'],
+            registry=self.registry
+        )
+        
+        self.executor_queued = Gauge(
+            'luxa_executor_queued',
+            'Work items waiting for a stage executor thread',
+            ['stage'],
+            registry=self.registry
+        )
+        
+        self.executor_wait_time = Histogram(
+            'luxa_executor_queue_wait_seconds',
+            'Time spent waiting for a stage executor thread in seconds',
+            ['stage'],
+            buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+            registry=self.registry
+        )
+        
+        self.executor_cancelled = Counter(
+            'luxa_executor_cancelled_total',
+            'Stage executor work cancelled on timeout or caller cancellation',
+            ['stage', 'when'],  # before_start, stopped, abandoned
+            registry=self.registry
+        )
+        
+        self.executor_rejected = Counter(
+            'luxa_executor_rejected_total',
+            'Stage executor work refused because its queue was full',
+            ['stage'],
+            registry=self.registry
+        )
+        
+        # Percentiles de latence (sketches de quantiles, rafraîchis par la boucle de mise à jour)
+        self.latency_quantiles = Gauge(
+            'luxa_latency_quantile_ms',
+            'Latency quantiles from streaming sketches in milliseconds',
+            ['series', 'quantile'],  # series: pipeline, vad, stt, postprocess, tts ; quantile: p50, p90, p99
+            registry=self.registry
+        )
+        self.sketch_sets = []
+        
+        # Micro-batching STT entre sessions
+        self.stt_batch_size = Histogram(
+            'luxa_stt_batch_size',
+            'Utterances decoded per batched STT generation',
+            buckets=(1, 2, 3, 4, 6, 8, 12, 16),
+            registry=self.registry
+        )
+        
+        self.stt_batch_wait = Histogram(
+            'luxa_stt_batch_wait_seconds',
+            'Wait added by STT micro-batching before decoding starts',
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+            registry=self.registry
+        )
+        
+        self.stt_batched_requests = Counter(
+            'luxa_stt_batched_requests_total',
+            'Utterances transcribed through the STT batch scheduler',
+            registry=self.registry
+        )
+        
+        self.stt_batched_audio = Counter(
+            'luxa_stt_batched_audio_seconds_total',
+            'Audio seconds transcribed through the STT batch scheduler',
+            registry=self.registry
+        )
+        
+        self.stt_batch_speed = Gauge(
+            'luxa_stt_batch_realtime_factor',
+            'Audio seconds transcribed per decode second in the last STT batch',
+            registry=self.registry
+        )
+        
+        # Démarrage spéculatif du LLM sur transcription partielle
+        self.llm_speculation = Counter(
+            'luxa_llm_speculation_total',
+            'Speculative LLM starts on partial transcripts by outcome',
+            ['outcome'],  # hit, empty, speech_resumed, dropped, error
+            registry=self.registry
+        )
+        
+        self.llm_speculation_saved = Histogram(
+            'luxa_llm_speculation_saved_seconds',
+            'LLM latency saved by reusing a speculative result',
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0),
+            registry=self.registry
+        )
+        
+        # Barge-in : réponse interrompue par la parole de l'utilisateur
+        self.barge_ins = Counter(
+            'luxa_barge_in_total',
+            'Responses interrupted by user speech',
+            registry=self.registry
+        )
+        
+        self.barge_in_wasted_tokens = Counter(
+            'luxa_barge_in_wasted_tokens_total',
+            'LLM tokens generated for interrupted responses but never handed to playback',
+            registry=self.registry
+        )
+        
+        self.barge_in_cancel_latency = Histogram(
+            'luxa_barge_in_cancel_latency_seconds',
+            'Time from detected user speech until generation, synthesis and playback stopped',
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0, 2.0),
+            registry=self.registry
+        )
+        
+        # Contrôle d'admission : débit par session/global et délestage selon la latence prévue
+        self.admission_decisions = Counter(
+            'luxa_admission_decisions_total',
+            'Admission decisions for new requests',
+            ['action', 'reason'],  # admit/degrade/reject ; ok, predicted_latency, session_rate_limit, global_rate_limit
+            registry=self.registry
+        )
+        
+        self.admission_predicted_latency = Histogram(
+            'luxa_admission_predicted_latency_seconds',
+            'Predicted pipeline latency of a new request at admission (queued work plus service)',
+            buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.2, 1.5, 2.0, 3.0, 5.0),
+            registry=self.registry
+        )
+        
         # Thread pour mise à jour automatique
         self.update_thread = None
         self.running = False
@@ -243,6 +515,7 @@ class EnhancedMetricsCollector:
             try:
                 self.update_gpu_metrics()
                 self.update_system_metrics()
+                self.update_latency_quantiles()
                 time.sleep(self.update_interval)
             except Exception as e:
                 print(f"⚠️ Erreur mise à jour métriques: {e}")
@@ -338,6 +611,19 @@ class EnhancedMetricsCollector:
         except Exception as e:
             print(f"❌ Erreur métriques système: {e}")
             
+    def register_sketches(self, sketch_set):
+        """Ajoute un SketchSet dont les percentiles sont exportés périodiquement"""
+        self.sketch_sets.append(sketch_set)
+        
+    def update_latency_quantiles(self):
+        """Publie p50/p90/p99 de chaque série enregistrée"""
+        for sketch_set in self.sketch_sets:
+            for series, sketch in list(sketch_set.sketches.items()):
+                if sketch.count == 0:
+                    continue
+                for quantile, value in sketch.quantiles().items():
+                    self.latency_quantiles.labels(series=series, quantile=quantile).set(value)
+                    
     # Méthodes d'enregistrement des métriques business
     def record_stt_latency(self, latency_seconds: float):
         """Enregistre la latence STT"""
@@ -381,6 +667,111 @@ class EnhancedMetricsCollector:
             model_name=model_name
         ).observe(load_time_seconds)
         
+    def record_llm_cache_lookup(self, result: str, hit_rate: float):
+        """Enregistre une consultation du cache de réponses LLM"""
+        self.llm_cache_lookups.labels(result=result).inc()
+        self.llm_cache_hit_rate.set(hit_rate)
+        
+    def record_turn_stage(self, stage: str, stage_seconds: float, since_endpoint_seconds: float):
+        """Enregistre la durée d'une étape de tour et son cumul depuis l'endpoint VAD"""
+        self.turn_stage_latency.labels(stage=stage).observe(stage_seconds)
+        self.turn_time_to_stage.labels(stage=stage).observe(since_endpoint_seconds)
+        
+    def record_time_to_first_audio(self, latency_seconds: float):
+        """Enregistre le temps fin de parole → premier son d'un tour"""
+        self.time_to_first_audio.observe(latency_seconds)
+        
+    def record_llm_generation(self, prompt_tokens: int, generated_tokens: int,
+                              prompt_eval_seconds: float, first_token_seconds: float,
+                              total_seconds: float, tokens_per_second: float):
+        """Enregistre les statistiques d'une génération LLM"""
+        self.llm_prompt_tokens.observe(prompt_tokens)
+        self.llm_generated_tokens.observe(generated_tokens)
+        self.llm_prompt_eval_time.observe(prompt_eval_seconds)
+        self.llm_time_to_first_token.observe(first_token_seconds)
+        self.llm_latency.observe(total_seconds)
+        if tokens_per_second > 0:
+            self.llm_tokens_per_second.set(tokens_per_second)
+        
+    def record_llm_speculative(self, drafted_tokens: int, accepted_tokens: int,
+                               tokens_per_pass: float, speedup: Optional[float] = None):
+        """Enregistre une génération en décodage spéculatif"""
+        self.llm_speculative_tokens.labels(result="drafted").inc(drafted_tokens)
+        self.llm_speculative_tokens.labels(result="accepted").inc(accepted_tokens)
+        self.llm_speculative_tokens_per_pass.set(tokens_per_pass)
+        if speedup is not None:
+            self.llm_speculative_speedup.set(speedup)
+        
+    def record_postprocess(self, path: str, latency_seconds: float):
+        """Enregistre un post-traitement de transcription et son chemin"""
+        self.postprocess_requests.labels(path=path).inc()
+        self.postprocess_latency.labels(path=path).observe(latency_seconds)
+        
+    def record_stage_service(self, stage: str, service_seconds: float, wait_seconds: float):
+        """Enregistre le temps de service et d'attente d'un élément dans un étage"""
+        self.stage_service_time.labels(stage=stage).observe(service_seconds)
+        self.stage_wait_time.labels(stage=stage).observe(wait_seconds)
+        
+    def set_stage_queue_depth(self, stage: str, depth: int):
+        """Met à jour la profondeur de file d'un étage"""
+        self.stage_queue_depth.labels(stage=stage).set(depth)
+        
+    def record_stage_drop(self, stage: str, reason: str):
+        """Enregistre un élément abandonné par un étage saturé"""
+        self.stage_dropped.labels(stage=stage, reason=reason).inc()
+        
+    def set_active_sessions(self, count: int):
+        """Met à jour le nombre de sessions actives"""
+        self.active_sessions.set(count)
+        
+    def record_session_rejected(self):
+        """Enregistre une session refusée (limite atteinte)"""
+        self.sessions_rejected.inc()
+        
+    def set_executor_load(self, stage: str, in_flight: int, queued: int):
+        """Met à jour les travaux en cours et en attente d'un pool d'étage"""
+        self.executor_in_flight.labels(stage=stage).set(in_flight)
+        self.executor_queued.labels(stage=stage).set(queued)
+        
+    def record_executor_wait(self, stage: str, wait_seconds: float):
+        """Enregistre l'attente d'un travail avant d'obtenir un thread"""
+        self.executor_wait_time.labels(stage=stage).observe(wait_seconds)
+        
+    def record_executor_cancelled(self, stage: str, when: str):
+        """Enregistre une annulation (avant démarrage, arrêtée, abandonnée)"""
+        self.executor_cancelled.labels(stage=stage, when=when).inc()
+        
+    def record_executor_rejected(self, stage: str):
+        """Enregistre un travail refusé (file du pool pleine)"""
+        self.executor_rejected.labels(stage=stage).inc()
+        
+    def record_stt_batch(self, batch_size: int, wait_seconds: list, decode_seconds: float, audio_seconds: float):
+        """Enregistre un lot STT : taille, attente de chaque énoncé et débit"""
+        self.stt_batch_size.observe(batch_size)
+        for wait in wait_seconds:
+            self.stt_batch_wait.observe(wait)
+        self.stt_batched_requests.inc(batch_size)
+        self.stt_batched_audio.inc(audio_seconds)
+        if decode_seconds > 0:
+            self.stt_batch_speed.set(audio_seconds / decode_seconds)
+        
+    def record_llm_speculation(self, outcome: str, saved_seconds: float = 0.0):
+        """Enregistre l'issue d'une spéculation LLM (et le temps gagné si reprise)"""
+        self.llm_speculation.labels(outcome=outcome).inc()
+        if outcome == "hit":
+            self.llm_speculation_saved.observe(saved_seconds)
+        
+    def record_barge_in(self, wasted_tokens: int, cancel_latency_seconds: float):
+        """Enregistre une interruption : tokens gaspillés et latence d'annulation"""
+        self.barge_ins.inc()
+        self.barge_in_wasted_tokens.inc(wasted_tokens)
+        self.barge_in_cancel_latency.observe(cancel_latency_seconds)
+        
+    def record_admission(self, action: str, reason: str, predicted_latency_seconds: float):
+        """Enregistre une décision d'admission et la latence prévue qui l'a motivée"""
+        self.admission_decisions.labels(action=action, reason=reason).inc()
+        self.admission_predicted_latency.observe(predicted_latency_seconds)
+        
     def can_load_model(self, model_size_gb: float, device_id: int = 0) -> bool:
         """Vérifie si on peut charger un modèle de taille donnée"""
         if not torch.cuda.is_available():
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Quantile Sketch - Luxa v1.1
+============================
+
+Sketch de quantiles en flux à seaux logarithmiques (type DDSketch) : chaque
+valeur tombe dans le seau ceil(log_gamma(x)), d'où une erreur relative bornée
+(1% par défaut) sur p50/p90/p99, une mémoire fixe par série (~900 compteurs
+entre 0.01ms et 10min) et une fusion exacte par addition des compteurs
+(sessions, processus, fenêtres).
+"""
+
+import math
+import threading
+import numpy as np
+from typing import Dict, Any, Iterable
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 0.01, max_value: float = 600000.0):
+        """
+        Args:
+            relative_accuracy: Erreur relative maximale d'un quantile
+            min_value: Plus petite valeur distinguée (en dessous : seau zéro)
+            max_value: Plus grande valeur distinguée (au-delà : dernier seau)
+        """
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        n_buckets = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+
+        self.counts = np.zeros(n_buckets, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._lock = threading.Lock()
+
+    @property
+    def n_columns(self) -> int:
+        """Colonnes d'un histogramme aux seaux de ce sketch : seau zéro puis seaux log"""
+        return len(self.counts) + 1
+
+    def bucket_index(self, value: float) -> int:
+        """Colonne d'une valeur : 0 sous min_value, 1 + indice du seau sinon"""
+        if value < self.min_value:
+            return 0
+        index = math.ceil(math.log(value) / self._log_gamma) - self._offset
+        return 1 + min(index, len(self.counts) - 1)
+
+    def add(self, value: float):
+        column = self.bucket_index(value)
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+            if column == 0:
+                self.zero_count += 1
+            else:
+                self.counts[column - 1] += 1
+
+    def _compatible(self, other: "QuantileSketch") -> bool:
+        return (self.relative_accuracy, self.min_value, self.max_value) == \
+               (other.relative_accuracy, other.min_value, other.max_value)
+
+    def merge(self, other: "QuantileSketch"):
+        """Ajoute les observations d'un autre sketch (mêmes paramètres)"""
+        if not self._compatible(other):
+            raise ValueError("Sketches incompatibles (précision ou bornes différentes)")
+        # Copie sous le seul verrou de l'autre, puis ajout sous le sien :
+        # jamais deux verrous tenus (auto-fusion, fusions croisées)
+        with other._lock:
+            counts = other.counts.copy()
+            zero_count, count, total = other.zero_count, other.count, other.sum
+            low, high = other.min, other.max
+        with self._lock:
+            self.counts += counts
+            self.zero_count += zero_count
+            self.count += count
+            self.sum += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    def _value_at_rank(self, zero_count: int, counts: np.ndarray, rank: float):
+        """Représentant du seau contenant le rang ; None dans le seau zéro"""
+        if rank < zero_count:
+            return None
+        cumulative = np.cumsum(counts)
+        index = int(np.searchsorted(cumulative, rank - zero_count, side="right"))
+        index = min(index, len(counts) - 1)
+        # Représentant du seau (gamma^(i-1), gamma^i] à erreur relative minimale
+        return 2 * self.gamma ** (index + self._offset) / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            value = self._value_at_rank(self.zero_count, self.counts, q * (self.count - 1))
+            if value is None:
+                return self.min
+            return min(max(value, self.min), self.max)
+
+    def quantile_of(self, histogram: np.ndarray, q: float) -> float:
+        """Quantile d'un histogramme externe aux seaux de ce sketch (colonnes de bucket_index)"""
+        total = int(histogram.sum())
+        if total == 0:
+            return 0.0
+        value = self._value_at_rank(int(histogram[0]), histogram[1:], q * (total - 1))
+        return self.min_value if value is None else float(value)
+
+    def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        return {f"p{round(q * 100):d}": self.quantile(q) for q in qs}
+
+    def reset(self):
+        with self._lock:
+            self.counts[:] = 0
+            self.zero_count = 0
+            self.count = 0
+            self.sum = 0.0
+            self.min = math.inf
+            self.max = -math.inf
+
+    def get_status(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "avg": self.sum / self.count,
+            "min": self.min,
+            "max": self.max,
+            **self.quantiles()
+        }
+
+class SketchSet:
+    """Une série de sketches par nom (pipeline, vad, stt, llm, tts...)"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self._lock = threading.Lock()
+
+    def get(self, series: str) -> QuantileSketch:
+        sketch = self.sketches.get(series)
+        if sketch is None:
+            with self._lock:
+                sketch = self.sketches.setdefault(series, QuantileSketch(self.relative_accuracy))
+        return sketch
+
+    def observe(self, series: str, value: float):
+        self.get(series).add(value)
+
+    def merge(self, other: "SketchSet"):
+        for series, sketch in list(other.sketches.items()):
+            self.get(series).merge(sketch)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {series: sketch.get_status() for series, sketch in list(self.sketches.items())}
+
+# Test des sketches
+def test_quantile_sketch():
+    """Test de précision et de fusion"""
+    print("🧪 TEST QUANTILE SKETCH")
+    print("="*30)
+
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(np.log(250), 0.6, 100000)
+
+    # Deux sessions observées séparément puis fusionnées
+    first, second = QuantileSketch(), QuantileSketch()
+    for value in values[:50000]:
+        first.add(float(value))
+    for value in values[50000:]:
+        second.add(float(value))
+    first.merge(second)
+    # Fusions croisées simultanées et auto-fusion : pas d'interblocage
+    left, right = QuantileSketch(), QuantileSketch()
+    for value in values[:1000]:
+        left.add(float(value))
+        right.add(float(value))
+    threads = [threading.Thread(target=lambda: [left.merge(right) for _ in range(200)]),
+               threading.Thread(target=lambda: [right.merge(left) for _ in range(200)])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    left.merge(left)
+    print(f"   Fusions croisées: {'bloquées' if any(t.is_alive() for t in threads) else 'terminées'}, "
+          f"auto-fusion: {left.count} observations")
+
+    for q in DEFAULT_QUANTILES:
+        exact = float(np.quantile(values, q))
+        estimate = first.quantile(q)
+        print(f"   p{round(q * 100):d}: exact {exact:7.1f}ms, sketch {estimate:7.1f}ms "
+              f"(erreur {abs(estimate - exact) / exact:.2%})")
+    print(f"   Mémoire: {first.counts.nbytes} octets ({len(first.counts)} seaux)")
+
+    print("\n✅ Test Quantile Sketch terminé")
+
+if __name__ == "__main__":
+    test_quantile_sketch()
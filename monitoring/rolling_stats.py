@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Rolling Stats - Luxa v1.1
+==========================
+
+Statistiques glissantes à coût constant : deux anneaux numpy de seaux
+temporels (une seconde sur la dernière heure, une minute sur 24h), chaque
+seau portant compteurs et histogramme logarithmique des latences (seaux
+de QuantileSketch, mêmes représentants et même erreur relative). Un
+enregistrement est O(1) ; une requête sur une fenêtre quelconque parcourt
+un anneau de taille fixe, quel que soit le trafic.
+"""
+
+import time
+import threading
+import numpy as np
+from typing import Dict, Any, Optional
+from pathlib import Path
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from monitoring.quantile_sketch import QuantileSketch
+
+class _Ring:
+    """Anneau de seaux de largeur fixe (en secondes)"""
+
+    def __init__(self, slots: int, width_s: int, n_buckets: int):
+        self.slots = slots
+        self.width_s = width_s
+        self.epoch = np.full(slots, -1, dtype=np.int64)  # Index temporel du seau
+        self.count = np.zeros(slots, dtype=np.int64)
+        self.errors = np.zeros(slots, dtype=np.int64)
+        self.latency_sum = np.zeros(slots, dtype=np.float64)
+        self.histogram = np.zeros((slots, n_buckets), dtype=np.int32)
+
+    def add(self, timestamp: float, bucket: int, latency_ms: float, success: bool):
+        period = int(timestamp // self.width_s)
+        i = period % self.slots
+        if self.epoch[i] != period:
+            # Seau recyclé : remise à zéro de cette seule ligne
+            self.epoch[i] = period
+            self.count[i] = 0
+            self.errors[i] = 0
+            self.latency_sum[i] = 0.0
+            self.histogram[i, :] = 0
+        self.count[i] += 1
+        self.errors[i] += int(not success)
+        self.latency_sum[i] += latency_ms
+        self.histogram[i, bucket] += 1
+
+    def mask(self, now: float, seconds: float) -> np.ndarray:
+        current = int(now // self.width_s)
+        periods = max(1, int(np.ceil(seconds / self.width_s)))
+        return (self.epoch > current - periods) & (self.epoch <= current)
+
+class RollingStats:
+    def __init__(self, second_slots: int = 3600, minute_slots: int = 1440,
+                 min_latency_ms: float = 1.0, max_latency_ms: float = 120000.0,
+                 relative_accuracy: float = 0.05, clock=time.time):
+        """
+        Args:
+            second_slots: Seaux d'une seconde (fenêtres jusqu'à second_slots secondes)
+            minute_slots: Seaux d'une minute (fenêtres jusqu'à minute_slots minutes)
+            min_latency_ms: Borne basse de l'histogramme (en dessous : seau zéro)
+            max_latency_ms: Borne haute de l'histogramme (au-delà : dernier seau)
+            relative_accuracy: Erreur relative maximale d'un percentile (fixe le nombre de seaux)
+            clock: Source de temps (secondes)
+        """
+        # Sketch vide servant de découpage : colonne 0 = seau zéro, puis seaux log
+        self.layout = QuantileSketch(relative_accuracy, min_latency_ms, max_latency_ms)
+        self.n_buckets = self.layout.n_columns
+        self.clock = clock
+
+        self._seconds = _Ring(second_slots, 1, self.n_buckets)
+        self._minutes = _Ring(minute_slots, 60, self.n_buckets)
+        self._lock = threading.Lock()
+        self.total = {"count": 0, "errors": 0, "latency_ms": 0.0}
+
+    def record(self, latency_ms: float, success: bool = True, timestamp: Optional[float] = None):
+        """Enregistre une requête en O(1)"""
+        timestamp = self.clock() if timestamp is None else timestamp
+        bucket = self.layout.bucket_index(latency_ms)
+        with self._lock:
+            self._seconds.add(timestamp, bucket, latency_ms, success)
+            self._minutes.add(timestamp, bucket, latency_ms, success)
+            self.total["count"] += 1
+            self.total["errors"] += int(not success)
+            self.total["latency_ms"] += latency_ms
+
+    def _select(self, seconds: float, now: float):
+        ring = self._seconds if seconds <= self._seconds.slots else self._minutes
+        return ring, ring.mask(now, seconds)
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """Compteurs, taux d'erreur et percentiles sur les `seconds` dernières secondes"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            ring, mask = self._select(seconds, now)
+            count = int(ring.count[mask].sum())
+            errors = int(ring.errors[mask].sum())
+            latency_sum = float(ring.latency_sum[mask].sum())
+            histogram = ring.histogram[mask].sum(axis=0)
+
+        return {
+            "window_s": seconds,
+            "count": count,
+            "errors": errors,
+            "error_rate_percent": errors / count * 100 if count else 0.0,
+            "requests_per_s": count / seconds if seconds else 0.0,
+            "avg_latency_ms": latency_sum / count if count else 0.0,
+            "p50_latency_ms": self.layout.quantile_of(histogram, 0.50),
+            "p90_latency_ms": self.layout.quantile_of(histogram, 0.90),
+            "p99_latency_ms": self.layout.quantile_of(histogram, 0.99)
+        }
+
+    def percentile(self, q: float, seconds: float, now: Optional[float] = None) -> float:
+        now = self.clock() if now is None else now
+        with self._lock:
+            ring, mask = self._select(seconds, now)
+            histogram = ring.histogram[mask].sum(axis=0)
+        return self.layout.quantile_of(histogram, q)
+
+    def get_status(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {
+            "total": dict(self.total),
+            "windows": {
+                label: self.window(seconds, now)
+                for label, seconds in (("1m", 60), ("5m", 300), ("1h", 3600), ("24h", 86400))
+            }
+        }
+
+# Test des statistiques glissantes
+def test_rolling_stats():
+    """Test sur une journée simulée"""
+    print("🧪 TEST ROLLING STATS")
+    print("="*30)
+
+    now = [1_700_000_000.0]
+    stats = RollingStats(clock=lambda: now[0])
+    rng = np.random.default_rng(0)
+
+    # 24h de trafic : une requête toutes les 2s, latence log-normale ~300ms
+    start = time.perf_counter()
+    for _ in range(43200):
+        stats.record(float(rng.lognormal(np.log(300), 0.4)), success=rng.random() > 0.02)
+        now[0] += 2.0
+    # Dernière minute dégradée
+    for _ in range(30):
+        stats.record(float(rng.lognormal(np.log(900), 0.2)), success=rng.random() > 0.2)
+        now[0] += 2.0
+    elapsed_us = (time.perf_counter() - start) / 43230 * 1e6
+    print(f"   Enregistrement: {elapsed_us:.1f}µs/requête")
+
+    start = time.perf_counter()
+    status = stats.get_status()
+    print(f"   Requête 4 fenêtres: {(time.perf_counter() - start) * 1000:.2f}ms")
+    for label, window in status["windows"].items():
+        print(f"   {label:>3}: {window['count']:6d} req, erreurs {window['error_rate_percent']:4.1f}%, "
+              f"p50 {window['p50_latency_ms']:5.0f}ms, p99 {window['p99_latency_ms']:5.0f}ms")
+
+    print("\n✅ Test Rolling Stats terminé")
+
+if __name__ == "__main__":
+    test_rolling_stats()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Tracing - Luxa v1.1
+====================
+
+Traces par requête : spans imbriqués (VAD, STT, LLM, TTS, chargements de
+modèles, attente dans les pools d'exécution) propagés par contextvars,
+conservés dans un anneau des traces récentes et exportables au format
+Chrome trace / Perfetto (une ligne par requête : chevauchements entre étages
+et attentes visibles sur la chronologie). Désactivé, un span ne coûte
+qu'un test de booléen.
+"""
+
+import json
+import time
+import threading
+import itertools
+import contextvars
+from collections import deque
+from typing import Dict, Any, Optional, List
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("luxa_current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "cat", "trace", "parent", "start", "end", "args")
+
+    def __init__(self, name: str, cat: str, trace: "Trace", parent: Optional["Span"], start: float, args: Dict[str, Any]):
+        self.name = name
+        self.cat = cat
+        self.trace = trace
+        self.parent = parent
+        self.start = start
+        self.end = None
+        self.args = args
+
+    def set(self, **args):
+        """Ajoute des attributs (modèle, tokens, chemin...)"""
+        self.args.update(args)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end - self.start) * 1000 if self.end is not None else None
+
+class Trace:
+    def __init__(self, trace_id: int, root: Optional[Span] = None):
+        self.trace_id = trace_id
+        self.root = root
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+
+class _NoopSpan:
+    """Span désactivé : contexte et attributs sans effet"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+_NOOP = _NoopSpan()
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "token", "is_root")
+
+    def __init__(self, tracer: "Tracer", span: Span, is_root: bool):
+        self.tracer = tracer
+        self.span = span
+        self.is_root = is_root
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc_type is not None:
+            self.span.args["error"] = exc_type.__name__
+        _current_span.reset(self.token)
+        if self.is_root:
+            self.tracer._finish(self.span.trace)
+        return False
+
+class _Activation:
+    """Reprend une trace dans un autre contexte (tâche asyncio, thread)"""
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Optional[Span]):
+        self.span = span
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span) if self.span is not None else None
+        return self.span
+
+    def __exit__(self, *exc):
+        if self.token is not None:
+            _current_span.reset(self.token)
+        return False
+
+class Tracer:
+    def __init__(self, enabled: bool = False, max_traces: int = 64, max_spans_per_trace: int = 512):
+        """
+        Args:
+            enabled: Traçage actif
+            max_traces: Traces récentes conservées (anneau)
+            max_spans_per_trace: Au-delà, les spans d'une trace sont comptés mais pas gardés
+        """
+        self.enabled = enabled
+        self.max_spans_per_trace = max_spans_per_trace
+        self._traces = deque(maxlen=max_traces)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+        self.stats = {"traces": 0, "spans": 0, "dropped_spans": 0}
+
+    def configure(self, enabled: Optional[bool] = None, max_traces: Optional[int] = None,
+                  max_spans_per_trace: Optional[int] = None):
+        if enabled is not None:
+            self.enabled = enabled
+        if max_traces is not None and max_traces != self._traces.maxlen:
+            with self._lock:
+                self._traces = deque(self._traces, maxlen=max_traces)
+        if max_spans_per_trace is not None:
+            self.max_spans_per_trace = max_spans_per_trace
+
+    # API des spans
+
+    def _new_span(self, name: str, cat: str, parent: Optional[Span], start: float, args: Dict[str, Any]) -> Span:
+        if parent is None:
+            trace = Trace(next(self._ids))
+            span = Span(name, cat, trace, None, start, args)
+            trace.root = span
+        else:
+            trace = parent.trace
+            span = Span(name, cat, trace, parent, start, args)
+        with self._lock:
+            self.stats["spans"] += 1
+            if len(trace.spans) < self.max_spans_per_trace:
+                trace.spans.append(span)
+            else:
+                trace.dropped_spans += 1
+                self.stats["dropped_spans"] += 1
+        return span
+
+    def trace(self, name: str, cat: str = "request", **args):
+        """Span racine d'une nouvelle trace (ex: une requête, un chargement de modèle)"""
+        if not self.enabled:
+            return _NOOP
+        return _SpanContext(self, self._new_span(name, cat, None, time.perf_counter(), args), is_root=True)
+
+    def span(self, name: str, cat: str = "pipeline", root: bool = False, **args):
+        """Span enfant du span courant ; sans trace active : sans effet, sauf root=True"""
+        if not self.enabled:
+            return _NOOP
+        parent = _current_span.get()
+        if parent is None:
+            if not root:
+                return _NOOP
+            return self.trace(name, cat, **args)
+        return _SpanContext(self, self._new_span(name, cat, parent, time.perf_counter(), args), is_root=False)
+
+    def begin_trace(self, name: str, cat: str = "request", start: Optional[float] = None, **args) -> Optional[Span]:
+        """Trace ouverte hors d'un bloc with (ex: un énoncé qui traverse le pipeline)"""
+        if not self.enabled:
+            return None
+        return self._new_span(name, cat, None, start if start is not None else time.perf_counter(), args)
+
+    def end_trace(self, root: Optional[Span], **args):
+        if root is None or root.end is not None:
+            return
+        root.args.update(args)
+        root.end = time.perf_counter()
+        self._finish(root.trace)
+
+    def activate(self, span: Optional[Span]):
+        """Rend `span` courant (propagation explicite vers une tâche ou un étage)"""
+        if not self.enabled or span is None:
+            return _NOOP
+        return _Activation(span)
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get() if self.enabled else None
+
+    def record(self, name: str, start: float, end: float, cat: str = "pipeline",
+               parent: Optional[Span] = None, **args):
+        """Span déjà mesuré (horodatages perf_counter), ex: attente en file"""
+        if not self.enabled:
+            return
+        parent = parent or _current_span.get()
+        if parent is None:
+            return
+        span = self._new_span(name, cat, parent, start, args)
+        span.end = end
+
+    def _finish(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+            self.stats["traces"] += 1
+
+    # Export
+
+    def traces(self, last: Optional[int] = None) -> List[Trace]:
+        with self._lock:
+            traces = list(self._traces)
+        return traces[-last:] if last else traces
+
+    def export_chrome_trace(self, path: Optional[str] = None, last: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Export Chrome trace / Perfetto (chrome://tracing, ui.perfetto.dev)
+
+        Une ligne (tid) par trace ; les spans d'une requête s'y empilent.
+        """
+        events = [{"ph": "M", "pid": 1, "name": "process_name", "args": {"name": "luxa"}}]
+        for trace in self.traces(last):
+            root = trace.root
+            events.append({
+                "ph": "M", "pid": 1, "tid": trace.trace_id, "name": "thread_name",
+                "args": {"name": f"{root.name} #{trace.trace_id}"}
+            })
+            for span in trace.spans:
+                end = span.end if span.end is not None else time.perf_counter()
+                events.append({
+                    "ph": "X",
+                    "pid": 1,
+                    "tid": trace.trace_id,
+                    "name": span.name,
+                    "cat": span.cat,
+                    "ts": (span.start - self._epoch) * 1e6,
+                    "dur": max(0.0, (end - span.start) * 1e6),
+                    "args": {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                             for key, value in span.args.items()}
+                })
+
+        document = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+        return document
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buffered_traces": len(self._traces),
+            "max_traces": self._traces.maxlen,
+            **self.stats
+        }
+
+# Instance globale
+_tracer = None
+
+def get_tracer() -> Tracer:
+    """Retourne l'instance globale du tracer (désactivé par défaut)"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+# Test du traçage
+def test_tracing():
+    """Test de deux requêtes concurrentes et export Chrome trace"""
+    import asyncio
+
+    print("🧪 TEST TRACING")
+    print("="*30)
+
+    tracer = Tracer(enabled=True, max_traces=8)
+
+    async def request(i):
+        with tracer.trace("request", session=f"s{i}"):
+            with tracer.span("vad", cat="stage"):
+                await asyncio.sleep(0.002)
+            queued = time.perf_counter()
+            await asyncio.sleep(0.005 * i)
+            tracer.record("queue.stt", queued, time.perf_counter(), cat="executor")
+            with tracer.span("stt", cat="stage") as span:
+                await asyncio.sleep(0.02)
+                span.set(model="base")
+
+    async def main():
+        await asyncio.gather(*(request(i) for i in range(3)))
+
+    asyncio.run(main())
+
+    # Désactivé : coût d'un span
+    tracer.enabled = False
+    start = time.perf_counter()
+    for _ in range(100000):
+        with tracer.span("noop"):
+            pass
+    noop_ns = (time.perf_counter() - start) / 100000 * 1e9
+
+    document = tracer.export_chrome_trace()
+    spans = [event for event in document["traceEvents"] if event["ph"] == "X"]
+    print(f"   Traces: {len(tracer.traces())}, spans exportés: {len(spans)}")
+    for event in spans[:4]:
+        print(f"   tid {event['tid']} {event['name']:>10}: {event['dur'] / 1000:.1f}ms {event['args']}")
+    print(f"   Span désactivé: {noop_ns:.0f}ns")
+    print("\n✅ Test Tracing terminé")
+
+if __name__ == "__main__":
+    test_tracing()
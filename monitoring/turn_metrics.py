@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Turn Latency Tracker - Luxa v1.1
+=================================
+
+Instrumentation de bout en bout d'un tour de parole : de la fin de parole
+(endpoint VAD) jusqu'au premier échantillon audible de la réponse.
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional
+
+# Étapes d'un tour, dans l'ordre chronologique attendu
+TURN_STAGES = (
+    "vad_endpoint",      # Fin de parole détectée
+    "stt_final",         # Transcription finale disponible
+    "llm_first_token",   # Premier token LLM
+    "tts_first_chunk",   # Premier chunk audio synthétisé
+    "playback_start"     # Premier échantillon audible
+)
+
+class TurnLatencyTracker:
+    def __init__(self, metrics=None, history_size: int = 50):
+        """
+        Args:
+            metrics: EnhancedMetricsCollector optionnel (histogrammes Prometheus)
+            history_size: Nombre de tours terminés conservés pour le résumé
+        """
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._active: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._history = deque(maxlen=history_size)
+        self.current_turn_id = None
+
+    def start_turn(self, turn_id: Optional[str] = None, timestamp: Optional[float] = None) -> str:
+        """Ouvre un tour à l'endpoint VAD et le rend courant"""
+        turn_id = turn_id or uuid.uuid4().hex[:12]
+        with self._lock:
+            self._active[turn_id] = {"vad_endpoint": timestamp or time.perf_counter()}
+            # Borne de sécurité : tours jamais terminés
+            while len(self._active) > 32:
+                self._active.popitem(last=False)
+            self.current_turn_id = turn_id
+        return turn_id
+
+    def mark(self, stage: str, turn_id: Optional[str] = None, timestamp: Optional[float] = None):
+        """
+        Horodate une étape du tour (première occurrence seulement)
+
+        Peut être appelé depuis n'importe quel thread (ex: callback audio).
+        """
+        if stage not in TURN_STAGES:
+            raise ValueError(f"Étape inconnue: {stage}")
+
+        timestamp = timestamp or time.perf_counter()
+        with self._lock:
+            turn_id = turn_id or self.current_turn_id
+            marks = self._active.get(turn_id)
+            if marks is None or stage in marks:
+                return
+            marks[stage] = timestamp
+
+            complete = stage == "playback_start"
+
+        self._record_stage(marks, stage)
+        if complete:
+            self.end_turn(turn_id)
+
+    def end_turn(self, turn_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Clôt le tour et l'ajoute à l'historique"""
+        with self._lock:
+            turn_id = turn_id or self.current_turn_id
+            marks = self._active.pop(turn_id, None)
+            if marks is None:
+                return None
+            if self.current_turn_id == turn_id:
+                self.current_turn_id = None
+
+            breakdown = self._build_breakdown(turn_id, marks)
+            self._history.append(breakdown)
+
+        if self.metrics and breakdown["time_to_first_audio_ms"] is not None:
+            self.metrics.record_time_to_first_audio(breakdown["time_to_first_audio_ms"] / 1000)
+        return breakdown
+
+    def _record_stage(self, marks: Dict[str, float], stage: str):
+        """Pousse la durée de l'étape (depuis l'étape précédente) et le cumul depuis l'endpoint"""
+        if not self.metrics:
+            return
+
+        index = TURN_STAGES.index(stage)
+        previous = next((marks[s] for s in reversed(TURN_STAGES[:index]) if s in marks), None)
+        if previous is None:
+            return
+
+        stage_s = marks[stage] - previous
+        since_endpoint_s = marks[stage] - marks["vad_endpoint"]
+        self.metrics.record_turn_stage(stage, stage_s, since_endpoint_s)
+
+        # Alimenter l'histogramme TTS existant (la latence LLM est publiée
+        # par LLMHandler avec le détail de chaque génération)
+        if stage == "tts_first_chunk":
+            self.metrics.record_tts_latency(stage_s)
+
+    def _build_breakdown(self, turn_id: str, marks: Dict[str, float]) -> Dict[str, Any]:
+        origin = marks["vad_endpoint"]
+        stages_ms = {}
+        previous = origin
+        for stage in TURN_STAGES[1:]:
+            if stage in marks:
+                stages_ms[stage] = (marks[stage] - previous) * 1000
+                previous = marks[stage]
+
+        playback = marks.get("playback_start")
+        return {
+            "turn_id": turn_id,
+            "timestamp": time.time(),
+            "stages_ms": stages_ms,
+            "since_endpoint_ms": {
+                stage: (marks[stage] - origin) * 1000 for stage in TURN_STAGES[1:] if stage in marks
+            },
+            "time_to_first_audio_ms": (playback - origin) * 1000 if playback is not None else None
+        }
+
+    def get_turn_breakdown(self, turn_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Détail d'un tour (en cours ou terminé) ; par défaut le dernier"""
+        with self._lock:
+            if turn_id in self._active:
+                return self._build_breakdown(turn_id, dict(self._active[turn_id]))
+            for breakdown in reversed(self._history):
+                if turn_id is None or breakdown["turn_id"] == turn_id:
+                    return breakdown
+        return None
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Résumé par étape sur les tours récents (pour get_health_status)"""
+        with self._lock:
+            history = list(self._history)
+
+        def _stats(values):
+            if not values:
+                return {"count": 0}
+            values = sorted(values)
+            return {
+                "count": len(values),
+                "avg_ms": sum(values) / len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))]
+            }
+
+        return {
+            "turns_recorded": len(history),
+            "last_turn": history[-1] if history else None,
+            "stages": {
+                stage: _stats([t["stages_ms"][stage] for t in history if stage in t["stages_ms"]])
+                for stage in TURN_STAGES[1:]
+            },
+            "time_to_first_audio": _stats([
+                t["time_to_first_audio_ms"] for t in history if t["time_to_first_audio_ms"] is not None
+            ])
+        }
+
+# Test du tracker
+def test_turn_tracker():
+    """Test du suivi de latence par tour"""
+    print("🧪 TEST TURN LATENCY TRACKER")
+    print("="*35)
+
+    tracker = TurnLatencyTracker()
+    for _ in range(3):
+        tracker.start_turn()
+        for stage in TURN_STAGES[1:]:
+            time.sleep(0.01)
+            tracker.mark(stage)
+
+    print(f"Dernier tour: {tracker.get_turn_breakdown()}")
+    print(f"Résumé: {tracker.get_summary()['time_to_first_audio']}")
+    print("\n✅ Test Turn Latency Tracker terminé")
+
+if __name__ == "__main__":
+    test_turn_tracker()
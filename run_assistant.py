@@ -9,10 +9,14 @@ Assistant vocal intelligent avec pipeline STT → LLM → TTS
 import argparse
 import asyncio
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
 import yaml
 from STT.stt_handler import STTHandler
+from STT.barge_in import BargeInMonitor
+from STT.vad_manager import OptimizedVADManager
 from LLM.llm_handler import LLMHandler
 from TTS.tts_handler import TTSHandler
 
@@ -20,6 +24,8 @@ from TTS.tts_handler import TTSHandler
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from Orchestrator.master_handler_robust import RobustMasterHandler
+from monitoring.turn_metrics import TurnLatencyTracker
+from monitoring.prometheus_exporter_enhanced import EnhancedMetricsCollector
 import numpy as np
 
 def parse_arguments():
@@ -154,6 +160,91 @@ def print_banner():
     """
     print(banner)
 
+def speak_response(llm_handler, tts_handler, transcription, conversation, turn_tracker, barge_in=None):
+    """Génère et prononce la réponse phrase par phrase, interruptible par la parole.
+    
+    Les phrases complètes sont confiées à un thread de synthèse : le LLM
+    continue de générer pendant que Piper synthétise la phrase précédente.
+    Pendant la génération, la synthèse et la lecture, barge_in écoute le micro :
+    si l'utilisateur parle, la lecture est coupée, la synthèse Piper tuée et la
+    génération arrêtée au token suivant.
+    
+    Returns:
+        Dict: spoken (une phrase au moins passée à la lecture), interrupted,
+        et pour une interruption cancel_latency_ms, wasted_tokens, dropped_audio_ms
+    """
+    dropped_frames = []
+    stop_event = None
+    if barge_in:
+        # Thread audio : le son est coupé dès la détection
+        stop_event = barge_in.arm(on_barge_in=lambda: dropped_frames.append(tts_handler.stop_playback()))
+    requests_before = llm_handler.stats["requests"]
+    spoken = []
+    
+    # Synthèse dans l'ordre des phrases, hors de la boucle de génération
+    pending_sentences = queue.Queue()
+    
+    def synthesis_worker():
+        while True:
+            sentence = pending_sentences.get()
+            if sentence is None:
+                return
+            if stop_event is not None and stop_event.is_set():
+                continue
+            tts_handler.speak(sentence, blocking=False, stop_event=stop_event)
+            if stop_event is None or not stop_event.is_set():
+                spoken.append(sentence)
+    
+    synthesis_thread = threading.Thread(target=synthesis_worker, name="luxa-synthesis", daemon=True)
+    synthesis_thread.start()
+    
+    sentences = llm_handler.stream_sentences(
+        transcription, session=conversation,
+        on_first_token=lambda: turn_tracker.mark("llm_first_token"),
+        stop_event=stop_event)
+    try:
+        for sentence in sentences:
+            if stop_event is not None and stop_event.is_set():
+                break
+            pending_sentences.put(sentence)
+        pending_sentences.put(None)
+        synthesis_thread.join()
+        
+        # Lecture surveillée jusqu'au bout
+        if spoken:
+            while not tts_handler.wait_playback(timeout=0.05):
+                if stop_event is not None and stop_event.is_set():
+                    break
+    finally:
+        pending_sentences.put(None)
+        sentences.close()
+        if barge_in:
+            barge_in.disarm()
+    
+    if stop_event is None or not stop_event.is_set():
+        return {"spoken": bool(spoken), "interrupted": False}
+    
+    # Un segment a pu être mis en file juste après la détection
+    dropped_frames.append(tts_handler.stop_playback())
+    tts_handler.wait_playback(timeout=0.5)
+    
+    # Tokens générés jamais passés à la lecture (0 si la réponse venait du cache)
+    generated = 0
+    if llm_handler.stats["requests"] > requests_before and llm_handler.last_generation:
+        generated = llm_handler.last_generation["generated_tokens"]
+    handed_tokens = len(llm_handler.tokenize(" ".join(spoken))) if spoken else 0
+    wasted_tokens = max(0, generated - handed_tokens)
+    dropped_audio_ms = sum(dropped_frames) / tts_handler.player.sample_rate * 1000
+    cancel_latency_ms = barge_in.record_cancel(generated, wasted_tokens, dropped_audio_ms)
+    
+    return {
+        "spoken": bool(spoken),
+        "interrupted": True,
+        "cancel_latency_ms": cancel_latency_ms,
+        "wasted_tokens": wasted_tokens,
+        "dropped_audio_ms": dropped_audio_ms
+    }
+
 def main():
     """Fonction principale pour exécuter la boucle de l'assistant."""
     print("🚀 Démarrage de l'assistant vocal LUXA (MVP P0)...")
@@ -169,10 +260,40 @@ def main():
     # 2. Initialiser les modules
     try:
         print("🔧 Initialisation des modules...")
+        # Télémétrie LLM exportée vers Prometheus
+        metrics = EnhancedMetricsCollector(port=(config.get('monitoring') or {}).get('prometheus_port', 8000))
+        # Serveur /metrics (et mises à jour périodiques) hors de la boucle de l'assistant
+        threading.Thread(target=metrics.start_server, daemon=True, name="luxa-metrics").start()
         stt_handler = STTHandler(config['stt'])
-        llm_handler = LLMHandler(config['llm'])
+        llm_handler = LLMHandler(config['llm'], config.get('performance_thresholds'), metrics=metrics)
         tts_handler = TTSHandler(config['tts'])
         print("✅ Tous les modules sont initialisés!")
+        
+        # Instrumentation fin de parole → premier son
+        turn_tracker = TurnLatencyTracker(metrics)
+        tts_handler.attach_turn_tracker(turn_tracker)
+        
+        # Conversation multi-tours : seul le nouveau tour est évalué par le LLM
+        conversation = llm_handler.create_session()
+        
+        # Barge-in : le micro reste écouté pendant la réponse
+        barge_in = None
+        barge_in_config = config.get('barge_in') or {}
+        if barge_in_config.get('enabled', True):
+            # VAD réel : un seuil d'énergie sur un micro ouvert se déclenche sur la réponse elle-même
+            frame_ms = barge_in_config.get('frame_ms', 32)
+            vad_manager = OptimizedVADManager(chunk_ms=frame_ms)
+            asyncio.run(vad_manager.initialize())
+            if vad_manager.backend in ("silero", "webrtc"):
+                barge_in = BargeInMonitor(
+                    is_speech=vad_manager.is_speech,
+                    frame_ms=frame_ms,
+                    min_speech_ms=barge_in_config.get('min_speech_ms', 150),
+                    pre_roll_ms=barge_in_config.get('pre_roll_ms', 300),
+                    metrics=metrics
+                )
+            else:
+                print("⚠️ Aucun VAD disponible : barge-in désactivé")
     except Exception as e:
         print(f"❌ ERREUR lors de l'initialisation: {e}")
         print(f"   Détails: {str(e)}")
@@ -182,32 +303,55 @@ def main():
     print("\n🎯 Assistant vocal LUXA prêt!")
     print("Appuyez sur Ctrl+C pour arrêter")
     
+    # Début de phrase capté pendant une réponse interrompue
+    interrupted_audio = None
+    
     try:
         while True:
             print("\n" + "="*50)
-            input("Appuyez sur Entrée pour commencer l'écoute...")
+            if interrupted_audio is None:
+                input("Appuyez sur Entrée pour commencer l'écoute...")
+            else:
+                print("🎤 Réponse interrompue, écoute de la suite...")
+            prefix_audio, interrupted_audio = interrupted_audio, None
             
             # Pipeline STT → LLM → TTS
             try:
                 # 1. Écouter et transcrire
-                transcription = stt_handler.listen_and_transcribe(duration=5)
+                transcription = stt_handler.listen_and_transcribe(duration=5,
+                                                                  on_recording_end=turn_tracker.start_turn,
+                                                                  prefix_audio=prefix_audio)
+                turn_tracker.mark("stt_final")
                 
                 if transcription.strip():
                     print(f"📝 Transcription: '{transcription}'")
                     
-                    # 2. Générer une réponse
-                    response = llm_handler.get_response(transcription)
+                    # 2. Générer la réponse en streaming et 3. prononcer chaque phrase
+                    #    dès qu'elle est complète, pendant que le LLM continue
+                    outcome = speak_response(llm_handler, tts_handler, transcription, conversation,
+                                             turn_tracker, barge_in)
                     
-                    if response.strip():
-                        # 3. Prononcer la réponse
-                        tts_handler.speak(response)
+                    if outcome["interrupted"]:
+                        turn_tracker.end_turn()
+                        interrupted_audio = barge_in.captured_audio()
+                        print(f"✋ Barge-in: arrêt en {outcome['cancel_latency_ms']:.0f}ms, "
+                              f"{outcome['wasted_tokens']} tokens non prononcés, "
+                              f"{outcome['dropped_audio_ms']:.0f}ms d'audio abandonnés")
+                    elif outcome["spoken"]:
+                        breakdown = turn_tracker.get_turn_breakdown()
+                        if breakdown and breakdown["time_to_first_audio_ms"] is not None:
+                            print(f"⏱️ Fin de parole → premier son: {breakdown['time_to_first_audio_ms']:.0f}ms "
+                                  f"{ {k: round(v) for k, v in breakdown['stages_ms'].items()} }")
                     else:
                         print("⚠️ Le LLM n'a pas généré de réponse.")
+                        turn_tracker.end_turn()
                 else:
                     print("⚠️ Aucune parole détectée, réessayez.")
+                    turn_tracker.end_turn()
                     
             except Exception as e:
                 print(f"❌ Erreur dans le pipeline: {e}")
+                turn_tracker.end_turn()
                 continue
                 
     except KeyboardInterrupt: